@@ -0,0 +1,274 @@
+"""
+Local stand-ins for the third-party APIs the services call
+One aiohttp app answers for every upstream, each under its own prefix and
+with the response shape the services parse:
+
+  POST /groq/openai/v1/chat/completions      Groq chat completions
+  POST /serper/search                        Serper Google search
+  GET  /jsearch/search                       JSearch (RapidAPI)
+  GET  /adzuna/v1/api/jobs/{country}/search/{page}
+  POST /razorpay/v1/orders                   Razorpay order creation
+
+Every target has a configurable latency (seconds, with +/- jitter) and error
+rate; errors answer 500 (429 for Groq, like its rate limiter). The random
+source is seeded so two runs with the same settings see the same errors.
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import Counter
+from typing import Dict
+
+from aiohttp import web
+
+TARGETS = ("groq", "serper", "jsearch", "adzuna", "razorpay")
+DEFAULT_LATENCY = {"groq": 0.4, "serper": 0.15, "jsearch": 0.2, "adzuna": 0.2, "razorpay": 0.1}
+
+SKILLS = ["Python", "JavaScript", "React", "SQL", "Docker", "AWS", "Git", "REST APIs"]
+COMPANIES = ["Flipkart", "Razorpay", "Swiggy", "Microsoft", "Google", "Zomato"]
+
+
+def _jobs(n):
+    return [{
+        "id": f"fake_job_{i}",
+        "title": f"Software Engineer {i}",
+        "company": COMPANIES[i % len(COMPANIES)],
+        "location": "Bangalore, India",
+        "salary": "$90k-$140k/year",
+        "description": "Build and operate backend services with Python and React.",
+        "requirements": SKILLS[i % 4:i % 4 + 4],
+        "url": f"https://example.com/jobs/{i}",
+        "posted_date": "2024-10-15T00:00:00Z",
+        "remote": i % 2 == 0,
+        "source": "LinkedIn"
+    } for i in range(n)]
+
+
+def _mentors(n):
+    return [{
+        "name": f"Mentor {i}",
+        "title": "Senior Software Engineer",
+        "company": COMPANIES[i % len(COMPANIES)],
+        "location": "Bangalore, Karnataka, India",
+        "profile_url": f"https://www.linkedin.com/in/fake-mentor-{i}",
+        "headline": f"Senior Software Engineer at {COMPANIES[i % len(COMPANIES)]}",
+        "about": "Backend engineer who enjoys mentoring people new to the field.",
+        "experience_years": 4 + i % 6,
+        "connections": "1000+",
+        "skills": SKILLS[:5],
+        "is_real_profile": True,
+        "source_type": "linkedin"
+    } for i in range(n)]
+
+
+def _projects(n):
+    return [{
+        "title": f"Benchmark Project {i}",
+        "description": "A portfolio project exercising the skills of the goal.",
+        "difficulty": "Intermediate",
+        "skills": SKILLS[i % 4:i % 4 + 4],
+        "duration": "2-4 weeks",
+        "category": "web-dev"
+    } for i in range(n)]
+
+
+def _steps(n):
+    return [{
+        "category": f"Step {i + 1}",
+        "skills": SKILLS[i % 4:i % 4 + 3],
+        "description": "Learn and practise these skills with a small project."
+    } for i in range(n)]
+
+
+# The services all talk to the same chat-completions endpoint; the prompt
+# tells which JSON they expect back. First match wins.
+GROQ_REPLIES = [
+    ("Score each job", lambda: json.dumps([{"index": i, "match_score": 90 - 5 * i, "reason": "Good skill overlap"}
+                                           for i in range(15)])),
+    ('"profile_url"', lambda: json.dumps(_mentors(8))),
+    ("realistic current job listings", lambda: json.dumps(_jobs(10))),
+    ("extract a structured learning roadmap", lambda: json.dumps(_steps(5))),
+    ("project", lambda: json.dumps(_projects(5))),
+]
+CHAT_REPLY = ("Great question! Start with the fundamentals, then build two small projects "
+              "to practise them. Here is a plan:\n\n1. Learn the basics\n2. Build a project\n3. Deploy it")
+
+
+def groq_reply(prompt: str) -> str:
+    for marker, reply in GROQ_REPLIES:
+        if marker in prompt:
+            return reply()
+    return CHAT_REPLY
+
+
+class FakeUpstreams:
+    def __init__(self, latency: Dict[str, float] = None, error_rate: Dict[str, float] = None,
+                 jitter: float = 0.2, seed: int = 0):
+        self.latency = dict(DEFAULT_LATENCY, **(latency or {}))
+        self.error_rate = {target: 0.0 for target in TARGETS}
+        self.error_rate.update(error_rate or {})
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.calls = Counter()
+        self.errors = Counter()
+
+    async def _delay(self, target: str) -> bool:
+        """Sleep for the target's latency; True when this call should fail"""
+        self.calls[target] += 1
+        base = self.latency[target]
+        await asyncio.sleep(max(0.0, base * (1 + self.random.uniform(-self.jitter, self.jitter))))
+        if self.random.random() < self.error_rate[target]:
+            self.errors[target] += 1
+            return True
+        return False
+
+    async def groq(self, request):
+        body = await request.json()
+        if await self._delay("groq"):
+            return web.json_response({"error": {"message": "Rate limit reached"}}, status=429)
+        prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+        content = groq_reply(prompt)
+        return web.json_response({
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "model": body.get("model", ""),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4}
+        })
+
+    async def serper(self, request):
+        body = await request.json()
+        if await self._delay("serper"):
+            return web.json_response({"message": "Internal error"}, status=500)
+        return web.json_response({
+            "searchParameters": {"q": body.get("q", "")},
+            "organic": [{
+                "title": f"Mentor {i} - Senior Software Engineer - {COMPANIES[i % len(COMPANIES)]} | LinkedIn",
+                "link": f"https://www.linkedin.com/in/fake-mentor-{i}",
+                "snippet": "Senior Software Engineer in Bangalore. Python, React and cloud.",
+                "position": i + 1
+            } for i in range(10)]
+        })
+
+    async def jsearch(self, request):
+        if await self._delay("jsearch"):
+            return web.json_response({"message": "Internal error"}, status=500)
+        return web.json_response({"status": "OK", "data": [{
+            "job_id": job["id"],
+            "job_title": job["title"],
+            "employer_name": job["company"],
+            "job_city": "Bangalore",
+            "job_state": "KA",
+            "job_description": job["description"],
+            "job_required_skills": job["requirements"],
+            "job_apply_link": job["url"],
+            "job_posted_at_datetime_utc": job["posted_date"],
+            "job_is_remote": job["remote"],
+            "job_employment_type": "FULLTIME"
+        } for job in _jobs(10)]})
+
+    async def adzuna(self, request):
+        if await self._delay("adzuna"):
+            return web.json_response({"exception": "Internal error"}, status=500)
+        return web.json_response({"count": 10, "results": [{
+            "id": f"adzuna_{i}",
+            "title": f"Backend Developer {i}",
+            "company": {"display_name": COMPANIES[i % len(COMPANIES)]},
+            "location": {"display_name": "Bangalore, Karnataka"},
+            "salary_min": 60000,
+            "salary_max": 90000,
+            "description": "Remote-friendly backend role working with Python services.",
+            "redirect_url": f"https://example.com/adzuna/{i}",
+            "created": "2024-10-15T00:00:00Z"
+        } for i in range(10)]})
+
+    async def razorpay(self, request):
+        body = await request.json()
+        if await self._delay("razorpay"):
+            return web.json_response({"error": {"code": "SERVER_ERROR", "description": "Internal error"}}, status=500)
+        return web.json_response({
+            "id": f"order_fake{self.calls['razorpay']}",
+            "entity": "order",
+            "amount": body.get("amount", 0),
+            "currency": body.get("currency", "INR"),
+            "receipt": body.get("receipt"),
+            "status": "created",
+            "notes": body.get("notes", {}),
+            "created_at": int(time.time())
+        })
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/groq/openai/v1/chat/completions", self.groq)
+        app.router.add_post("/serper/search", self.serper)
+        app.router.add_get("/jsearch/search", self.jsearch)
+        app.router.add_get("/adzuna/v1/api/jobs/{country}/search/{page}", self.adzuna)
+        app.router.add_post("/razorpay/v1/orders", self.razorpay)
+        return app
+
+    def stats(self) -> dict:
+        return {target: {"calls": self.calls[target], "errors": self.errors[target],
+                         "latency_s": self.latency[target], "error_rate": self.error_rate[target]}
+                for target in TARGETS}
+
+
+def service_env(base_url: str) -> Dict[str, str]:
+    """Environment pointing every service at the stand-ins, with dummy keys so each upstream path runs"""
+    return {
+        "GROQ_API_URL": f"{base_url}/groq/openai/v1/chat/completions",
+        "GROQ_API_KEY": "bench-groq-key",
+        "SERPER_API_URL": f"{base_url}/serper/search",
+        "SERPER_API_KEY": "bench-serper-key",
+        "JSEARCH_API_URL": f"{base_url}/jsearch/search",
+        "RAPIDAPI_KEY": "bench-rapidapi-key",
+        "ADZUNA_API_URL": f"{base_url}/adzuna/v1/api/jobs",
+        "ADZUNA_APP_ID": "bench-adzuna-id",
+        "ADZUNA_API_KEY": "bench-adzuna-key",
+        "RAZORPAY_BASE_URL": f"{base_url}/razorpay",
+        "RAZORPAY_KEY_ID": "rzp_test_bench",
+        "RAZORPAY_KEY_SECRET": "bench-secret",
+    }
+
+
+class FakeUpstreamServer:
+    """Runs FakeUpstreams on 127.0.0.1 in a background thread
+
+        with FakeUpstreamServer(FakeUpstreams()) as server:
+            env = service_env(server.url)
+    """
+
+    def __init__(self, upstreams: FakeUpstreams, port: int = 0):
+        self.upstreams = upstreams
+        self.port = port
+        self.url = None
+        self._loop = None
+        self._runner = None
+        self._thread = None
+
+    def __enter__(self):
+        started = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._runner = web.AppRunner(self.upstreams.app(), access_log=None)
+            self._loop.run_until_complete(self._runner.setup())
+            site = web.TCPSite(self._runner, "127.0.0.1", self.port)
+            self._loop.run_until_complete(site.start())
+            self.port = self._runner.addresses[0][1]
+            self.url = f"http://127.0.0.1:{self.port}"
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        if not started.wait(10):
+            raise RuntimeError("Fake upstream server did not start")
+        return self
+
+    def __exit__(self, *exc):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(10)
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the pure hot-path functions
+Times the CPU-bound helpers that run on every request, one call at a time,
+on realistic inputs: rows of the roadmap CSV datasets, synthetic resumes of
+three sizes, the project catalog in ai_projects.json and typical chat
+messages and goals. Reports calls per second and, from tracemalloc, the peak
+memory a call allocates and what it leaves allocated.
+
+Save a baseline before optimizing and compare against it afterwards:
+
+  python benchmarks/microbench.py --save-baseline before.json
+  python benchmarks/microbench.py --baseline before.json
+
+Usage: python benchmarks/microbench.py [-k substring] [--min-time 0.2] [--repeat 5]
+       [--save-baseline FILE] [--baseline FILE] [--tolerance 0.15]
+Exits non-zero when --baseline finds a benchmark slower than the tolerance.
+"""
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(ROOT, "shared"))  # pathwise_shared, unless installed
+
+
+def load_service(service: str, *siblings: str):
+    """Import service/main.py under its own name, so services with the same module names can coexist
+
+    Returns main, or (main, *siblings) when other modules of the service are asked for.
+    """
+    service_dir = os.path.join(ROOT, service)
+    before = set(sys.modules)
+    sys.path.insert(0, service_dir)
+    try:
+        spec = importlib.util.spec_from_file_location(f"{service}_main", os.path.join(service_dir, "main.py"))
+        module = importlib.util.module_from_spec(spec)
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            spec.loader.exec_module(module)
+            extra = [importlib.import_module(name) for name in siblings]
+    finally:
+        sys.path.remove(service_dir)
+        # Forget the service's sibling modules (indexes, metrics, ...) so the
+        # next service imports its own; this one keeps its references
+        for name in set(sys.modules) - before:
+            if (getattr(sys.modules[name], "__file__", None) or "").startswith(service_dir + os.sep):
+                del sys.modules[name]
+    return (module, *extra) if siblings else module
+
+
+# Fixtures
+
+SKILLS = ["Python", "JavaScript", "TypeScript", "React", "Node.js", "Django", "FastAPI", "SQL",
+          "PostgreSQL", "MongoDB", "Docker", "Kubernetes", "AWS", "Git", "TensorFlow", "Pandas"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Stark Industries", "Wayne Tech"]
+TITLES = ["Software Engineer", "Senior Software Engineer", "Backend Developer", "Data Engineer",
+          "Full Stack Developer", "Machine Learning Engineer"]
+
+CHAT_MESSAGES = [
+    "How do I become a full stack developer?",
+    "What should I learn first for machine learning?",
+    "Can you suggest a roadmap for python django development",
+    "I want to get into cyber security, where do I start?",
+    "Which is better for mobile apps, flutter or react native?",
+    "How long does it take to learn data science with pandas?",
+    "What cloud certifications are worth it for devops engineers?",
+    "Explain the difference between SQL and NoSQL databases",
+    "hi",
+    "I'm a designer who wants to learn UI UX research methods",
+]
+
+PROJECT_AIMS = [
+    "full stack web developer", "machine learning engineer", "data scientist",
+    "android app developer", "python backend developer", "react frontend developer",
+    "cloud devops engineer", "ai chatbot builder",
+]
+
+
+def synthetic_resume(jobs: int, projects: int, seed: int) -> str:
+    """A plain-text resume with the sections the parser looks for"""
+    rng = random.Random(seed)
+    lines = ["JOHN DOE", "Senior Software Engineer",
+             "john.doe@example.com | +1 (555) 123-4567 | linkedin.com/in/johndoe | github.com/johndoe",
+             "", "SUMMARY",
+             f"Engineer with {jobs + 2} years of experience building web services and data pipelines.",
+             "", "EXPERIENCE"]
+    for i in range(jobs):
+        start = 2023 - 2 * (i + 1)
+        lines.append(f"{rng.choice(TITLES)} - {rng.choice(COMPANIES)} ({start} - {start + 2 if i else 'Present'})")
+        for _ in range(4):
+            used = ", ".join(rng.sample(SKILLS, 3))
+            lines.append(f"- Built and operated services with {used}, cutting latency by {rng.randint(10, 60)}%")
+    lines += ["", "EDUCATION", "B.Tech in Computer Science, State University, 2015",
+              "M.S. in Software Engineering, Tech Institute, 2017", "", "PROJECTS"]
+    for i in range(projects):
+        lines.append(f"Project {i + 1}: {rng.choice(['Chat', 'Search', 'Analytics', 'Payments'])} platform "
+                     f"using {', '.join(rng.sample(SKILLS, 4))}")
+    lines += ["", "CERTIFICATIONS", "AWS Certified Solutions Architect", "",
+              "SKILLS", ", ".join(SKILLS)]
+    return "\n".join(lines)
+
+
+RESUMES = {
+    "small": synthetic_resume(jobs=1, projects=1, seed=1),
+    "medium": synthetic_resume(jobs=4, projects=3, seed=2),
+    "large": synthetic_resume(jobs=12, projects=10, seed=3),
+}
+
+
+class Bench:
+    """func called once per input tuple; one call is one op"""
+
+    def __init__(self, name: str, func, inputs):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+
+
+def build_benchmarks():
+    benches = []
+
+    roadmap, catalog_artifact = load_service("roadmap_api", "catalog_artifact")
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        records = roadmap.read_datasets([os.path.normpath(os.path.join(ROOT, "roadmap_api", path))
+                                         for path in roadmap.DATASETS])
+    rng = random.Random(0)
+    sample = rng.sample(records, min(100, len(records)))
+    goals = [r["goal"] for r in rng.sample(records, 20)] + ["become a full stack developer", "learn ml"]
+
+    def best_roadmap(goal):
+        # The scoring loop of find_best_roadmap over every catalog roadmap
+        goal_lower = goal.lower()
+        best, best_score = None, 0
+        for record in records:
+            score = roadmap.score_roadmap(record, goal_lower, None)
+            if score > best_score:
+                best, best_score = record, score
+        return best
+
+    benches += [
+        Bench("roadmap.parse_roadmap_steps", catalog_artifact.parse_roadmap_steps,
+              [(r["roadmap_text"],) for r in sample]),
+        Bench("roadmap.calculate_semantic_similarity", roadmap.calculate_semantic_similarity,
+              [(goals[i % len(goals)].lower(), r["goal"].lower()) for i, r in enumerate(sample)]),
+        Bench("roadmap.find_best_roadmap scoring loop", best_roadmap, [(g,) for g in goals[:8]]),
+    ]
+
+    resume = load_service("resume_parser")
+    for size, text in RESUMES.items():
+        benches += [
+            Bench(f"resume.clean_resume_text[{size}]", resume.clean_resume_text, [(text,)]),
+            Bench(f"resume.extract_name[{size}]", resume.extract_name, [(text,)]),
+            Bench(f"resume.extract_skills[{size}]", resume.extract_skills, [(text,)]),
+            Bench(f"resume.extract_experience[{size}]", resume.extract_experience, [(text,)]),
+        ]
+
+    projects = load_service("project_recommendation_service")
+    benches.append(Bench("projects.recommend_with_rules", projects.recommend_with_rules,
+                         [(aim, 5) for aim in PROJECT_AIMS]))
+
+    linkedin = load_service("linkedin_mentor_service")
+    scraper = linkedin.LinkedInScraper()
+    benches.append(Bench("linkedin.LinkedInScraper.extract_key_skills", scraper.extract_key_skills,
+                         [(r["goal"], r["domain"]) for r in sample[:20]]))
+
+    chatbot = load_service("chatbot_service")
+    benches.append(Bench("chatbot.extract_domain_from_message", chatbot.extract_domain_from_message,
+                         [(m,) for m in CHAT_MESSAGES]))
+    return benches
+
+
+# Measurement
+
+def run_rounds(bench: Bench, rounds: int) -> float:
+    func, inputs = bench.func, bench.inputs
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for args in inputs:
+            func(*args)
+    return time.perf_counter() - start
+
+
+def measure(bench: Bench, min_time: float, repeat: int) -> dict:
+    rounds = 1
+    while True:
+        elapsed = run_rounds(bench, rounds)
+        if elapsed >= min_time:
+            break
+        rounds = max(rounds * 2, int(rounds * min_time / max(elapsed, 1e-9) * 1.1))
+    best = min(run_rounds(bench, rounds) for _ in range(repeat))
+    calls = rounds * len(bench.inputs)
+
+    peaks, retained = [], []
+    tracemalloc.start()
+    try:
+        for args in bench.inputs:
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            result = bench.func(*args)
+            current, peak = tracemalloc.get_traced_memory()
+            del result
+            peaks.append(peak - before)
+            retained.append(current - before)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "ops_per_sec": round(calls / best, 1),
+        "us_per_op": round(best / calls * 1e6, 3),
+        "inputs": len(bench.inputs),
+        "peak_alloc_bytes": int(sum(peaks) / len(peaks)),
+        "retained_bytes": int(sum(retained) / len(retained)),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def compare(baseline: dict, results: dict, tolerance: float) -> int:
+    """Print the speed change per benchmark; returns how many got slower than tolerance"""
+    slower = 0
+    print(f"\nCompared with {baseline.get('git_commit') or 'baseline'} ({baseline.get('started_at', '?')}):")
+    for name, new in results["benchmarks"].items():
+        old = baseline.get("benchmarks", {}).get(name)
+        if old is None:
+            continue
+        change = new["ops_per_sec"] / old["ops_per_sec"] - 1
+        tag = "SLOWER" if change < -tolerance else ("faster" if change > tolerance else "same")
+        slower += tag == "SLOWER"
+        print(f"  [{tag:<6}] {name:<58} {old['ops_per_sec']:>12,.0f} -> {new['ops_per_sec']:>12,.0f} ops/s "
+              f"({change:+.0%}), peak {old['peak_alloc_bytes']:,} -> {new['peak_alloc_bytes']:,} B")
+    print(f"  {slower} benchmark(s) slower by more than {tolerance:.0%}")
+    return slower
+
+
+def main(args):
+    os.environ.setdefault("PROJECTS_DB_FILE", os.path.join(ROOT, "project_recommendation_service", "ai_projects.json"))
+    benches = [b for b in build_benchmarks() if not args.k or args.k in b.name]
+    results = {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "settings": {"min_time": args.min_time, "repeat": args.repeat},
+        "benchmarks": {},
+    }
+
+    print(f"{'benchmark':<60} {'ops/s':>12} {'us/op':>10} {'peak alloc':>12} {'retained':>10}")
+    for bench in benches:
+        # The services print while they work; keep the table readable
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            r = measure(bench, args.min_time, args.repeat)
+        results["benchmarks"][bench.name] = r
+        print(f"{bench.name:<60} {r['ops_per_sec']:>12,.0f} {r['us_per_op']:>10.2f} "
+              f"{r['peak_alloc_bytes']:>10,} B {r['retained_bytes']:>8,} B", flush=True)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved baseline to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            return 1 if compare(json.load(f), results, args.tolerance) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmark the pure hot-path functions")
+    parser.add_argument("-k", help="only run benchmarks whose name contains this")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing run")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs per benchmark; the fastest counts")
+    parser.add_argument("--save-baseline", metavar="FILE", help="write the results here")
+    parser.add_argument("--baseline", metavar="FILE", help="compare against results saved earlier")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="slowdown allowed before flagging")
+    sys.exit(main(parser.parse_args()))
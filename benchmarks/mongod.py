@@ -0,0 +1,76 @@
+"""
+Throwaway MongoDB for benchmark runs
+Starts mongod on a free local port with a temporary data directory and
+removes both when done, so runs never touch a developer's database and
+always start from the same empty state.
+
+  with ThrowawayMongod() as uri:
+      ...
+
+The binary is MONGOD from the environment, or mongod on PATH.
+"""
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class ThrowawayMongod:
+    def __init__(self, binary: str = None, startup_timeout: float = 30.0):
+        self.binary = binary or os.getenv("MONGOD") or shutil.which("mongod")
+        self.startup_timeout = startup_timeout
+        self.process = None
+        self.dbpath = None
+        self.uri = None
+
+    def __enter__(self) -> str:
+        if not self.binary:
+            raise RuntimeError("mongod not found; install MongoDB, set MONGOD, or pass --mongodb-uri")
+        self.dbpath = tempfile.mkdtemp(prefix="bench-mongod-")
+        port = free_port()
+        self.process = subprocess.Popen(
+            [self.binary, "--dbpath", self.dbpath, "--port", str(port), "--bind_ip", "127.0.0.1",
+             "--quiet", "--logpath", os.path.join(self.dbpath, "mongod.log")],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        self.uri = f"mongodb://127.0.0.1:{port}/"
+        deadline = time.monotonic() + self.startup_timeout
+        while True:
+            if self.process.poll() is not None:
+                self._cleanup()
+                raise RuntimeError(f"mongod exited with status {self.process.returncode}")
+            try:
+                with MongoClient(self.uri, serverSelectionTimeoutMS=500) as client:
+                    client.admin.command("ping")
+                return self.uri
+            except PyMongoError:
+                if time.monotonic() > deadline:
+                    self.__exit__()
+                    raise RuntimeError("mongod did not start")
+                time.sleep(0.2)
+
+    def __exit__(self, *exc):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(15)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self._cleanup()
+
+    def _cleanup(self):
+        if self.dbpath:
+            shutil.rmtree(self.dbpath, ignore_errors=True)
+            self.dbpath = None
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark harness for the Python services
+Starts a throwaway mongod and local stand-ins for Groq, Serper, JSearch,
+Adzuna and Razorpay (fake_upstreams.py), then runs each service's scripted
+user scenario (scenarios.py) in its own process against them. Reports
+p50/p95/p99 latency and throughput per endpoint and writes everything,
+including the settings and upstream call counts, as JSON.
+
+Nothing leaves the machine, every service starts from an empty database,
+and upstream latency/error rates are fixed and seeded, so two runs of the
+same tree give comparable numbers. --compare flags endpoints whose p95 grew
+by more than --tolerance, or that fail more often, against an earlier run.
+
+Usage:
+  python benchmarks/run_benchmarks.py [service ...] [--users 8] [--iterations 5]
+      [--latency groq=0.4,serper=0.15] [--error-rate groq=0.05] [--seed 0]
+      [--mongodb-uri mongodb://...] [--output benchmark_results.json]
+      [--compare previous.json] [--tolerance 0.25]
+Exits non-zero when a service fails to run or --compare finds a regression.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+from pymongo import MongoClient
+
+from fake_upstreams import TARGETS, FakeUpstreams, FakeUpstreamServer, service_env
+from mongod import ThrowawayMongod
+from scenarios import SCENARIOS
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+SERVICES = [
+    "roadmap_api",
+    "chatbot_service",
+    "job_agent_service",
+    "linkedin_mentor_service",
+    "project_recommendation_service",
+    "resume_parser",
+    "subscription_service",
+]
+SERVICE_TIMEOUT = 900
+
+
+def parse_targets(text: str) -> dict:
+    """"groq=0.4,serper=0.1" -> {"groq": 0.4, "serper": 0.1}"""
+    values = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        target, _, value = item.partition("=")
+        if target not in TARGETS:
+            raise argparse.ArgumentTypeError(f"unknown upstream {target!r}; expected one of {', '.join(TARGETS)}")
+        values[target] = float(value)
+    return values
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def run_service(service, args, env, workdir) -> dict:
+    output = os.path.join(workdir, f"{service}.json")
+    log_path = os.path.join(workdir, f"{service}.log")
+    with open(log_path, "w") as log:
+        result = subprocess.run(
+            [sys.executable, os.path.join(BENCH_DIR, "service_runner.py"), service, "--output", output,
+             "--users", str(args.users), "--iterations", str(args.iterations), "--warmup", str(args.warmup)],
+            env=env, stdout=log, stderr=subprocess.STDOUT, timeout=SERVICE_TIMEOUT
+        )
+    if result.returncode != 0 or not os.path.exists(output):
+        with open(log_path) as log:
+            tail = log.read().strip().splitlines()[-15:]
+        raise RuntimeError(f"exit {result.returncode}\n    " + "\n    ".join(tail))
+    with open(output) as f:
+        return json.load(f)
+
+
+def print_report(name, result):
+    print(f"\n{name}: {result['requests']} requests in {result['wall_seconds']:.1f}s "
+          f"({result['throughput_rps']:.1f} req/s, {result['errors']} errors)")
+    print(f"  {'endpoint':<56} {'count':>6} {'err':>4} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for endpoint, e in result["endpoints"].items():
+        print(f"  {endpoint:<56} {e['count']:>6} {e['errors']:>4} {e['throughput_rps']:>7.1f} "
+              f"{e['p50_ms']:>8.1f} {e['p95_ms']:>8.1f} {e['p99_ms']:>8.1f}")
+
+
+def compare(previous, current, tolerance: float) -> int:
+    """Print p95 and error changes per endpoint; returns the number of regressions"""
+    regressions = 0
+    print(f"\nCompared with {previous.get('git_commit') or 'previous run'} ({previous.get('started_at', '?')}):")
+    for service, result in current["services"].items():
+        old_endpoints = previous.get("services", {}).get(service, {}).get("endpoints", {})
+        for endpoint, new in result.get("endpoints", {}).items():
+            old = old_endpoints.get(endpoint)
+            if old is None:
+                continue
+            change = (new["p95_ms"] - old["p95_ms"]) / old["p95_ms"] if old["p95_ms"] else 0.0
+            worse = change > tolerance or new["errors"] > old["errors"]
+            regressions += worse
+            if worse or abs(change) > tolerance:
+                tag = "REGRESSED" if worse else "improved"
+                print(f"  [{tag:<9}] {service} {endpoint}: p95 {old['p95_ms']:.1f} -> {new['p95_ms']:.1f}ms "
+                      f"({change:+.0%}), errors {old['errors']} -> {new['errors']}")
+    print(f"  {regressions} regression(s) beyond {tolerance:.0%}")
+    return regressions
+
+
+def main(args):
+    upstreams = FakeUpstreams(args.latency, args.error_rate, jitter=args.jitter, seed=args.seed)
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "settings": {
+            "users": args.users,
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "seed": args.seed,
+            "jitter": args.jitter,
+            "upstream_latency_s": upstreams.latency,
+            "upstream_error_rate": upstreams.error_rate,
+        },
+        "services": {},
+    }
+    failures = 0
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    mongod = None if args.mongodb_uri else ThrowawayMongod()
+    try:
+        mongodb_uri = args.mongodb_uri or mongod.__enter__()
+        with FakeUpstreamServer(upstreams) as server:
+            # The project catalog is a JSON file the service rewrites; work on a copy
+            projects_file = os.path.join(workdir, "ai_projects.json")
+            shutil.copy(os.path.join(ROOT, "project_recommendation_service", "ai_projects.json"), projects_file)
+            env = dict(os.environ, MONGODB_URI=mongodb_uri, MONGODB_URL=mongodb_uri,
+                       PROJECTS_DB_FILE=projects_file, WEB_CONCURRENCY="1", **service_env(server.url))
+            env.pop("METRICS_DIR", None)
+
+            for service in args.services or SERVICES:
+                with MongoClient(mongodb_uri) as client:
+                    client.drop_database("pathwise")
+                calls_before = dict(upstreams.calls)
+                print(f"Running {service}...", flush=True)
+                try:
+                    result = run_service(service, args, env, workdir)
+                except (RuntimeError, subprocess.TimeoutExpired) as e:
+                    failures += 1
+                    print(f"  {service} failed: {e}")
+                    report["services"][service] = {"error": str(e)}
+                    continue
+                result["upstream_calls"] = {t: upstreams.calls[t] - calls_before.get(t, 0)
+                                            for t in TARGETS if upstreams.calls[t] - calls_before.get(t, 0)}
+                report["services"][service] = result
+                print_report(service, result)
+        report["upstreams"] = upstreams.stats()
+    finally:
+        if mongod is not None:
+            mongod.__exit__()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.output}")
+
+    regressions = 0
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.tolerance)
+    return 1 if failures or regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the services offline against local stand-ins")
+    parser.add_argument("services", nargs="*", choices=sorted(SCENARIOS), default=[],
+                        help=f"services to run (default: all {len(SERVICES)})")
+    parser.add_argument("--users", type=int, default=8, help="concurrent virtual users per service")
+    parser.add_argument("--iterations", type=int, default=5, help="scenario runs per user")
+    parser.add_argument("--warmup", type=int, default=1, help="unrecorded scenario runs per user first")
+    parser.add_argument("--latency", type=parse_targets, default={}, help="per-upstream latency in seconds")
+    parser.add_argument("--error-rate", type=parse_targets, default={}, help="per-upstream error rate, 0-1")
+    parser.add_argument("--jitter", type=float, default=0.2, help="latency jitter as a fraction")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mongodb-uri", help="use this MongoDB instead of a throwaway mongod (its pathwise database is dropped)")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 growth before flagging")
+    sys.exit(main(parser.parse_args()))
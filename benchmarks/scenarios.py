@@ -0,0 +1,140 @@
+"""
+Scripted user scenarios for the benchmark harness
+Each service has one scenario: the sequence of calls a typical user session
+makes, run by every virtual user on every iteration. Paths and bodies are
+templates filled from the user's variables ({user}, plus anything setup()
+seeds or a step saves from its response), and a step is reported under its
+template, e.g. "GET /chats/{user}/{chat_id}".
+"""
+from typing import Any, Callable, Dict, List, Optional
+
+from bson import ObjectId
+
+
+class Step:
+    def __init__(self, method: str, path: str, json: Any = None, params: Dict[str, str] = None,
+                 expect=(200,), save: Dict[str, str] = None):
+        self.method = method
+        self.path = path
+        self.json = json
+        self.params = params
+        self.expect = expect
+        self.save = save or {}  # variable name -> field of the JSON response
+
+    @property
+    def name(self) -> str:
+        return f"{self.method} {self.path}"
+
+
+class Scenario:
+    def __init__(self, steps: List[Step], setup: Optional[Callable[[Any, List[dict]], None]] = None):
+        self.steps = steps
+        self.setup = setup  # setup(db, users): seed MongoDB and add per-user variables
+
+
+def fill(template, variables: dict):
+    """template with {name} placeholders replaced, recursively through dicts and lists"""
+    if isinstance(template, str):
+        return template.format(**variables)
+    if isinstance(template, dict):
+        return {key: fill(value, variables) for key, value in template.items()}
+    if isinstance(template, list):
+        return [fill(value, variables) for value in template]
+    return template
+
+
+GOAL = "Become a Full Stack Developer"
+
+USER_ROADMAP = {
+    "goal": GOAL,
+    "title": GOAL,
+    "domain": "Full Stack Development",
+    "source": "user_generated",
+    "steps": [
+        {"category": "Frontend", "skills": ["HTML", "CSS", "JavaScript", "React"]},
+        {"category": "Backend", "skills": ["Python", "FastAPI", "SQL", "MongoDB"]},
+        {"category": "DevOps", "skills": ["Docker", "Git", "AWS"]},
+    ],
+}
+
+RESUME = """John Doe
+Senior Software Engineer
+john.doe@example.com | +1 555 123 4567 | linkedin.com/in/johndoe
+
+SUMMARY
+Backend engineer with 6 years of experience building Python and JavaScript services.
+
+EXPERIENCE
+Senior Software Engineer, Acme Corp (2021 - Present)
+- Built FastAPI services backed by MongoDB and Redis serving 2M requests a day
+- Led the migration from a monolith to Docker-based microservices on AWS
+Software Engineer, Widgets Inc (2018 - 2021)
+- Developed React dashboards and REST APIs in Node.js and Express
+
+EDUCATION
+B.Tech in Computer Science, State University, 2018
+
+SKILLS
+Python, JavaScript, TypeScript, React, Node.js, FastAPI, MongoDB, PostgreSQL, Docker, Kubernetes, AWS, Git
+"""
+
+
+def seed_user_roadmaps(db, users):
+    db["roadmap"].insert_many([dict(USER_ROADMAP, user_id=user["user"]) for user in users])
+
+
+def seed_subscription_users(db, users):
+    for user in users:
+        user["user_oid"] = str(db["users"].insert_one({
+            "email": f"{user['user']}@example.com",
+            "firstName": "Bench",
+            "lastName": user["user"],
+        }).inserted_id)
+
+
+SCENARIOS = {
+    "roadmap_api": Scenario([
+        Step("POST", "/api/roadmap/generate-roadmap", {"goal": GOAL, "user_id": "{user}"}),
+        Step("GET", "/api/roadmap/roadmaps/user/{user}"),
+        Step("GET", "/api/roadmap/roadmaps/domains"),
+        Step("GET", "/api/roadmap/roadmaps/similar", params={"goal": "data scientist"}),
+        Step("POST", "/api/roadmap/skill-path", {"goal": GOAL, "completed_skills": ["HTML", "CSS"]}),
+    ]),
+    "chatbot_service": Scenario([
+        Step("POST", "/chats/new", {"user_id": "{user}", "title": "Benchmark chat"}, save={"chat_id": "chat_id"}),
+        Step("POST", "/chat", {"message": "How do I become a full stack developer?",
+                               "user_id": "{user}", "chat_id": "{chat_id}"}),
+        Step("POST", "/chat", {"message": "Which backend framework should I learn first?",
+                               "user_id": "{user}", "chat_id": "{chat_id}"}),
+        Step("GET", "/chats/{user}"),
+        Step("GET", "/chats/{user}/{chat_id}"),
+        Step("GET", "/chats/{user}/{chat_id}/messages", params={"limit": 20}),
+        Step("POST", "/roadmap/create-from-chat", {"user_id": "{user}", "chat_id": "{chat_id}",
+                                                   "title": "From chat", "goal": GOAL}),
+    ]),
+    "job_agent_service": Scenario([
+        Step("POST", "/api/jobs/search", {"user_id": "{user}", "query": "python developer", "limit": 10}),
+        Step("POST", "/api/jobs/search", {"user_id": "{user}", "limit": 10}),
+        Step("GET", "/api/jobs/user/{user}"),
+    ], setup=seed_user_roadmaps),
+    "linkedin_mentor_service": Scenario([
+        Step("POST", "/api/mentors/scrape", {"user_id": "{user}", "limit": 8, "refresh_cache": True}),
+        Step("POST", "/api/mentors/scrape", {"user_id": "{user}", "limit": 8}),
+    ], setup=seed_user_roadmaps),
+    "project_recommendation_service": Scenario([
+        Step("POST", "/api/recommend", {"aim": "full stack web developer", "limit": 5}),
+        Step("POST", "/api/recommend/phase", {"phase": "Backend Development", "limit": 3}),
+        Step("GET", "/api/projects"),
+    ]),
+    "resume_parser": Scenario([
+        Step("POST", "/parse-text", {"text": RESUME}),
+        Step("GET", "/resumes"),
+    ]),
+    "subscription_service": Scenario([
+        Step("GET", "/api/subscription/plans"),
+        Step("GET", "/api/subscription/user/{user_oid}"),
+        Step("GET", "/api/subscription/feature-access/{user_oid}/roadmaps"),
+        Step("POST", "/api/subscription/usage/{user_oid}/roadmaps"),
+        Step("POST", "/api/subscription/create-order", {"user_id": "{user_oid}", "plan": "pro"}),
+    ], setup=seed_subscription_users),
+}
@@ -0,0 +1,130 @@
+"""
+Runs one service's scenario in-process (started by run_benchmarks.py)
+Imports the service's main.py, enters its lifespan and drives the ASGI app
+directly through httpx, so the numbers are the service's own cost plus its
+MongoDB and upstream calls, without a server or client socket in between.
+Writes per-endpoint latencies and statuses as JSON to --output.
+
+Usage: python service_runner.py <service> --output result.json [--users 8] [--iterations 5] [--warmup 1]
+MongoDB and upstream URLs come from the environment (MONGODB_URI/MONGODB_URL, GROQ_API_URL, ...).
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+
+import httpx
+from pymongo import MongoClient
+
+from scenarios import SCENARIOS, fill
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(ordered, q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(latencies, statuses, errors, wall: float) -> dict:
+    endpoints = {}
+    for name in statuses:
+        ordered = sorted(latencies[name])
+        count = sum(statuses[name].values())
+        endpoints[name] = {
+            "count": count,
+            "errors": errors[name],
+            "statuses": dict(statuses[name]),
+            "throughput_rps": round(count / wall, 2),
+            "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2) if ordered else 0.0,
+            "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(ordered, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+        }
+    total = sum(e["count"] for e in endpoints.values())
+    return {
+        "wall_seconds": round(wall, 3),
+        "requests": total,
+        "errors": sum(errors.values()),
+        "throughput_rps": round(total / wall, 2) if wall else 0.0,
+        "endpoints": endpoints,
+    }
+
+
+async def drive(app, scenario, users, iterations: int, warmup: int) -> dict:
+    latencies = defaultdict(list)
+    statuses = defaultdict(Counter)
+    errors = Counter()
+
+    async def session(client, user, rounds: int, record: bool):
+        for _ in range(rounds):
+            for step in scenario.steps:
+                try:
+                    path = fill(step.path, user)
+                    body = fill(step.json, user)
+                except KeyError:
+                    # A variable an earlier step should have saved is missing
+                    if record:
+                        statuses[step.name]["skipped"] += 1
+                        errors[step.name] += 1
+                    break
+                start = time.perf_counter()
+                try:
+                    response = await client.request(step.method, path, json=body, params=step.params)
+                except Exception as e:
+                    if record:
+                        statuses[step.name][type(e).__name__] += 1
+                        errors[step.name] += 1
+                    continue
+                elapsed = time.perf_counter() - start
+                if record:
+                    latencies[step.name].append(elapsed)
+                    statuses[step.name][str(response.status_code)] += 1
+                if response.status_code not in step.expect:
+                    if record:
+                        errors[step.name] += 1
+                    continue
+                for variable, field in step.save.items():
+                    user[variable] = response.json()[field]
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            await asyncio.gather(*(session(client, user, warmup, False) for user in users))
+            start = time.perf_counter()
+            await asyncio.gather(*(session(client, user, iterations, True) for user in users))
+            wall = time.perf_counter() - start
+    return summarize(latencies, statuses, errors, wall)
+
+
+def main(args):
+    service_dir = os.path.join(ROOT, args.service)
+    scenario = SCENARIOS[args.service]
+    users = [{"user": f"bench_user_{n}"} for n in range(args.users)]
+    if scenario.setup is not None:
+        mongodb_uri = os.getenv("MONGODB_URI") or os.getenv("MONGODB_URL")
+        with MongoClient(mongodb_uri) as client:
+            scenario.setup(client["pathwise"], users)
+
+    os.chdir(service_dir)
+    sys.path.insert(0, service_dir)
+    sys.path.insert(1, os.path.join(ROOT, "shared"))  # pathwise_shared, unless installed
+    import main as service
+
+    result = asyncio.run(drive(service.app, scenario, users, args.iterations, args.warmup))
+    with open(args.output, "w") as f:
+        json.dump(result, f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run one service's benchmark scenario in-process")
+    parser.add_argument("service", choices=sorted(SCENARIOS))
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    main(parser.parse_args())
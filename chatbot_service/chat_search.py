@@ -0,0 +1,161 @@
+"""
+Full-text search over a user's chat messages
+With MongoDB, search_collection() runs one aggregation on the
+user_messages_text index (user_id + messages.content): the text match picks
+the user's chats, which are unwound into their messages on the server, and
+only the messages containing a query term come back, one hit per message.
+
+Without MongoDB, ChatStore keeps an InvertedIndex instead: per user,
+term -> chat -> message positions, updated as chats are saved. Chats are
+append-only, so a save only indexes the messages added since the last one.
+
+Both rank hits by relevance and return snippet() text with highlight
+offsets. Terms are lower-cased and lightly stemmed, and match word
+prefixes ("learn" finds "learning").
+"""
+
+import math
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+TOKEN = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+SUFFIXES = ("ing", "ies", "ed", "es", "s")
+STOP_WORDS = frozenset(
+    "a an and are as at be but by for from how i in is it me my of on or so that the this to was what "
+    "when where which who why will with you your".split()
+)
+SNIPPET_CHARS = 160
+
+
+def stem(token: str) -> str:
+    for suffix in SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[:-len(suffix)]
+    return token
+
+
+def terms(text: str) -> List[str]:
+    """Stemmed search terms of text, stop words removed"""
+    return [stem(token) for token in TOKEN.findall(text.lower()) if token not in STOP_WORDS]
+
+
+def term_pattern(query_terms: Iterable[str]) -> str:
+    """Regex (case-insensitive) for words starting with any of the terms"""
+    return r"\b(" + "|".join(re.escape(term) for term in sorted(set(query_terms), key=len, reverse=True)) + ")"
+
+
+def snippet(content: str, query_terms: List[str], width: int = SNIPPET_CHARS) -> Tuple[str, List[List[int]]]:
+    """Up to width characters of content around the first match, and the
+    [start, end) offsets of every matched word within that snippet"""
+    matches = [(m.start(), m.end()) for m in re.finditer(term_pattern(query_terms) + r"\w*", content, re.IGNORECASE)]
+    first = matches[0][0] if matches else 0
+    start = max(0, min(first - width // 3, len(content) - width))
+    end = min(len(content), start + width)
+    prefix = "…" if start > 0 else ""
+    text = prefix + content[start:end] + ("…" if end < len(content) else "")
+    shift = len(prefix) - start
+    highlights = [[s + shift, min(e, end) + shift] for s, e in matches if s >= start and s < end]
+    return text, highlights
+
+
+def search_collection(collection, user_id: str, query: str, offset: int, limit: int) -> List[dict]:
+    """Message hits for query in the user's stored chats, best chats first; limit+1 are
+    fetched so the caller can tell whether there is another page"""
+    query_terms = terms(query)
+    if not query_terms:
+        return []
+    pipeline = [
+        {"$match": {"user_id": user_id, "$text": {"$search": query}}},
+        {"$sort": {"score": {"$meta": "textScore"}, "last_message_at": -1}},
+        {"$project": {"_id": 0, "chat_id": 1, "title": 1, "messages": 1, "score": {"$meta": "textScore"}}},
+        # One document per message, in chat order; only matching messages are kept
+        {"$unwind": {"path": "$messages", "includeArrayIndex": "position"}},
+        {"$match": {"messages.content": {"$regex": term_pattern(query_terms), "$options": "i"}}},
+        {"$skip": offset},
+        {"$limit": limit + 1},
+    ]
+    return [
+        hit_document(hit["chat_id"], hit.get("title", ""), hit["position"], hit["messages"], query_terms, hit["score"])
+        for hit in collection.aggregate(pipeline)
+    ]
+
+
+def hit_document(chat_id: str, title: str, position: int, message: dict, query_terms: List[str],
+                 score: float) -> dict:
+    text, highlights = snippet(message.get("content", ""), query_terms)
+    return {
+        "chat_id": chat_id,
+        "chat_title": title,
+        "message_id": message.get("id"),
+        "position": position,
+        "role": message.get("role"),
+        "timestamp": message.get("timestamp"),
+        "snippet": text,
+        "highlights": highlights,
+        "score": round(score, 4),
+    }
+
+
+class InvertedIndex:
+    """Per-user term -> chat_id -> message positions, for the in-memory store"""
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, Dict[str, Set[int]]]] = {}
+        self._chat_terms: Dict[str, Dict[str, Set[str]]] = {}  # user_id -> chat_id -> its terms
+        self._indexed: Dict[Tuple[str, str], Tuple[int, Optional[str]]] = {}  # -> (messages indexed, first id)
+
+    def update(self, chat: dict):
+        """Index the messages added to chat since it was last indexed"""
+        key = (chat["user_id"], chat["chat_id"])
+        messages = chat.get("messages", [])
+        first_id = messages[0].get("id") if messages else None
+        count, indexed_first = self._indexed.get(key, (0, None))
+        if count > len(messages) or (count and indexed_first != first_id):
+            self.remove(*key)  # not an append: reindex from scratch
+            count = 0
+        postings = self._postings.setdefault(key[0], {})
+        chat_terms = self._chat_terms.setdefault(key[0], {}).setdefault(key[1], set())
+        for position in range(count, len(messages)):
+            for term in set(terms(messages[position].get("content", ""))):
+                postings.setdefault(term, {}).setdefault(key[1], set()).add(position)
+                chat_terms.add(term)
+        self._indexed[key] = (len(messages), first_id)
+
+    def remove(self, user_id: str, chat_id: str):
+        postings = self._postings.get(user_id, {})
+        user_chats = self._chat_terms.get(user_id, {})
+        for term in user_chats.pop(chat_id, ()):
+            chats = postings.get(term)
+            if chats is not None:
+                chats.pop(chat_id, None)
+                if not chats:
+                    del postings[term]
+        if not postings:
+            self._postings.pop(user_id, None)
+        if not user_chats:
+            self._chat_terms.pop(user_id, None)
+        self._indexed.pop((user_id, chat_id), None)
+
+    def search(self, user_id: str, query_terms: List[str]) -> List[Tuple[float, str, int]]:
+        """(score, chat_id, position) of every message matching a term, best first.
+
+        A term matches indexed words it is a prefix of; each matched term
+        scores its inverse document frequency over the user's chats.
+        """
+        postings = self._postings.get(user_id, {})
+        chats_total = len(self._chat_terms.get(user_id, {})) or 1
+        scores: Dict[Tuple[str, int], float] = defaultdict(float)
+        for term in set(query_terms):
+            matched: Dict[str, Set[int]] = defaultdict(set)
+            for word in ([term] if len(term) < 3 else [w for w in postings if w.startswith(term)]):
+                for chat_id, positions in postings.get(word, {}).items():
+                    matched[chat_id] |= positions
+            if not matched:
+                continue
+            idf = math.log(1 + chats_total / len(matched))
+            for chat_id, positions in matched.items():
+                for position in positions:
+                    scores[(chat_id, position)] += idf
+        return sorted(((score, chat_id, position) for (chat_id, position), score in scores.items()),
+                      key=lambda hit: (-hit[0], hit[1], -hit[2]))
@@ -0,0 +1,448 @@
+"""
+Write-behind chat persistence for the chatbot
+save() and delete() only touch memory, so /chat can answer as soon as the
+model does; a background task writes the changed chats to MongoDB in small
+batched bulk_writes.
+
+Each write carries the whole chat as of its latest change and a chat is in
+at most one batch at a time, so an older version can never land after a
+newer one. Until a chat has been written it stays in the overlay, and reads
+check the overlay first, so a user always sees their own messages. Failed
+batches are retried with exponential backoff; stop() drains what is left.
+The overlay is per process, so the chatbot must run a single worker (see
+main.py): another process would miss unflushed messages and its whole-chat
+writes would overwrite them.
+
+Without a collection (MongoDB unreachable) the overlay is the store. It is
+indexed per user, so listing a user's chats costs O(their chats), and held
+to memory_limit bytes (estimated) by evicting the least recently used
+chats. With spill_dir set, evicted chats are written there as compressed
+JSON and read back on access, keeping only a small header per chat in
+memory; without it, evicted chats are lost. While MongoDB is attached every
+chat in memory is still waiting to be written, so evicted chats are always
+spilled, to the system temp dir when no spill_dir is given: an outage holds
+memory_limit bytes of chats in memory and the rest on disk. search() uses MongoDB's text index, or without MongoDB an
+inverted index over the chats in memory and on disk (chat_search.py).
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import DeleteOne, UpdateOne
+
+from chat_search import InvertedIndex, hit_document, search_collection, terms
+
+logger = logging.getLogger(__name__)
+
+# What list_user() returns of a chat: everything the sidebar shows, no messages
+HEADER_FIELDS = ("chat_id", "user_id", "title", "created_at", "last_message_at", "message_count",
+                 "last_message_preview")
+HEADER_PROJECTION = {"_id": 0, **{field: 1 for field in HEADER_FIELDS}}
+
+
+class _Entry:
+    __slots__ = ("doc", "version")
+
+    def __init__(self, doc: Optional[dict], version: int):
+        self.doc = doc  # None marks a deleted chat until the delete is written
+        self.version = version
+
+
+class _Spilled:
+    __slots__ = ("header", "version", "path")
+
+    def __init__(self, header: dict, version: int, path: str):
+        self.header = header
+        self.version = version
+        self.path = path
+
+
+def _size(doc: Optional[dict]) -> int:
+    # Rough in-memory footprint: text plus per-message dict and string overhead
+    if doc is None:
+        return 0
+    return 512 + sum(len(m.get("content", "")) + 400 for m in doc.get("messages", []))
+
+
+def _header(chat: dict) -> dict:
+    return {field: chat[field] for field in HEADER_FIELDS if field in chat}
+
+
+def _copy(chat: dict) -> dict:
+    # Endpoints append to chat["messages"] in place; keep our own list
+    doc = dict(chat)
+    doc["messages"] = list(chat.get("messages", []))
+    return doc
+
+
+class ChatStore:
+    """Chats keyed by (user_id, chat_id), persisted write-behind to collection"""
+
+    def __init__(self, collection=None, flush_interval: float = 0.2, batch_size: int = 100,
+                 max_pending: int = 1000, max_backoff: float = 30.0, drain_timeout: float = 10.0,
+                 memory_limit: int = 256 * 1024 * 1024, spill_dir: Optional[str] = None):
+        self.collection = collection
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.max_backoff = max_backoff
+        self.drain_timeout = drain_timeout
+        self.memory_limit = memory_limit
+        if spill_dir is None and collection is not None:
+            spill_dir = tempfile.gettempdir()  # unwritten chats are never dropped
+        self.spill_dir = spill_dir
+        self._overlay: Dict[str, Dict[str, _Entry]] = {}  # user_id -> chat_id -> entry
+        self._lru: "OrderedDict[Tuple[str, str], int]" = OrderedDict()  # chats in memory -> size, oldest first
+        self._bytes = 0
+        self._spilled: Dict[str, Dict[str, _Spilled]] = {}  # user_id -> chat_id -> chat on disk
+        self._spill_path: Optional[str] = None
+        self._index = InvertedIndex() if collection is None else None
+        self._dirty: Dict[Tuple[str, str], None] = {}  # insertion-ordered set of keys to write
+        self._version = 0
+        self._lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.failures = 0
+        self.evictions = 0
+
+    @property
+    def pending(self) -> int:
+        """Chats changed in memory and not yet written"""
+        return len(self._dirty)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Estimated size of the chats held in memory"""
+        return self._bytes
+
+    def _put(self, user_id: str, chat_id: str, doc: Optional[dict]):
+        self._version += 1
+        self._unspill(user_id, chat_id)
+        self._set(user_id, chat_id, _Entry(doc, self._version))
+        if self._index is not None and doc is not None:
+            self._index.update(doc)
+        if self.collection is not None:
+            self._dirty[(user_id, chat_id)] = None
+            if len(self._dirty) >= self.max_pending:
+                self._wakeup.set()
+        self._evict()
+
+    def _set(self, user_id: str, chat_id: str, entry: _Entry):
+        key = (user_id, chat_id)
+        self._overlay.setdefault(user_id, {})[chat_id] = entry
+        self._bytes -= self._lru.pop(key, 0)
+        if entry.doc is not None:  # tombstones are tiny and never evicted
+            self._lru[key] = _size(entry.doc)
+            self._bytes += self._lru[key]
+
+    def _drop(self, user_id: str, chat_id: str) -> Optional[_Entry]:
+        chats = self._overlay.get(user_id)
+        if chats is None:
+            return None
+        entry = chats.pop(chat_id, None)
+        if not chats:
+            del self._overlay[user_id]
+        self._bytes -= self._lru.pop((user_id, chat_id), 0)
+        return entry
+
+    def _forget(self, user_id: str, chat_id: str):
+        self._drop(user_id, chat_id)
+        self._unspill(user_id, chat_id)
+        if self._index is not None:
+            self._index.remove(user_id, chat_id)
+
+    def _version_of(self, user_id: str, chat_id: str) -> Optional[int]:
+        entry = self._overlay.get(user_id, {}).get(chat_id) or self._spilled.get(user_id, {}).get(chat_id)
+        return entry.version if entry is not None else None
+
+    # Memory cap
+
+    def _evict(self):
+        """Evict least recently used chats until under memory_limit, keeping the newest"""
+        while self._bytes > self.memory_limit and len(self._lru) > 1:
+            user_id, chat_id = next(iter(self._lru))
+            if self.spill_dir is not None and not self._spill(user_id, chat_id):
+                return
+            self._drop(user_id, chat_id)
+            if self.spill_dir is None and self._index is not None:
+                self._index.remove(user_id, chat_id)
+            self.evictions += 1
+
+    def _spill(self, user_id: str, chat_id: str) -> bool:
+        entry = self._overlay[user_id][chat_id]
+        try:
+            if self._spill_path is None:
+                os.makedirs(self.spill_dir, exist_ok=True)
+                self._spill_path = tempfile.mkdtemp(prefix="chats-", dir=self.spill_dir)
+            path = os.path.join(self._spill_path, hashlib.sha1(f"{user_id}\0{chat_id}".encode()).hexdigest())
+            with open(path, "wb") as f:
+                f.write(zlib.compress(json.dumps(entry.doc, separators=(",", ":"), default=str).encode()))
+        except OSError as e:
+            logger.warning(f"Could not spill chat {chat_id} to disk, keeping it in memory: {e}")
+            return False
+        self._spilled.setdefault(user_id, {})[chat_id] = _Spilled(_header(entry.doc), entry.version, path)
+        return True
+
+    def _unspill(self, user_id: str, chat_id: str) -> Optional[_Spilled]:
+        chats = self._spilled.get(user_id)
+        spilled = chats.pop(chat_id, None) if chats is not None else None
+        if spilled is None:
+            return None
+        if not chats:
+            del self._spilled[user_id]
+        try:
+            os.remove(spilled.path)
+        except OSError:
+            pass
+        return spilled
+
+    def _read_spilled(self, spilled: _Spilled) -> Optional[dict]:
+        try:
+            with open(spilled.path, "rb") as f:
+                return json.loads(zlib.decompress(f.read()))
+        except (OSError, ValueError, zlib.error) as e:
+            logger.warning(f"Could not read spilled chat {spilled.header.get('chat_id')}: {e}")
+            return None
+
+    # Reads and writes (called from the request handlers)
+
+    def save(self, chat: dict):
+        """Accept a chat's new state; it is written to MongoDB in the background"""
+        doc = _copy(chat)
+        doc.pop("_id", None)
+        self._put(doc["user_id"], doc["chat_id"], doc)
+
+    def get(self, user_id: str, chat_id: str) -> Optional[dict]:
+        entry = self._overlay.get(user_id, {}).get(chat_id)
+        if entry is not None:
+            if (user_id, chat_id) in self._lru:
+                self._lru.move_to_end((user_id, chat_id))
+            return _copy(entry.doc) if entry.doc is not None else None
+        spilled = self._spilled.get(user_id, {}).get(chat_id)
+        if spilled is not None:
+            doc = self._read_spilled(spilled)
+            if doc is not None:
+                # Back into memory as it was: same version, still pending if it was
+                self._unspill(user_id, chat_id)
+                self._set(user_id, chat_id, _Entry(doc, spilled.version))
+                self._evict()
+                return _copy(doc)
+        if self.collection is None:
+            return None
+        try:
+            return self.collection.find_one({"user_id": user_id, "chat_id": chat_id})
+        except Exception as e:
+            logger.warning(f"Could not read chat {chat_id}: {e}")
+            return None
+
+    def delete(self, user_id: str, chat_id: str) -> bool:
+        """Delete a chat; False when it doesn't exist"""
+        entry = self._overlay.get(user_id, {}).get(chat_id)
+        if entry is not None:
+            exists = entry.doc is not None
+        elif chat_id in self._spilled.get(user_id, {}):
+            exists = True
+        elif self.collection is None:
+            exists = False
+        else:
+            try:
+                exists = self.collection.count_documents({"user_id": user_id, "chat_id": chat_id}, limit=1) > 0
+            except Exception as e:
+                logger.warning(f"Could not read chat {chat_id}: {e}")
+                exists = False
+        if exists:
+            if self.collection is None:
+                self._forget(user_id, chat_id)
+            else:
+                self._put(user_id, chat_id, None)
+        return exists
+
+    def get_messages(self, user_id: str, chat_id: str, end: Optional[int] = None,
+                     limit: int = 50) -> Optional[Tuple[List[dict], int, int]]:
+        """Up to limit messages before position end (default: the newest ones).
+
+        Returns (messages, start, total), start being the position of the first
+        message returned, or None when the chat doesn't exist. From MongoDB
+        only the requested slice of the messages array is read.
+        """
+        key_in_memory = chat_id in self._overlay.get(user_id, {}) or chat_id in self._spilled.get(user_id, {})
+        if key_in_memory or self.collection is None:
+            chat = self.get(user_id, chat_id)
+            if chat is None:
+                return None
+            total = len(chat["messages"])
+            end = total if end is None else max(0, min(end, total))
+            start = max(0, end - limit)
+            return chat["messages"][start:end], start, total
+        if end is None:
+            window = -limit
+        else:
+            end = max(0, end)
+            start = max(0, end - limit)
+            window = [start, end - start] if end > start else [0, 1]
+        try:
+            chat = self.collection.find_one({"user_id": user_id, "chat_id": chat_id},
+                                            {"_id": 0, "message_count": 1, "messages": {"$slice": window}})
+        except Exception as e:
+            logger.warning(f"Could not read chat {chat_id}: {e}")
+            return None
+        if chat is None:
+            return None
+        messages = chat.get("messages", [])
+        total = chat.get("message_count", len(messages))
+        if end is None:
+            return messages, max(0, total - len(messages)), total
+        end = min(end, total)
+        start = max(0, end - limit)
+        return messages[:end - start], start, total
+
+    def list_user(self, user_id: str, limit: int = 20) -> List[dict]:
+        """Headers (HEADER_FIELDS, no messages) of a user's chats, most recent first"""
+        chats = {}
+        if self.collection is not None:
+            try:
+                for chat in self.collection.find({"user_id": user_id}, HEADER_PROJECTION,
+                                                 sort=[("last_message_at", -1)], limit=limit):
+                    chats[chat["chat_id"]] = chat
+            except Exception as e:
+                logger.warning(f"Could not list chats for {user_id}: {e}")
+        for chat_id, spilled in self._spilled.get(user_id, {}).items():
+            chats[chat_id] = spilled.header
+        for chat_id, entry in self._overlay.get(user_id, {}).items():
+            if entry.doc is None:
+                chats.pop(chat_id, None)
+            else:
+                chats[chat_id] = _header(entry.doc)
+        return sorted(chats.values(), key=lambda chat: chat.get("last_message_at", ""), reverse=True)[:limit]
+
+    def search(self, user_id: str, query: str, offset: int = 0, limit: int = 20) -> Tuple[List[dict], bool]:
+        """Message hits for query in a user's chats, best first, and whether more follow.
+
+        With MongoDB, chats saved in the last flush interval are not searchable yet.
+        """
+        if self.collection is not None:
+            try:
+                hits = search_collection(self.collection, user_id, query, offset, limit)
+            except Exception as e:
+                logger.warning(f"Could not search chats for {user_id}: {e}")
+                return [], False
+            return hits[:limit], len(hits) > limit
+        query_terms = terms(query)
+        ranked = self._index.search(user_id, query_terms) if query_terms else []
+        hits, chats = [], {}
+        for score, chat_id, position in ranked[offset:offset + limit]:
+            if chat_id not in chats:
+                chats[chat_id] = self.get(user_id, chat_id)
+            chat = chats[chat_id]
+            if chat is None or position >= len(chat["messages"]):
+                continue
+            hits.append(hit_document(chat_id, chat.get("title", ""), position, chat["messages"][position],
+                                     query_terms, score))
+        return hits, len(ranked) > offset + limit
+
+    # Background writes
+
+    def _write(self, batch):
+        operations = []
+        for (user_id, chat_id), doc in batch:
+            key = {"user_id": user_id, "chat_id": chat_id}
+            if doc is None:
+                operations.append(DeleteOne(key))
+            else:
+                operations.append(UpdateOne(key, {"$set": doc}, upsert=True))
+        self.collection.bulk_write(operations, ordered=False)
+
+    async def flush(self) -> int:
+        """Write every pending chat, batch_size at a time; returns how many were written.
+
+        A failed batch goes back to the front of the queue and the error is raised.
+        """
+        written = 0
+        async with self._lock:
+            while self._dirty and self.collection is not None:
+                keys = list(self._dirty)[:self.batch_size]
+                batch, versions = [], {}
+                for key in keys:
+                    del self._dirty[key]
+                    entry = self._overlay.get(key[0], {}).get(key[1])
+                    if entry is not None:
+                        batch.append((key, entry.doc))
+                        versions[key] = entry.version
+                        continue
+                    spilled = self._spilled.get(key[0], {}).get(key[1])
+                    doc = self._read_spilled(spilled) if spilled is not None else None
+                    if doc is not None:
+                        batch.append((key, doc))
+                        versions[key] = spilled.version
+                if not batch:
+                    continue
+                try:
+                    await asyncio.to_thread(self._write, batch)
+                except Exception:
+                    self._dirty = {**dict.fromkeys(versions), **self._dirty}
+                    raise
+                # Drop what was written from the overlay, unless it changed meanwhile
+                for (user_id, chat_id), version in versions.items():
+                    if self._version_of(user_id, chat_id) == version:
+                        self._forget(user_id, chat_id)
+                written += len(batch)
+        return written
+
+    async def _run(self):
+        backoff = self.flush_interval
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=backoff)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._stopping:
+                break
+            try:
+                await self.flush()
+                backoff = self.flush_interval
+            except Exception as e:
+                self.failures += 1
+                backoff = min(backoff * 2, self.max_backoff)
+                logger.warning(f"Chat write failed, {self.pending} chats pending, retrying in {backoff:.1f}s: {e}")
+
+    def start(self):
+        """Start the background writer on the running event loop"""
+        if self._flush_task is None and self.collection is not None:
+            self._stopping = False
+            self._flush_task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background writer and drain the pending chats, retrying until drain_timeout"""
+        if self._flush_task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._flush_task
+            self._flush_task = None
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.drain_timeout
+        backoff = self.flush_interval
+        while self.pending and self.collection is not None:
+            try:
+                await self.flush()
+            except Exception as e:
+                if loop.time() + backoff > deadline:
+                    logger.error(f"Giving up on {self.pending} unwritten chats: {e}")
+                    if self._spill_path is not None:
+                        logger.error(f"Spilled chats are left in {self._spill_path}")
+                    return
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+        if self._spill_path is not None:
+            shutil.rmtree(self._spill_path, ignore_errors=True)
+            self._spill_path = None
+            self._spilled.clear()
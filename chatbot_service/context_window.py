@@ -0,0 +1,107 @@
+"""
+Token-budgeted conversation context for the chatbot
+The prompt for a turn is the system prompt, the chat's running summary and
+as many of the newest messages as fit in the token budget. Messages that
+fall out of the window are folded into the summary, which is stored on the
+chat as {"text", "covered", "updated_at"}: covered is how many leading
+messages it already includes, so each fold only summarizes the new overflow.
+
+Folding is incremental and has slack: when the window overflows, enough
+messages are folded to bring it down to half the budget, so the summarizer
+runs every few turns rather than on every one. Prompt size stays bounded by
+system prompt + summary + budget however long the chat gets.
+
+Tokens are estimated at ~4 characters each; no tokenizer is needed to keep
+the prompt roughly constant.
+"""
+
+import logging
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4  # role and separators per message
+SUMMARY_INPUT_CHARS = 2000  # per message, when feeding the summarizer
+
+SUMMARY_INSTRUCTIONS = (
+    "You maintain a running summary of a conversation between a user and an AI assistant. "
+    "Update the summary with the new messages. Keep the user's goals, background, decisions, "
+    "facts they shared and open questions; drop pleasantries and long explanations. "
+    "Reply with the updated summary only, in at most {words} words."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+
+
+def window_start(messages: List[Dict], covered: int, budget: int) -> int:
+    """Index of the oldest message in the newest run that fits in budget.
+
+    Never earlier than covered, and the last message is always included.
+    """
+    used = 0
+    start = len(messages)
+    while start > covered:
+        cost = estimate_tokens(messages[start - 1]["content"])
+        if used + cost > budget and start < len(messages):
+            break
+        used += cost
+        start -= 1
+    return start
+
+
+def _summary(chat: Dict) -> Dict:
+    return chat.get("summary") or {"text": "", "covered": 0}
+
+
+def build_prompt(chat: Dict, system_prompt: str, budget: int) -> List[Dict[str, str]]:
+    """Messages to send for the chat's next reply"""
+    messages = chat["messages"]
+    summary = _summary(chat)
+    start = window_start(messages, summary["covered"], budget)
+    prompt = [{"role": "system", "content": system_prompt}]
+    if summary["text"]:
+        prompt.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary['text']}"})
+    prompt += [{"role": m["role"], "content": m["content"]} for m in messages[start:]]
+    return prompt
+
+
+def needs_fold(chat: Dict, budget: int) -> bool:
+    """True when messages have fallen out of the window without being summarized"""
+    summary = _summary(chat)
+    return window_start(chat["messages"], summary["covered"], budget) > summary["covered"]
+
+
+def fold(chat: Dict, summarize: Callable[[List[Dict[str, str]]], str], budget: int,
+         summary_words: int = 250) -> Optional[Dict]:
+    """The chat's summary extended with the messages that overflowed the window.
+
+    summarize(messages) calls the model and returns its text. Returns None
+    when there is nothing to fold or the summarizer fails; the prompt then
+    just leaves the overflow out until a later fold succeeds.
+    """
+    messages = chat["messages"]
+    summary = _summary(chat)
+    covered = summary["covered"]
+    end = window_start(messages, covered, budget // 2)
+    if end <= covered:
+        return None
+
+    transcript = "\n\n".join(
+        f"{m['role'].capitalize()}: {m['content'][:SUMMARY_INPUT_CHARS]}" for m in messages[covered:end]
+    )
+    request = [
+        {"role": "system", "content": SUMMARY_INSTRUCTIONS.format(words=summary_words)},
+        {"role": "user", "content": f"Current summary:\n{summary['text'] or '(none yet)'}\n\nNew messages:\n{transcript}"},
+    ]
+    try:
+        text = summarize(request).strip()
+    except Exception as e:
+        logger.warning(f"Could not update chat summary: {e}")
+        return None
+    if not text:
+        return None
+    return {"text": text, "covered": end, "updated_at": datetime.now().isoformat()}
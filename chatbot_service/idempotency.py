@@ -0,0 +1,83 @@
+"""
+Idempotency keys for POST /chat
+A client retrying a message sends the same Idempotency-Key. The first
+request with a key runs the completion as its own task; duplicates that
+arrive while it runs await that same task, and duplicates that arrive
+after it finished get its response back from a short-TTL store. Either way
+the message is appended, sent to the model and saved once.
+
+Keys are scoped to the user, and a key reused with a different message is
+rejected with 409. Failed completions are not stored, so a retry after an
+error runs again. Keys live in the worker's memory: under pre-fork serving
+a retry is only deduplicated by the worker that saw the first request.
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from fastapi import HTTPException
+
+from pathwise_shared import metrics
+
+OUTCOMES = metrics.register(metrics.Counter(
+    "chat_idempotency_requests_total", "Chat requests carrying an idempotency key, by outcome", ("outcome",)
+))
+
+
+def fingerprint(*parts: Any) -> str:
+    return hashlib.sha256("\0".join(str(part) for part in parts).encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """In-flight and recently completed results by (scope, key)"""
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._inflight: Dict[Tuple[str, str], Tuple[str, asyncio.Task]] = {}
+        self._done: "OrderedDict[Tuple[str, str], Tuple[float, str, Any]]" = OrderedDict()  # oldest first
+
+    def _expire(self, now: float):
+        while self._done:
+            key, (expires, _, _) = next(iter(self._done.items()))
+            if expires > now and len(self._done) <= self.max_entries:
+                break
+            del self._done[key]
+
+    def _finish(self, key: Tuple[str, str], request_fingerprint: str, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return  # not stored: a retry runs again
+        self._done[key] = (time.monotonic() + self.ttl, request_fingerprint, task.result())
+        self._expire(time.monotonic())
+
+    async def run(self, scope: str, key: str, request_fingerprint: str,
+                  compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """compute()'s result for this key, and whether this call is the one that computed it"""
+        slot = (scope, key)
+        self._expire(time.monotonic())
+        done = self._done.get(slot)
+        if done is not None:
+            self._check(done[1], request_fingerprint)
+            OUTCOMES.inc(("replayed",))
+            return done[2], False
+        inflight = self._inflight.get(slot)
+        if inflight is not None:
+            self._check(inflight[0], request_fingerprint)
+            OUTCOMES.inc(("attached",))
+            return await asyncio.shield(inflight[1]), False
+        # Its own task, so the completion outlives a cancelled first request
+        task = asyncio.ensure_future(compute())
+        self._inflight[slot] = (request_fingerprint, task)
+        task.add_done_callback(lambda finished: self._finish(slot, request_fingerprint, finished))
+        OUTCOMES.inc(("new",))
+        return await asyncio.shield(task), True
+
+    @staticmethod
+    def _check(stored: str, request_fingerprint: str):
+        if stored != request_fingerprint:
+            OUTCOMES.inc(("conflict",))
+            raise HTTPException(status_code=409, detail="Idempotency key was already used for a different message")
@@ -0,0 +1,42 @@
+"""
+Index registry for the chatbot service
+Every index the chat queries rely on, applied at startup by ensure_indexes.
+check_indexes.py (repo root) reads INDEXES and QUERY_SHAPES to report
+missing/unused indexes and explain plans.
+"""
+import logging
+
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+
+logger = logging.getLogger(__name__)
+
+INDEXES = {
+    "chats": [
+        # get_chat / save_chat upsert / delete_chat_db address one chat by (user_id, chat_id)
+        IndexModel([("user_id", ASCENDING), ("chat_id", ASCENDING)], name="user_chat_unique", unique=True),
+        # Chat sidebar: a user's chats, most recent first
+        IndexModel([("user_id", ASCENDING), ("last_message_at", DESCENDING)], name="user_last_message"),
+        # Chat search: text over message content, always scoped to one user
+        IndexModel([("user_id", ASCENDING), ("messages.content", TEXT)], name="user_messages_text"),
+    ],
+}
+
+# Representative find shapes, explained by check_indexes.py
+QUERY_SHAPES = [
+    {"name": "get chat", "collection": "chats",
+     "filter": {"user_id": "user_1", "chat_id": "chat_1"}},
+    {"name": "user chats", "collection": "chats",
+     "filter": {"user_id": "user_1"}, "sort": [("last_message_at", -1)]},
+    {"name": "search chats", "collection": "chats",
+     "filter": {"user_id": "user_1", "$text": {"$search": "python"}}},
+]
+
+
+def ensure_indexes(db):
+    """Create any declared index that is missing; existing identical indexes are a no-op"""
+    for collection, models in INDEXES.items():
+        for model in models:
+            try:
+                db[collection].create_indexes([model])
+            except Exception as e:
+                logger.warning(f"⚠️ Could not create index {collection}.{model.document['name']}: {e}")
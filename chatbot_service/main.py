@@ -3,20 +3,30 @@ PathWise Groq-Powered Chatbot Service
 A ChatGPT-like chatbot using Groq API
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Header, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
+from contextlib import asynccontextmanager
 from datetime import datetime
 import os
 import uuid
 import logging
 import random
+import asyncio
+import time
 from dotenv import load_dotenv
 import requests
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure
 import re
+from indexes import ensure_indexes
+from chat_store import ChatStore
+import context_window
+import model_router
+import roadmap_extraction
+from idempotency import IdempotencyStore, fingerprint
+from pathwise_shared import metrics
 
 # Configure logging first
 logging.basicConfig(
@@ -33,9 +43,14 @@ logger.info(f".env exists: {env_path.exists()}")
 load_dotenv(dotenv_path=env_path)
 
 # Configuration
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+GROQ_API_URL = os.getenv('GROQ_API_URL', "https://api.groq.com/openai/v1/chat/completions")
 MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
 DB_NAME = 'pathwise'
+# Prompt history budget: newest messages up to this many tokens, older ones summarized
+CHAT_CONTEXT_TOKENS = int(os.getenv('CHAT_CONTEXT_TOKENS', '3000'))
+CHAT_SUMMARY_MAX_TOKENS = int(os.getenv('CHAT_SUMMARY_MAX_TOKENS', '400'))
+# Roadmap extraction reads long chats in chunks of this many characters (~3k tokens)
+ROADMAP_CHUNK_CHARS = int(os.getenv('ROADMAP_CHUNK_CHARS', '12000'))
 
 def get_groq_api_key():
     """Get Groq API key from environment"""
@@ -50,11 +65,61 @@ def log_api_key_status():
 # Check key on startup
 initial_key = log_api_key_status()
 
+# MongoDB setup: connected in the lifespan, or injected with connect_mongo(client) before startup
+mongo_client = None
+db = None
+chats_collection = None
+# Chats are saved write-behind; in memory only until connect_mongo() attaches MongoDB
+chat_store = ChatStore()
+
+def connect_mongo(client: Optional[MongoClient] = None):
+    """Use client, or connect to MONGODB_URI; falls back to in-memory storage when unreachable"""
+    global mongo_client, db, chats_collection, chat_store
+    try:
+        if client is None:
+            client = MongoClient(MONGODB_URI, serverSelectionTimeoutMS=5000, event_listeners=[metrics.mongo_listener()])
+            client.admin.command('ping')
+        mongo_client = client
+        db = mongo_client[DB_NAME]
+        chats_collection = db['chats']
+        logger.info("✅ Connected to MongoDB")
+    except ConnectionFailure:
+        logger.warning("⚠️ MongoDB not available - using in-memory storage")
+    except Exception as e:
+        logger.warning(f"⚠️ MongoDB error: {e} - using in-memory storage")
+    chat_store = ChatStore(
+        chats_collection,
+        flush_interval=float(os.getenv("CHAT_FLUSH_INTERVAL", "0.2")),
+        batch_size=int(os.getenv("CHAT_FLUSH_BATCH", "100")),
+        memory_limit=int(os.getenv("CHAT_MEMORY_LIMIT_MB", "256")) * 1024 * 1024,
+        spill_dir=os.getenv("CHAT_SPILL_DIR") or None
+    )
+
+def close_mongo():
+    global mongo_client, db, chats_collection
+    if mongo_client is not None:
+        mongo_client.close()
+    mongo_client = db = chats_collection = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    owns_client = mongo_client is None
+    if owns_client:
+        connect_mongo()
+    if db is not None:
+        ensure_indexes(db)
+    chat_store.start()
+    yield
+    await chat_store.stop()
+    if owns_client:
+        close_mongo()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="PathWise Groq Chatbot API",
     description="ChatGPT-like chatbot powered by Groq API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -65,31 +130,14 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-
-# MongoDB setup
-mongo_client = None
-db = None
-chats_collection = None
-
-try:
-    mongo_client = MongoClient(MONGODB_URI, serverSelectionTimeoutMS=5000)
-    mongo_client.admin.command('ping')
-    db = mongo_client[DB_NAME]
-    chats_collection = db['chats']
-    logger.info("✅ Connected to MongoDB")
-except ConnectionFailure:
-    logger.warning("⚠️ MongoDB not available - using in-memory storage")
-except Exception as e:
-    logger.warning(f"⚠️ MongoDB error: {e} - using in-memory storage")
-
-# In-memory storage fallback
-chats_memory = {}
+metrics.install(app)
 
 # Pydantic models
 class ChatMessage(BaseModel):
     message: str
     user_id: str = "anonymous"
     chat_id: Optional[str] = None
+    idempotency_key: Optional[str] = None  # or the Idempotency-Key header
 
 class NewChatRequest(BaseModel):
     user_id: str
@@ -160,13 +208,28 @@ def extract_domain_from_message(message: str) -> str:
     else:
         return "General Learning"
 
-def extract_learning_steps_from_chat(chat_content: str) -> List[Dict[str, Any]]:
+# Used when nothing could be extracted from the chat
+FALLBACK_ROADMAP_STEPS = [
+    {
+        "category": "Learning Foundation",
+        "skills": ["Basic concepts", "Fundamentals"],
+        "description": "Start with the basics mentioned in the conversation"
+    },
+    {
+        "category": "Practical Application",
+        "skills": ["Hands-on practice", "Real projects"],
+        "description": "Apply what you've learned through practical exercises"
+    }
+]
+
+
+def extract_learning_steps_from_chat(chat_content: str) -> Optional[List[Dict[str, Any]]]:
     """
-    Extract learning steps from chat content using AI
+    Extract learning steps from (part of) a chat using AI; None when it fails
     """
     groq_api_key = get_groq_api_key()
     if not groq_api_key:
-        return []
+        return None
     
     try:
         # Create a prompt to extract structured learning steps
@@ -187,20 +250,22 @@ def extract_learning_steps_from_chat(chat_content: str) -> List[Dict[str, Any]]:
         Focus on practical, actionable learning steps. Return only the JSON array, no other text.
         """
         
-        response = requests.post(
-            GROQ_API_URL,
-            headers={
-                "Authorization": f"Bearer {groq_api_key}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "llama-3.3-70b-versatile",
-                "messages": [{"role": "user", "content": extraction_prompt}],
-                "temperature": 0.3,
-                "max_tokens": 1500
-            },
-            timeout=30
-        )
+        with metrics.track_upstream("groq") as call:
+            response = requests.post(
+                GROQ_API_URL,
+                headers={
+                    "Authorization": f"Bearer {groq_api_key}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": "llama-3.3-70b-versatile",
+                    "messages": [{"role": "user", "content": extraction_prompt}],
+                    "temperature": 0.3,
+                    "max_tokens": 1500
+                },
+                timeout=30
+            )
+            call.status = response.status_code
         
         if response.status_code == 200:
             ai_response = response.json()['choices'][0]['message']['content']
@@ -214,26 +279,14 @@ def extract_learning_steps_from_chat(chat_content: str) -> List[Dict[str, Any]]:
                     return steps
             except:
                 pass
-        
-        # Fallback: create basic steps from content
-        return [
-            {
-                "category": "Learning Foundation",
-                "skills": ["Basic concepts", "Fundamentals"],
-                "description": "Start with the basics mentioned in the conversation"
-            },
-            {
-                "category": "Practical Application",
-                "skills": ["Hands-on practice", "Real projects"],
-                "description": "Apply what you've learned through practical exercises"
-            }
-        ]
+        return None
         
     except Exception as e:
         logger.error(f"Error extracting learning steps: {e}")
-        return []
+        return None
 
-def call_groq_api(messages: List[Dict[str, str]], temperature: float = 0.7, max_tokens: int = 2000) -> str:
+def call_groq_api(messages: List[Dict[str, str]], temperature: float = 0.7, max_tokens: int = 2000,
+                  model: str = model_router.LARGE_MODEL) -> str:
     """
     Call Groq API to get chatbot response
     """
@@ -242,20 +295,22 @@ def call_groq_api(messages: List[Dict[str, str]], temperature: float = 0.7, max_
         raise HTTPException(status_code=500, detail="Groq API key not configured")
     
     try:
-        response = requests.post(
-            GROQ_API_URL,
-            headers={
-                "Authorization": f"Bearer {groq_api_key}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "llama-3.3-70b-versatile",  # Best model for general conversation
-                "messages": messages,
-                "temperature": temperature,
-                "max_tokens": max_tokens
-            },
-            timeout=30
-        )
+        with metrics.track_upstream("groq") as call:
+            response = requests.post(
+                GROQ_API_URL,
+                headers={
+                    "Authorization": f"Bearer {groq_api_key}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": model,
+                    "messages": messages,
+                    "temperature": temperature,
+                    "max_tokens": max_tokens
+                },
+                timeout=30
+            )
+            call.status = response.status_code
         
         if response.status_code == 200:
             result = response.json()
@@ -282,71 +337,63 @@ def call_groq_api(messages: List[Dict[str, str]], temperature: float = 0.7, max_
 
 
 def get_chat(user_id: str, chat_id: str) -> Optional[Dict]:
-    """Get chat from MongoDB or memory"""
-    if chats_collection is not None:
-        try:
-            return chats_collection.find_one({"user_id": user_id, "chat_id": chat_id})
-        except:
-            pass
-    return chats_memory.get(f"{user_id}_{chat_id}")
+    """Get chat, including changes not yet written to MongoDB"""
+    return chat_store.get(user_id, chat_id)
+
+
+def message_preview(content: str, length: int = 120) -> str:
+    """First words of a message as plain text, for the chat sidebar"""
+    text = re.sub(r'[#*`>_|]+', '', content[:length * 3])
+    text = ' '.join(text.split())
+    return text if len(text) <= length else text[:length].rsplit(' ', 1)[0] + '…'
 
 
 def save_chat(chat_data: Dict):
-    """Save chat to MongoDB or memory"""
-    if chats_collection is not None:
-        try:
-            chats_collection.update_one(
-                {"user_id": chat_data["user_id"], "chat_id": chat_data["chat_id"]},
-                {"$set": chat_data},
-                upsert=True
-            )
-            return
-        except Exception as e:
-            logger.warning(f"MongoDB save failed: {e}")
-    
-    # Fallback to memory
-    chats_memory[f"{chat_data['user_id']}_{chat_data['chat_id']}"] = chat_data
+    """Save chat; returns at once, MongoDB is written in the background"""
+    if chat_data["messages"]:
+        chat_data["last_message_preview"] = message_preview(chat_data["messages"][-1]["content"])
+    chat_store.save(chat_data)
 
 
 def get_user_chats(user_id: str, limit: int = 20) -> List[Dict]:
-    """Get all chats for a user"""
-    if chats_collection is not None:
-        try:
-            chats = list(chats_collection.find(
-                {"user_id": user_id},
-                sort=[("last_message_at", -1)],
-                limit=limit
-            ))
-            # Remove MongoDB _id field
-            for chat in chats:
-                chat.pop('_id', None)
-            return chats
-        except:
-            pass
-    
-    # Fallback to memory
-    user_chats = [
-        chat for key, chat in chats_memory.items()
-        if key.startswith(f"{user_id}_")
-    ]
-    return sorted(user_chats, key=lambda x: x.get('last_message_at', ''), reverse=True)[:limit]
+    """Get a user's chats: header fields and preview only, no messages"""
+    return chat_store.list_user(user_id, limit)
 
 
 def delete_chat_db(user_id: str, chat_id: str) -> bool:
-    """Delete chat from MongoDB or memory"""
-    if chats_collection is not None:
-        try:
-            result = chats_collection.delete_one({"user_id": user_id, "chat_id": chat_id})
-            return result.deleted_count > 0
-        except:
-            pass
-    
-    # Fallback to memory
-    key = f"{user_id}_{chat_id}"
-    if key in chats_memory:
-        del chats_memory[key]
-        return True
-    return False
+    """Delete chat; False when it doesn't exist"""
+    return chat_store.delete(user_id, chat_id)
+
+
+summarizing = set()  # (user_id, chat_id) with a summary update running
+# Retried /chat requests: in-flight and recent responses by idempotency key
+idempotency = IdempotencyStore(ttl=float(os.getenv('CHAT_IDEMPOTENCY_TTL', '300')))
+
+
+async def summarize_chat(user_id: str, chat_id: str):
+    """Fold the messages that left the prompt window into the chat's summary"""
+    key = (user_id, chat_id)
+    chat_data = get_chat(user_id, chat_id)
+    if key in summarizing or not chat_data:
+        return
+    summarizing.add(key)
+    try:
+        summary = await asyncio.to_thread(
+            context_window.fold, chat_data,
+            lambda messages: call_groq_api(messages, temperature=0.3, max_tokens=CHAT_SUMMARY_MAX_TOKENS,
+                                           model=model_router.SMALL_MODEL),
+            CHAT_CONTEXT_TOKENS
+        )
+    finally:
+        summarizing.discard(key)
+    if summary is None:
+        return
+    # Messages may have been added meanwhile: update the latest version, unless
+    # another summary already replaced the one this fold started from
+    latest = get_chat(user_id, chat_id)
+    if latest and latest.get("summary") == chat_data.get("summary"):
+        latest["summary"] = summary
+        save_chat(latest)
 
 
 @app.get("/")
@@ -369,17 +416,35 @@ async def health_check():
     return {
         "status": "healthy",
         "mongodb": mongo_status,
+        "pending_chat_writes": chat_store.pending,
         "groq_api": groq_status,
         "timestamp": datetime.now().isoformat()
     }
 
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatMessage):
+async def chat(request: ChatMessage, background_tasks: BackgroundTasks, response: Response,
+               idempotency_key: Optional[str] = Header(None)):
     """
     Send a message and get AI response
     Works like ChatGPT - can answer anything!
+    Retries that carry the same Idempotency-Key get the first request's answer
+    (Idempotent-Replayed: true) instead of sending the message again.
     """
+    key = idempotency_key or request.idempotency_key
+    if not key:
+        return await complete_chat(request, background_tasks)
+    result, computed = await idempotency.run(
+        request.user_id, key, fingerprint(request.chat_id, request.message),
+        lambda: complete_chat(request, background_tasks)
+    )
+    if not computed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+
+async def complete_chat(request: ChatMessage, background_tasks: BackgroundTasks) -> ChatResponse:
+    """Append the user's message, get the model's answer and save both"""
     user_id = request.user_id
     message = request.message
     chat_id = request.chat_id
@@ -412,17 +477,6 @@ async def chat(request: ChatMessage):
     }
     chat_data["messages"].append(user_message)
     
-    # Prepare conversation history for Groq API
-    # Include last 10 messages for context (5 exchanges)
-    conversation_history = []
-    recent_messages = chat_data["messages"][-10:]
-    
-    for msg in recent_messages:
-        conversation_history.append({
-            "role": msg["role"],
-            "content": msg["content"]
-        })
-    
     # Get AI response from Groq with structured prompt
     try:
         # Add system prompt for better structure
@@ -450,22 +504,38 @@ async def chat(request: ChatMessage):
         
         is_roadmap_request = any(keyword in message.lower() for keyword in roadmap_keywords)
         
-        # Add system prompt to conversation
-        structured_conversation = [system_prompt] + conversation_history
-        ai_response = call_groq_api(structured_conversation)
+        # System prompt, running summary and the newest messages within the token budget
+        structured_conversation = context_window.build_prompt(chat_data, system_prompt["content"], CHAT_CONTEXT_TOKENS)
+        # Simple turns go to the small model, roadmap and long-form ones (and continuations
+        # of a large reply) to the large model
+        previous_reply = next((m for m in reversed(chat_data["messages"]) if m.get("role") == "assistant"), None)
+        route = model_router.classify(message, is_roadmap_request, previous_reply)
+        started = time.perf_counter()
+        ai_response = await asyncio.to_thread(
+            call_groq_api, structured_conversation, model=route.model, max_tokens=route.max_tokens
+        )
+        model_router.record(route, time.perf_counter() - started)
     except HTTPException as e:
         raise e
     except Exception as e:
         logger.error(f"Error getting AI response: {e}")
         raise HTTPException(status_code=500, detail="Failed to get AI response")
     
+    # Other turns may have been saved while the model answered: add to the latest version
+    if request.chat_id:
+        chat_data = get_chat(user_id, chat_id)
+        if not chat_data:
+            raise HTTPException(status_code=404, detail="Chat not found")
+        chat_data["messages"].append(user_message)
+    
     # Add AI message to chat
     bot_message_id = str(uuid.uuid4())
     bot_message = {
         "id": bot_message_id,
         "role": "assistant",
         "content": ai_response,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": datetime.now().isoformat(),
+        "route": route.name  # continuations of this reply stay on its model
     }
     chat_data["messages"].append(bot_message)
     
@@ -475,6 +545,8 @@ async def chat(request: ChatMessage):
     
     # Save chat
     save_chat(chat_data)
+    if context_window.needs_fold(chat_data, CHAT_CONTEXT_TOKENS):
+        background_tasks.add_task(summarize_chat, user_id, chat_id)
     
     # Prepare response with roadmap metadata if applicable
     response_data = {
@@ -534,12 +606,36 @@ async def get_chats(user_id: str, limit: int = 20):
             "title": chat["title"],
             "created_at": chat["created_at"],
             "last_message_at": chat.get("last_message_at", chat["created_at"]),
-            "message_count": chat.get("message_count", 0)
+            "message_count": chat.get("message_count", 0),
+            "last_message_preview": chat.get("last_message_preview", "")
         })
     
     return {"chats": formatted_chats}
 
 
+# Declared before /chats/{user_id}/{chat_id} so "search" is not taken for a chat id
+@app.get("/chats/{user_id}/search")
+async def search_chats(user_id: str, q: str, limit: int = 20, cursor: Optional[str] = None):
+    """
+    Search a user's messages. Each hit is one message with its chat, a snippet
+    and the [start, end) offsets of the matched words in the snippet.
+    Pass the returned next_cursor to get the following page.
+    """
+    limit = max(1, min(limit, 50))
+    try:
+        offset = int(cursor) if cursor else 0
+        if offset < 0:
+            raise ValueError(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    hits, more = chat_store.search(user_id, q, offset, limit)
+    return {
+        "query": q,
+        "hits": hits,
+        "next_cursor": str(offset + limit) if more else None
+    }
+
+
 @app.get("/chats/{user_id}/{chat_id}")
 async def get_chat_messages(user_id: str, chat_id: str):
     """Get messages for a specific chat"""
@@ -557,6 +653,29 @@ async def get_chat_messages(user_id: str, chat_id: str):
     }
 
 
+@app.get("/chats/{user_id}/{chat_id}/messages")
+async def get_chat_messages_page(user_id: str, chat_id: str, limit: int = 50, cursor: Optional[str] = None):
+    """
+    Get one page of a chat's messages, oldest first, newest page by default.
+    Pass the returned next_cursor to load the page of older messages before it.
+    """
+    limit = max(1, min(limit, 200))
+    try:
+        end = int(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    page = chat_store.get_messages(user_id, chat_id, end, limit)
+    if page is None:
+        raise HTTPException(status_code=404, detail="Chat not found")
+    messages, start, total = page
+    return {
+        "chat_id": chat_id,
+        "messages": messages,
+        "total": total,
+        "next_cursor": str(start) if start > 0 else None
+    }
+
+
 @app.delete("/chats/{user_id}/{chat_id}")
 async def delete_chat(user_id: str, chat_id: str):
     """Delete a chat"""
@@ -591,18 +710,18 @@ async def create_roadmap_from_chat(request: CreateRoadmapRequest):
         if not chat_data:
             raise HTTPException(status_code=404, detail="Chat not found")
         
-        # Extract all messages from the chat
-        chat_content = ""
-        for message in chat_data.get("messages", []):
-            role = message.get("role", "")
-            content = message.get("content", "")
-            if role == "user":
-                chat_content += f"User: {content}\n\n"
-            elif role == "assistant":
-                chat_content += f"Assistant: {content}\n\n"
-        
-        # Extract learning steps using AI
-        steps = extract_learning_steps_from_chat(chat_content)
+        # Extract learning steps using AI: cached on the chat, only new messages are read
+        steps, cache = await asyncio.to_thread(
+            roadmap_extraction.extract_steps, chat_data, extract_learning_steps_from_chat, ROADMAP_CHUNK_CHARS
+        )
+        if cache is not None:
+            # The chat may have changed meanwhile; the cache covers the messages it was built from
+            latest = get_chat(request.user_id, request.chat_id)
+            if latest and roadmap_extraction.messages_digest(latest["messages"][:cache["covered"]]) == cache["digest"]:
+                latest["roadmap_steps"] = cache
+                save_chat(latest)
+        if not steps:
+            steps = FALLBACK_ROADMAP_STEPS
         
         # Create roadmap document
         roadmap_id = f"roadmap_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{random.randint(1000, 9999)}"
@@ -625,7 +744,7 @@ async def create_roadmap_from_chat(request: CreateRoadmapRequest):
         }
         
         # Save to MongoDB
-        if db:
+        if db is not None:
             roadmap_collection = db['roadmap']
             roadmap_collection.insert_one(roadmap_doc)
             logger.info(f"Created roadmap {roadmap_id} from chat {request.chat_id}")
@@ -646,7 +765,12 @@ async def create_roadmap_from_chat(request: CreateRoadmapRequest):
 
 
 if __name__ == "__main__":
-    import uvicorn
+    from pathwise_shared.prefork import serve
     port = int(os.getenv('PORT', 8004))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # One worker only: ChatStore's write-behind overlay and the idempotency keys
+    # live in this process, and each flush $sets the whole chat, so a second
+    # worker would read chats without the unflushed messages and overwrite them.
+    if int(os.getenv('WEB_CONCURRENCY', '1')) > 1:
+        logger.warning("Ignoring WEB_CONCURRENCY: the chatbot runs a single worker")
+    serve(app, host="0.0.0.0", port=port, workers=1)
 
@@ -0,0 +1,144 @@
+"""
+Model routing for chat turns
+Sends simple turns ("thanks", one-line follow-ups, short factual questions)
+to a small fast model with a tight token cap, and roadmap or long-form
+requests to the large model. No dependencies: a few hard rules first, then
+a tiny logistic model over hand-picked message features gives P(simple).
+Only a confident "simple" goes to the small model; anything the classifier
+is unsure about falls back to the large one. A continuation ("tell me more",
+"show me that again in javascript") stays on the model the previous reply
+came from when that was the large one, or when the reply was longer than the
+small model's cap: it asks for more of the same, not for a short answer.
+
+Every decision is counted on /metrics by route and reason, and the model
+call is timed per route, so the latency saved (and how often we fall back)
+is visible:
+
+  chat_model_routes_total{route,reason}        counter
+  chat_model_duration_seconds{route}           histogram
+"""
+
+import math
+import os
+import re
+from typing import Dict, NamedTuple, Optional
+
+from pathwise_shared import metrics
+
+SMALL_MODEL = os.getenv('CHAT_SMALL_MODEL', 'llama-3.1-8b-instant')
+SMALL_MAX_TOKENS = int(os.getenv('CHAT_SMALL_MAX_TOKENS', '512'))
+LARGE_MODEL = os.getenv('CHAT_LARGE_MODEL', 'llama-3.3-70b-versatile')
+LARGE_MAX_TOKENS = int(os.getenv('CHAT_LARGE_MAX_TOKENS', '2000'))
+# Below this confidence the turn goes to the large model whatever the classifier says
+MIN_CONFIDENCE = float(os.getenv('CHAT_ROUTER_MIN_CONFIDENCE', '0.75'))
+
+SMALL_TALK = re.compile(
+    r"^\W*(hi|hello|hey|thanks|thank you|thx|ok|okay|cool|great|nice|got it|bye|good (morning|night)|yes|no|sure)\b[\W\w]{0,30}$",
+    re.IGNORECASE
+)
+LONG_FORM = re.compile(
+    r"\b(explain|in detail|detailed|compare|difference between|pros and cons|design|architecture|implement|"
+    r"write|code|program|function|debug|example|tutorial|guide|plan|strategy|essay|analy[sz]e|review|"
+    r"step[- ]by[- ]step|walk me through|how (does|do|can|should)|why)\b",
+    re.IGNORECASE
+)
+LIST_REQUEST = re.compile(r"\b(list|all|every|steps|ways|tips|ideas|resources)\b", re.IGNORECASE)
+FOLLOW_UP = re.compile(r"\b(it|that|this|those|them|also)\b", re.IGNORECASE)
+CONTINUATION = re.compile(
+    r"\b(more|again|continue|go on|keep going|elaborate|expand|further|another|examples?|rest of|"
+    r"rewrite|redo|instead|translate|convert|in (python|java|javascript|typescript|c\+\+|c#|go|rust|ruby|php|"
+    r"kotlin|swift|sql))\b",
+    re.IGNORECASE
+)
+
+# Logistic model over features(); positive weights push towards "simple".
+# Hand-set weights: short chit-chat and follow-ups are simple,
+# length, code, long-form wording and asking for more are not.
+WEIGHTS = {
+    "bias": 3.2,
+    "log_words": -1.1,
+    "small_talk": 3.0,
+    "long_form": -1.6,
+    "list_request": -0.9,
+    "code": -3.0,
+    "questions": -0.4,
+    "lines": -0.5,
+    "follow_up": 1.0,
+    "continuation": -1.5,
+}
+
+ROUTES = metrics.register(metrics.Counter(
+    "chat_model_routes_total", "Chat turns by model route and why it was chosen", ("route", "reason")
+))
+MODEL_LATENCY = metrics.register(metrics.Histogram(
+    "chat_model_duration_seconds", "Chat model call latency by route", ("route",), metrics.UPSTREAM_BUCKETS
+))
+
+
+class Route(NamedTuple):
+    name: str  # "small" or "large"
+    model: str
+    max_tokens: int
+    confidence: float  # classifier's P(chosen class); 1.0 for hard rules
+    reason: str
+
+
+def features(message: str) -> Dict[str, float]:
+    words = len(message.split())
+    return {
+        "bias": 1.0,
+        "log_words": math.log1p(words),
+        "small_talk": 1.0 if SMALL_TALK.match(message.strip()) else 0.0,
+        "long_form": min(len(LONG_FORM.findall(message)), 3),
+        "list_request": 1.0 if LIST_REQUEST.search(message) else 0.0,
+        "code": 1.0 if "```" in message or re.search(r"[{};]\s*$|def |class |=>|</", message, re.MULTILINE) else 0.0,
+        "questions": min(message.count("?"), 3),
+        "lines": min(message.count("\n"), 5),
+        "follow_up": 1.0 if words <= 12 and FOLLOW_UP.search(message) else 0.0,
+        "continuation": 1.0 if CONTINUATION.search(message) else 0.0,
+    }
+
+
+def p_simple(message: str) -> float:
+    score = sum(WEIGHTS[name] * value for name, value in features(message).items())
+    return 1.0 / (1.0 + math.exp(-score))
+
+
+def small(confidence: float, reason: str) -> Route:
+    return Route("small", SMALL_MODEL, SMALL_MAX_TOKENS, confidence, reason)
+
+
+def large(confidence: float, reason: str) -> Route:
+    return Route("large", LARGE_MODEL, LARGE_MAX_TOKENS, confidence, reason)
+
+
+def continues_large_reply(message: str, previous_reply: Optional[dict]) -> bool:
+    """Whether message asks to continue a reply that came from the large model or outgrew the small one"""
+    if previous_reply is None or not CONTINUATION.search(message):
+        return False
+    if previous_reply.get("route") == "large":
+        return True
+    # Replies saved before routes were recorded: judge by length (~4 characters per token)
+    return "route" not in previous_reply and len(previous_reply.get("content", "")) / 4 > SMALL_MAX_TOKENS * 0.75
+
+
+def classify(message: str, is_roadmap_request: bool = False, previous_reply: Optional[dict] = None) -> Route:
+    """Pick the model for a user turn; previous_reply is the chat's last assistant message"""
+    if is_roadmap_request:
+        return large(1.0, "roadmap")
+    if len(message) > 600:
+        return large(1.0, "long_message")
+    if continues_large_reply(message, previous_reply):
+        return large(1.0, "continuation")
+    p = p_simple(message)
+    if p >= MIN_CONFIDENCE:
+        return small(p, "simple")
+    if 1.0 - p >= MIN_CONFIDENCE:
+        return large(1.0 - p, "complex")
+    return large(1.0 - p, "low_confidence")
+
+
+def record(route: Route, seconds: float):
+    """Count the routing decision and the model call's latency"""
+    ROUTES.inc((route.name, route.reason))
+    MODEL_LATENCY.observe((route.name,), seconds)
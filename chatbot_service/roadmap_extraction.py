@@ -0,0 +1,116 @@
+"""
+Incremental roadmap extraction for /roadmap/create-from-chat
+The learning steps extracted from a chat are cached on it as
+{"steps", "covered", "digest"}: covered is how many leading messages they
+were extracted from and digest a hash of those messages' ids. Saving the
+same chat again costs nothing; after new messages only those are sent to
+the model, and the steps found are merged into the cached ones.
+
+Messages to extract from are split into chunks of at most chunk_chars
+characters (map: one extraction per chunk, run in parallel; reduce: the
+same merge), so a long chat never exceeds the model's context.
+"""
+
+import hashlib
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAP_WORKERS = 4
+
+Steps = List[Dict[str, Any]]
+
+
+def messages_digest(messages: List[Dict]) -> str:
+    digest = hashlib.sha1()
+    for message in messages:
+        digest.update(str(message.get("id", "")).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def chunk_transcript(messages: List[Dict], chunk_chars: int) -> List[str]:
+    """The user and assistant messages as "Role: content" text, in chunks of at most
+    chunk_chars, cut between messages where one ends in the second half of a chunk"""
+    transcript = "".join(
+        f"{m['role'].capitalize()}: {m.get('content', '')}\n\n"
+        for m in messages if m.get("role") in ("user", "assistant")
+    )
+    chunks, start = [], 0
+    while start < len(transcript):
+        end = start + chunk_chars
+        if end < len(transcript):
+            cut = transcript.rfind("\n\nUser: ", start + chunk_chars // 2, end)
+            if cut == -1:
+                cut = transcript.rfind("\n\nAssistant: ", start + chunk_chars // 2, end)
+            if cut != -1:
+                end = cut + 2
+        chunks.append(transcript[start:end])
+        start = end
+    return chunks
+
+
+def _key(category: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", category.lower()).strip()
+
+
+def merge_steps(steps: Steps, new_steps: Steps) -> Steps:
+    """steps with new_steps folded in: same category (ignoring case and punctuation)
+    gains the new skills, other categories are appended in order"""
+    merged = [dict(step, skills=list(step.get("skills", []))) for step in steps]
+    by_key = {_key(step["category"]): step for step in merged}
+    for step in new_steps:
+        if not isinstance(step, dict) or not isinstance(step.get("category"), str) or not step["category"].strip():
+            continue
+        skills = [s for s in step.get("skills", []) if isinstance(s, str)] if isinstance(step.get("skills"), list) else []
+        existing = by_key.get(_key(step["category"]))
+        if existing is None:
+            existing = {"category": step["category"].strip(), "skills": [],
+                        "description": step.get("description", "")}
+            merged.append(existing)
+            by_key[_key(existing["category"])] = existing
+        known = {skill.lower() for skill in existing["skills"]}
+        for skill in skills:
+            if skill.lower() not in known:
+                existing["skills"].append(skill)
+                known.add(skill.lower())
+        if not existing.get("description"):
+            existing["description"] = step.get("description", "")
+    return merged
+
+
+def extract_steps(chat: Dict, extract: Callable[[str], Optional[Steps]],
+                  chunk_chars: int = 12000) -> Tuple[Steps, Optional[Dict]]:
+    """Learning steps for the whole chat, and the cache entry to store on it.
+
+    extract(transcript) calls the model for one chunk and returns its steps,
+    or None when it fails. The cache entry is None when the cached one is
+    still current, or when a chunk failed (the steps returned are then
+    partial and are not cached).
+    """
+    messages = chat.get("messages", [])
+    cache = chat.get("roadmap_steps") or {}
+    covered = cache.get("covered", 0)
+    if covered <= len(messages) and cache.get("digest") == messages_digest(messages[:covered]):
+        steps = cache.get("steps", [])
+    else:
+        steps, covered = [], 0  # no cache, or the chat no longer starts with the cached messages
+    if covered == len(messages):
+        return steps, None
+
+    chunks = chunk_transcript(messages[covered:], chunk_chars)
+    with ThreadPoolExecutor(max_workers=min(MAP_WORKERS, max(1, len(chunks)))) as pool:
+        results = list(pool.map(extract, chunks))
+    complete = True
+    for chunk_steps in results:
+        if chunk_steps is None:
+            complete = False
+            continue
+        steps = merge_steps(steps, chunk_steps)
+    if not complete:
+        logger.warning(f"Roadmap extraction failed for part of chat {chat.get('chat_id')}; not caching")
+        return steps, None
+    return steps, {"steps": steps, "covered": len(messages), "digest": messages_digest(messages)}
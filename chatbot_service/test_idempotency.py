@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test idempotency keys on POST /chat
+Fires parallel retries of one message and checks that the model is called
+once, every retry gets the same answer and the chat holds the message once.
+Runs the app in-process with a stubbed Groq call; needs no MongoDB or API key.
+"""
+import asyncio
+import threading
+import time
+
+import httpx
+
+import main
+
+UPSTREAM_SECONDS = 0.3
+RETRIES = 8
+
+upstream_calls = []
+upstream_lock = threading.Lock()
+fail_next = []
+
+
+def fake_groq(messages, temperature=0.7, max_tokens=2000, model=""):
+    with upstream_lock:
+        upstream_calls.append(messages[-1]["content"])
+    time.sleep(UPSTREAM_SECONDS)
+    if fail_next:
+        fail_next.pop()
+        raise main.HTTPException(status_code=503, detail="AI service unavailable")
+    return f"Answer #{len(upstream_calls)}"
+
+
+main.call_groq_api = fake_groq
+
+
+def client():
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test")
+
+
+async def parallel_retries():
+    async with client() as c:
+        body = {"message": "How do I learn Python?", "user_id": "idem_user"}
+        responses = await asyncio.gather(*(
+            c.post("/chat", json=body, headers={"Idempotency-Key": "retry-1"}) for _ in range(RETRIES)
+        ))
+        late = await c.post("/chat", json=body, headers={"Idempotency-Key": "retry-1"})
+        chat = await c.get(f"/chats/idem_user/{late.json()['chat_id']}")
+        return responses, late, chat
+
+
+def test_parallel_retries():
+    print("Testing parallel /chat retries with one idempotency key...")
+    upstream_calls.clear()
+    responses, late, chat = asyncio.run(parallel_retries())
+
+    assert all(r.status_code == 200 for r in responses), [r.status_code for r in responses]
+    answers = {(r.json()["chat_id"], r.json()["message_id"], r.json()["response"]) for r in responses + [late]}
+    replayed = sum(r.headers.get("Idempotent-Replayed") == "true" for r in responses)
+    print(f"  Upstream calls: {len(upstream_calls)}")
+    print(f"  Distinct answers: {len(answers)}, replayed: {replayed}/{RETRIES} + late retry")
+    print(f"  Messages in chat: {len(chat.json()['messages'])}")
+
+    assert len(upstream_calls) == 1, "parallel retries must share one upstream call"
+    assert len(answers) == 1, "every retry must get the same answer"
+    assert replayed == RETRIES - 1
+    assert late.headers.get("Idempotent-Replayed") == "true"
+    assert len(chat.json()["messages"]) == 2, "the message must be saved once"
+    print("\n✅ Parallel retry test passed!")
+
+
+async def other_cases():
+    async with client() as c:
+        first = await c.post("/chat", json={"message": "hi", "user_id": "idem_user", "idempotency_key": "k2"})
+        reused = await c.post("/chat", json={"message": "something else", "user_id": "idem_user",
+                                             "idempotency_key": "k2"})
+        other_user = await c.post("/chat", json={"message": "hi", "user_id": "someone_else", "idempotency_key": "k2"})
+        fail_next.append(True)
+        failed = await c.post("/chat", json={"message": "flaky", "user_id": "idem_user"}, headers={"Idempotency-Key": "k3"})
+        retried = await c.post("/chat", json={"message": "flaky", "user_id": "idem_user"}, headers={"Idempotency-Key": "k3"})
+        no_key = [await c.post("/chat", json={"message": "no key", "user_id": "idem_user"}) for _ in range(2)]
+        return first, reused, other_user, failed, retried, no_key
+
+
+def test_keys_are_scoped_and_failures_retry():
+    print("Testing key reuse, user scoping and failed completions...")
+    upstream_calls.clear()
+    first, reused, other_user, failed, retried, no_key = asyncio.run(other_cases())
+
+    assert first.status_code == 200
+    assert reused.status_code == 409, "a key reused for a different message is rejected"
+    assert other_user.status_code == 200 and other_user.headers.get("Idempotent-Replayed") is None
+    assert failed.status_code == 503
+    assert retried.status_code == 200 and retried.headers.get("Idempotent-Replayed") is None, \
+        "a failed completion is not stored"
+    assert len({r.json()["chat_id"] for r in no_key}) == 2, "requests without a key are not deduplicated"
+    assert len(upstream_calls) == 6, upstream_calls
+    print("\n✅ Scoping and failure test passed!")
+
+
+if __name__ == "__main__":
+    test_parallel_retries()
+    test_keys_are_scoped_and_failures_retry()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Check that every Python service imports quickly and without network access
+
+Imports each service's main.py in a fresh interpreter under
+`python -X importtime`, with socket connects and DNS lookups refused, and
+reports the cumulative import time of main against the budget along with
+its slowest direct imports. Connecting to MongoDB, loading datasets and
+creating upstream sessions belong in the app's lifespan, not at import.
+
+Usage: python check_import_time.py [--budget-ms 1000] [service ...]
+Exits non-zero when a service is over budget, touches the network or fails to import.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SERVICES = [
+    "roadmap_api",
+    "chatbot_service",
+    "job_agent_service",
+    "linkedin_mentor_service",
+    "project_recommendation_service",
+    "resume_parser",
+    "subscription_service",
+]
+IMPORT_BUDGET_MS = 1000
+
+# Runs in the child: refuse the network, import main, then give any thread
+# started at import a moment to try connecting
+PROBE = """
+import socket, time
+attempts = set()
+def refuse(target):
+    attempts.add(repr(target))
+    raise OSError("network access during import")
+socket.socket.connect = socket.socket.connect_ex = lambda sock, address: refuse(address)
+socket.create_connection = lambda address, *args, **kwargs: refuse(address)
+socket.getaddrinfo = lambda host, port, *args, **kwargs: refuse((host, port))
+import main
+time.sleep(0.5)
+print("NETWORK:" + ", ".join(sorted(attempts)))
+"""
+
+
+def parse_importtime(stderr):
+    """[(depth, name, self_us, cumulative_us)] from -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def check(service, budget_ms):
+    """(ok, report lines)"""
+    # pathwise_shared from the repo, whether or not it is installed
+    pythonpath = os.pathsep.join(filter(None, [os.path.join(ROOT, "shared"), os.environ.get("PYTHONPATH")]))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-W", "ignore", "-c", PROBE],
+        cwd=os.path.join(ROOT, service), env=dict(os.environ, PYTHONPATH=pythonpath),
+        capture_output=True, text=True, timeout=120
+    )
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"exit {result.returncode}"
+        return False, [f"[error]  {service}: {error}"]
+
+    rows = parse_importtime(result.stderr)
+    # main is the last top-level entry; its direct imports are the depth-1 rows before it
+    main_index = max(i for i, row in enumerate(rows) if row[0] == 0 and row[1] == "main")
+    total_ms = rows[main_index][3] / 1000
+    children = [(rows[main_index][2] / 1000, "main itself")]
+    for depth, name, _, cumulative in reversed(rows[:main_index]):
+        if depth == 0:
+            break
+        if depth == 1:
+            children.append((cumulative / 1000, name))
+    slowest = ", ".join(f"{name} {ms:.0f}ms" for ms, name in sorted(children, reverse=True)[:3])
+
+    network = [line[len("NETWORK:"):] for line in result.stdout.splitlines() if line.startswith("NETWORK:")]
+    attempts = network[-1] if network else ""
+
+    ok = total_ms <= budget_ms and not attempts
+    tag = "ok" if ok else ("NETWORK" if attempts else "SLOW")
+    lines = [f"[{tag:<7}] {service}: {total_ms:.0f}ms of {budget_ms}ms  (slowest: {slowest})"]
+    if attempts:
+        lines.append(f"          connects at import: {attempts}")
+    return ok, lines
+
+
+def main(args):
+    problems = 0
+    for service in args.services or SERVICES:
+        try:
+            ok, lines = check(service, args.budget_ms)
+        except subprocess.TimeoutExpired:
+            ok, lines = False, [f"[error]  {service}: import did not finish within 120s"]
+        problems += not ok
+        print("\n".join(lines))
+    print(f"\n{problems} problem(s)")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check service import time against a budget")
+    parser.add_argument("--budget-ms", type=int, default=IMPORT_BUDGET_MS)
+    parser.add_argument("services", nargs="*", help=f"services to check (default: all {len(SERVICES)})")
+    sys.exit(main(parser.parse_args()))
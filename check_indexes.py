@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Report index drift for every Python service
+
+Loads each service's indexes.py registry and compares it with the live
+database:
+  - missing:    declared but not present (--apply creates them)
+  - undeclared: present but declared by no service
+  - unused:     present with zero accesses in $indexStats since the last restart
+and explains each declared query shape, flagging collection scans and
+in-memory sorts.
+
+Usage: python check_indexes.py [--uri mongodb://localhost:27017] [--db pathwise] [--apply]
+Exits non-zero when an index is missing or a query shape is not index-backed.
+"""
+import argparse
+import importlib.util
+import os
+import sys
+
+from pymongo import MongoClient
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SERVICES = [
+    "roadmap_api",
+    "chatbot_service",
+    "job_agent_service",
+    "linkedin_mentor_service",
+    "resume_parser",
+    "subscription_service",
+]
+
+
+def load_registry(service):
+    path = os.path.join(ROOT, service, "indexes.py")
+    spec = importlib.util.spec_from_file_location(f"{service}_indexes", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def index_spec(document):
+    """The parts of an index definition that make two indexes the same index"""
+    options = {k: v for k, v in document.items() if k not in ("name", "key", "v", "ns", "background")}
+    return list(document["key"].items()), options
+
+
+def plan_stages(plan):
+    """Flatten a winning plan into its stage documents (handles the SBE queryPlan wrapper)"""
+    plan = plan.get("queryPlan", plan)
+    stages = [plan]
+    for child in [plan.get("inputStage")] + plan.get("inputStages", []):
+        if child:
+            stages.extend(plan_stages(child))
+    return stages
+
+
+def describe_plan(explain):
+    """Summarise an executionStats explain: (index-backed?, one-line description)"""
+    stages = plan_stages(explain["queryPlanner"]["winningPlan"])
+    names = [stage["stage"] for stage in stages]
+    indexes = [stage["indexName"] for stage in stages if stage.get("indexName")]
+    stats = explain.get("executionStats", {})
+    counts = (f"keys {stats.get('totalKeysExamined', '?')}, docs {stats.get('totalDocsExamined', '?')}, "
+              f"returned {stats.get('nReturned', '?')}")
+    if "COLLSCAN" in names:
+        return False, f"COLLSCAN ({counts})"
+    if not indexes:
+        # e.g. EOF when the collection doesn't exist yet
+        return True, f"{' > '.join(names)} ({counts})"
+    in_memory_sort = "SORT" in names
+    description = f"IXSCAN {', '.join(indexes)}{' + in-memory SORT' if in_memory_sort else ''} ({counts})"
+    return not in_memory_sort, description
+
+
+def main(args):
+    client = MongoClient(args.uri, serverSelectionTimeoutMS=5000)
+    db = client[args.db]
+    registries = {service: load_registry(service) for service in SERVICES}
+
+    # (collection, index name) -> (spec, declaring services)
+    declared = {}
+    conflicts = []
+    for service, registry in registries.items():
+        for collection, models in registry.INDEXES.items():
+            for model in models:
+                document = model.document
+                key = (collection, document["name"])
+                spec = index_spec(document)
+                if key in declared and declared[key][0] != spec:
+                    conflicts.append(f"{collection}.{document['name']} ({', '.join(declared[key][1])} vs {service})")
+                declared.setdefault(key, (spec, []))[1].append(service)
+
+    problems = 0
+    collections = sorted({collection for collection, _ in declared} |
+                         {shape["collection"] for r in registries.values() for shape in r.QUERY_SHAPES})
+    existing_collections = set(db.list_collection_names())
+
+    print(f"Indexes in {args.db}")
+    for collection in collections:
+        present = {}
+        usage = {}
+        if collection in existing_collections:
+            present = {ix["name"]: index_spec(ix) for ix in db[collection].list_indexes()}
+            for stat in db[collection].aggregate([{"$indexStats": {}}]):
+                usage[stat["name"]] = (stat["accesses"]["ops"], stat["accesses"]["since"])
+
+        print(f"\n  {collection}")
+        for (coll, name), (spec, services) in sorted(declared.items()):
+            if coll != collection:
+                continue
+            owners = ", ".join(services)
+            if name not in present:
+                print(f"    [missing]    {name}  ({owners})")
+                if args.apply:
+                    model = next(m for m in registries[services[0]].INDEXES[collection] if m.document["name"] == name)
+                    db[collection].create_indexes([model])
+                    print("                 created")
+                else:
+                    problems += 1
+            elif present[name] != spec:
+                problems += 1
+                print(f"    [different]  {name}  live definition differs from the registry ({owners})")
+            elif name in usage and usage[name][0] == 0:
+                print(f"    [unused]     {name}  0 ops since {usage[name][1]:%Y-%m-%d %H:%M}  ({owners})")
+            else:
+                ops = usage.get(name, (None,))[0]
+                print(f"    [ok]         {name}  {'' if ops is None else f'{ops} ops'}")
+        for name in sorted(present):
+            if name != "_id_" and (collection, name) not in declared:
+                ops = usage.get(name, (None,))[0]
+                print(f"    [undeclared] {name}  {'' if ops is None else f'{ops} ops'}")
+
+    if conflicts:
+        problems += len(conflicts)
+        print("\nConflicting declarations")
+        for conflict in conflicts:
+            print(f"  {conflict}")
+
+    print("\nQuery shapes")
+    for service, registry in registries.items():
+        for shape in registry.QUERY_SHAPES:
+            command = {"find": shape["collection"], "filter": shape["filter"], "limit": 20}
+            if shape.get("sort"):
+                command["sort"] = dict(shape["sort"])
+            explain = db.command("explain", command, verbosity="executionStats")
+            ok, description = describe_plan(explain)
+            if not ok:
+                problems += 1
+            print(f"  [{'ok' if ok else 'SCAN'}] {service}: {shape['name']} -> {description}")
+
+    print(f"\n{problems} problem(s)")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report missing, unused and undeclared MongoDB indexes")
+    parser.add_argument("--uri", default=os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default=os.getenv("DATABASE_NAME", "pathwise"))
+    parser.add_argument("--apply", action="store_true", help="create missing indexes")
+    sys.exit(main(parser.parse_args()))
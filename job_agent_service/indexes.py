@@ -0,0 +1,41 @@
+"""
+Index registry for the job agent service
+Every index the job cache queries rely on, applied at startup by
+ensure_indexes. check_indexes.py (repo root) reads INDEXES and QUERY_SHAPES
+to report missing/unused indexes and explain plans.
+"""
+import logging
+from datetime import datetime
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+logger = logging.getLogger(__name__)
+
+INDEXES = {
+    "jobs_cache": [
+        # Latest unexpired cache entry of a user: equality, sort, then range
+        IndexModel([("user_id", ASCENDING), ("fetched_at", DESCENDING), ("expires_at", ASCENDING)],
+                   name="user_fetched_expires"),
+        # Expired entries are never read again; let MongoDB remove them
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+# Representative find shapes, explained by check_indexes.py. The roadmap
+# lookup is served by the roadmap API's user_source_updated_id index.
+QUERY_SHAPES = [
+    {"name": "cached jobs", "collection": "jobs_cache",
+     "filter": {"user_id": "user_1", "expires_at": {"$gt": datetime(2025, 1, 1)}}, "sort": [("fetched_at", -1)]},
+    {"name": "user roadmap", "collection": "roadmap",
+     "filter": {"user_id": "user_1"}},
+]
+
+
+def ensure_indexes(db):
+    """Create any declared index that is missing; existing identical indexes are a no-op"""
+    for collection, models in INDEXES.items():
+        for model in models:
+            try:
+                db[collection].create_indexes([model])
+            except Exception as e:
+                logger.warning(f"⚠️ Could not create index {collection}.{model.document['name']}: {e}")
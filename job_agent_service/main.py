@@ -7,6 +7,7 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 import os
 import logging
@@ -14,6 +15,8 @@ import requests
 from dotenv import load_dotenv
 from pymongo import MongoClient
 import re
+from indexes import ensure_indexes
+from pathwise_shared import metrics
 import json
 
 # Configure logging
@@ -25,30 +28,55 @@ load_dotenv()
 
 # Configuration
 GROQ_API_KEY = os.getenv('GROQ_API_KEY', '')
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+GROQ_API_URL = os.getenv('GROQ_API_URL', "https://api.groq.com/openai/v1/chat/completions")
 
 # Multiple Job API sources (users can configure any of these)
 RAPIDAPI_KEY = os.getenv('RAPIDAPI_KEY', '')  # For JSearch API
 ADZUNA_APP_ID = os.getenv('ADZUNA_APP_ID', '')
 ADZUNA_API_KEY = os.getenv('ADZUNA_API_KEY', '')
+JSEARCH_API_URL = os.getenv('JSEARCH_API_URL', 'https://jsearch.p.rapidapi.com/search')
+ADZUNA_API_URL = os.getenv('ADZUNA_API_URL', 'https://api.adzuna.com/v1/api/jobs')
 
-# MongoDB setup
+# MongoDB setup: connected in the lifespan, or injected with connect_mongo(client) before startup
 MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
 mongo_client = None
 db = None
 
-try:
-    mongo_client = MongoClient(MONGODB_URI, serverSelectionTimeoutMS=5000)
-    mongo_client.admin.command('ping')
-    db = mongo_client['pathwise']
-    logger.info("✅ Connected to MongoDB")
-except Exception as e:
-    logger.warning(f"⚠️ MongoDB not available: {e}")
+def connect_mongo(client: Optional[MongoClient] = None):
+    """Use client, or connect to MONGODB_URI; job caching is skipped when unreachable"""
+    global mongo_client, db
+    try:
+        if client is None:
+            client = MongoClient(MONGODB_URI, serverSelectionTimeoutMS=5000, event_listeners=[metrics.mongo_listener()])
+            client.admin.command('ping')
+        mongo_client = client
+        db = mongo_client['pathwise']
+        logger.info("✅ Connected to MongoDB")
+    except Exception as e:
+        logger.warning(f"⚠️ MongoDB not available: {e}")
+
+def close_mongo():
+    global mongo_client, db
+    if mongo_client is not None:
+        mongo_client.close()
+    mongo_client = db = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    owns_client = mongo_client is None
+    if owns_client:
+        connect_mongo()
+    if db is not None:
+        ensure_indexes(db)
+    yield
+    if owns_client:
+        close_mongo()
 
 app = FastAPI(
     title="PathWise Job Agent API",
     description="Real-world job fetching with AI matching",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS
@@ -59,6 +87,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+metrics.install(app)
 
 # Pydantic Models
 class JobSearchRequest(BaseModel):
@@ -92,7 +121,7 @@ def fetch_jobs_from_jsearch(query: str, location: str = "United States", limit:
         return []
     
     try:
-        url = "https://jsearch.p.rapidapi.com/search"
+        url = JSEARCH_API_URL
         
         headers = {
             "X-RapidAPI-Key": RAPIDAPI_KEY,
@@ -107,7 +136,9 @@ def fetch_jobs_from_jsearch(query: str, location: str = "United States", limit:
         }
         
         logger.info(f"Fetching jobs from JSearch API: {query}")
-        response = requests.get(url, headers=headers, params=params, timeout=15)
+        with metrics.track_upstream("jsearch") as call:
+            response = requests.get(url, headers=headers, params=params, timeout=15)
+            call.status = response.status_code
         
         if response.status_code == 200:
             data = response.json()
@@ -149,7 +180,7 @@ def fetch_jobs_from_adzuna(query: str, location: str = "us", limit: int = 10) ->
         return []
     
     try:
-        url = f"https://api.adzuna.com/v1/api/jobs/{location}/search/1"
+        url = f"{ADZUNA_API_URL}/{location}/search/1"
         
         params = {
             'app_id': ADZUNA_APP_ID,
@@ -160,7 +191,9 @@ def fetch_jobs_from_adzuna(query: str, location: str = "us", limit: int = 10) ->
         }
         
         logger.info(f"Fetching jobs from Adzuna API: {query}")
-        response = requests.get(url, params=params, timeout=15)
+        with metrics.track_upstream("adzuna") as call:
+            response = requests.get(url, params=params, timeout=15)
+            call.status = response.status_code
         
         if response.status_code == 200:
             data = response.json()
@@ -226,20 +259,22 @@ Make jobs realistic with:
 - Mix of remote and on-site positions
 - Recent posting dates (last 2 weeks)"""
 
-        response = requests.post(
-            GROQ_API_URL,
-            headers={
-                "Authorization": f"Bearer {GROQ_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "llama-3.3-70b-versatile",
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.7,
-                "max_tokens": 3000
-            },
-            timeout=30
-        )
+        with metrics.track_upstream("groq") as call:
+            response = requests.post(
+                GROQ_API_URL,
+                headers={
+                    "Authorization": f"Bearer {GROQ_API_KEY}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": "llama-3.3-70b-versatile",
+                    "messages": [{"role": "user", "content": prompt}],
+                    "temperature": 0.7,
+                    "max_tokens": 3000
+                },
+                timeout=30
+            )
+            call.status = response.status_code
         
         if response.status_code == 200:
             ai_response = response.json()['choices'][0]['message']['content']
@@ -299,20 +334,22 @@ Return ONLY a JSON array: [
   {{"index": 1, "match_score": 72, "reason": "Brief reason"}}
 ]"""
 
-        response = requests.post(
-            GROQ_API_URL,
-            headers={
-                "Authorization": f"Bearer {GROQ_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "llama-3.3-70b-versatile",
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.3,
-                "max_tokens": 2000
-            },
-            timeout=25
-        )
+        with metrics.track_upstream("groq") as call:
+            response = requests.post(
+                GROQ_API_URL,
+                headers={
+                    "Authorization": f"Bearer {GROQ_API_KEY}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": "llama-3.3-70b-versatile",
+                    "messages": [{"role": "user", "content": prompt}],
+                    "temperature": 0.3,
+                    "max_tokens": 2000
+                },
+                timeout=25
+            )
+            call.status = response.status_code
         
         if response.status_code == 200:
             ai_response = response.json()['choices'][0]['message']['content']
@@ -398,7 +435,7 @@ async def root():
 async def health_check():
     return {
         "status": "healthy",
-        "mongodb": "connected" if db else "disconnected",
+        "mongodb": "connected" if db is not None else "disconnected",
         "groq_api": "configured" if GROQ_API_KEY else "not_configured",
         "rapidapi": "configured" if RAPIDAPI_KEY else "not_configured",
         "adzuna": "configured" if ADZUNA_APP_ID and ADZUNA_API_KEY else "not_configured",
@@ -534,8 +571,8 @@ async def get_user_recommended_jobs(user_id: str, limit: int = 10):
 
 
 if __name__ == "__main__":
-    import uvicorn
+    from pathwise_shared.prefork import serve
     port = int(os.getenv('PORT', 5007))
     logger.info(f"Starting Job Agent Service on port {port}")
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    serve(app, host="0.0.0.0", port=port)
 
@@ -0,0 +1,41 @@
+"""
+Index registry for the LinkedIn mentor service
+Every index the mentor cache and roadmap lookups rely on, applied at startup
+by ensure_indexes. check_indexes.py (repo root) reads INDEXES and
+QUERY_SHAPES to report missing/unused indexes and explain plans.
+"""
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+INDEXES = {
+    "mentors": [
+        # Cached mentors for a user's current search
+        IndexModel([("user_id", ASCENDING), ("search_query", ASCENDING)], name="user_search_query"),
+        # Upsert key when caching; its user_id prefix also serves the cache clear
+        IndexModel([("user_id", ASCENDING), ("profile_url", ASCENDING)], name="user_profile_unique", unique=True),
+    ],
+    "roadmap": [
+        # Latest generated roadmap of a user (the roadmap API sorts by updated_at instead)
+        IndexModel([("user_id", ASCENDING), ("source", ASCENDING), ("created_at", DESCENDING)],
+                   name="user_source_created"),
+    ],
+}
+
+# Representative find shapes, explained by check_indexes.py
+QUERY_SHAPES = [
+    {"name": "latest user roadmap", "collection": "roadmap",
+     "filter": {"user_id": "user_1", "source": "user_generated"}, "sort": [("created_at", -1)]},
+    {"name": "cached mentors", "collection": "mentors",
+     "filter": {"user_id": "user_1", "search_query": "Web Development react"}},
+    {"name": "mentor upsert", "collection": "mentors",
+     "filter": {"profile_url": "https://www.linkedin.com/in/example", "user_id": "user_1"}},
+]
+
+
+def ensure_indexes(db):
+    """Create any declared index that is missing; existing identical indexes are a no-op"""
+    for collection, models in INDEXES.items():
+        for model in models:
+            try:
+                db[collection].create_indexes([model])
+            except Exception as e:
+                print(f"[ERROR] Could not create index {collection}.{model.document['name']}: {e}")
@@ -7,7 +7,10 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
+from contextlib import asynccontextmanager
 from pymongo import MongoClient
+from indexes import ensure_indexes
+from pathwise_shared import metrics
 import time
 import random
 import re
@@ -22,11 +25,49 @@ load_dotenv()
 
 # Configuration
 GROQ_API_KEY = os.getenv('GROQ_API_KEY', '')
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+GROQ_API_URL = os.getenv('GROQ_API_URL', "https://api.groq.com/openai/v1/chat/completions")
 SERPER_API_KEY = os.getenv('SERPER_API_KEY', '')  # Optional: For Google search
+SERPER_API_URL = os.getenv('SERPER_API_URL', 'https://google.serper.dev/search')
 ENABLE_WEB_SEARCH = bool(GROQ_API_KEY)
 
-app = FastAPI(title="LinkedIn Mentor Scraping Service")
+MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017')
+
+# MongoDB connection: opened in the lifespan, or injected with connect_mongo(client) before startup
+mongo_client = None
+db = None
+roadmap_collection = None
+mentors_collection = None
+
+def connect_mongo(client: Optional[MongoClient] = None):
+    global mongo_client, db, roadmap_collection, mentors_collection
+    try:
+        mongo_client = client if client is not None else MongoClient(MONGODB_URI, serverSelectionTimeoutMS=5000, event_listeners=[metrics.mongo_listener()])
+        db = mongo_client['pathwise']
+        roadmap_collection = db['roadmap']
+        mentors_collection = db['mentors']
+        print("[OK] Connected to MongoDB")
+    except Exception as e:
+        print(f"[ERROR] MongoDB connection error: {e}")
+        mongo_client = None
+
+def close_mongo():
+    global mongo_client, db, roadmap_collection, mentors_collection
+    if mongo_client:
+        mongo_client.close()
+    mongo_client = db = roadmap_collection = mentors_collection = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    owns_client = mongo_client is None
+    if owns_client:
+        connect_mongo()
+    if mongo_client:
+        ensure_indexes(db)
+    yield
+    if owns_client:
+        close_mongo()
+
+app = FastAPI(title="LinkedIn Mentor Scraping Service", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -36,17 +77,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-
-# MongoDB connection
-try:
-    mongo_client = MongoClient('mongodb://localhost:27017', serverSelectionTimeoutMS=5000)
-    db = mongo_client['pathwise']
-    roadmap_collection = db['roadmap']
-    mentors_collection = db['mentors']
-    print("[OK] Connected to MongoDB")
-except Exception as e:
-    print(f"[ERROR] MongoDB connection error: {e}")
-    mongo_client = None
+metrics.install(app)
 
 # Pydantic models
 class MentorRequest(BaseModel):
@@ -103,12 +134,14 @@ def search_google_for_professionals(query: str, domain: str) -> List[Dict[str, A
             "hl": "en"
         }
         
-        response = requests.post(
-            "https://google.serper.dev/search",
-            headers=headers,
-            json=payload,
-            timeout=10
-        )
+        with metrics.track_upstream("serper") as call:
+            response = requests.post(
+                SERPER_API_URL,
+                headers=headers,
+                json=payload,
+                timeout=10
+            )
+            call.status = response.status_code
         
         if response.status_code != 200:
             print(f"[ERROR] Serper API error: {response.status_code}")
@@ -252,7 +285,9 @@ Return ONLY a JSON array (NO markdown, NO explanations):
             "max_tokens": 4000
         }
         
-        response = requests.post(GROQ_API_URL, headers=headers, json=payload, timeout=30)
+        with metrics.track_upstream("groq") as call:
+            response = requests.post(GROQ_API_URL, headers=headers, json=payload, timeout=30)
+            call.status = response.status_code
         
         if response.status_code != 200:
             print(f"[ERROR] Groq API error: {response.status_code}")
@@ -373,7 +408,9 @@ Return ONLY a JSON array:
             "max_tokens": 4000
         }
         
-        response = requests.post(GROQ_API_URL, headers=headers, json=payload, timeout=30)
+        with metrics.track_upstream("groq") as call:
+            response = requests.post(GROQ_API_URL, headers=headers, json=payload, timeout=30)
+            call.status = response.status_code
         
         if response.status_code != 200:
             return []
@@ -1139,6 +1176,6 @@ async def health_check():
     }
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    from pathwise_shared.prefork import serve
+    serve(app, host="0.0.0.0", port=8001)
 
@@ -0,0 +1,162 @@
+"""
+In-memory project catalog with an inverted index and facet bitmaps
+Built once from the JSON database and rebuilt whenever it is written
+"""
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Iterator, List
+
+TOKEN_RE = re.compile(r'\w+')
+
+# Category -> aim keywords that give projects in that category a boost
+CATEGORY_KEYWORDS = {
+    'web-dev': ['web', 'html', 'css', 'javascript', 'frontend', 'backend', 'fullstack', 'full-stack', 'website', 'react', 'node', 'django', 'flask'],
+    'ai-ml': ['ai', 'ml', 'machine learning', 'neural', 'deep learning', 'model', 'tensorflow', 'pytorch', 'data science'],
+    'data-science': ['data', 'analytics', 'visualization', 'dashboard', 'pandas', 'numpy', 'analysis'],
+    'mobile-dev': ['mobile', 'app', 'android', 'ios', 'react native', 'flutter']
+}
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Yield the positions of the set bits of a bitmap, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _expand(vocabulary: Dict[str, int], fragment: str) -> int:
+    """OR together the bitmaps of every vocabulary term containing fragment"""
+    mask = 0
+    for term, bits in vocabulary.items():
+        if fragment in term:
+            mask |= bits
+    return mask
+
+
+class ProjectCatalog:
+    """Read-only view of the project list optimised for search and scoring.
+
+    Projects are addressed by their position in the list, and every index
+    maps a term or facet value to an int bitmap over those positions, so
+    filters become bitwise ANDs instead of nested scans.
+
+    - tokens:      \\w+ tokens of title, description and skills (search)
+    - title_words / desc_words: whitespace-split words, as the rule-based
+                   scorer matches aim words against them
+    - skills:      lowercased skill strings
+    - category / difficulty: facet bitmaps
+    """
+
+    def __init__(self, projects: List[Dict]):
+        self.projects = projects
+        self.by_id = {p.get('id'): p for p in projects}
+        self.all_mask = (1 << len(projects)) - 1
+
+        self.tokens: Dict[str, int] = defaultdict(int)
+        self.title_words: Dict[str, int] = defaultdict(int)
+        self.desc_words: Dict[str, int] = defaultdict(int)
+        self.skills: Dict[str, int] = defaultdict(int)
+        self.category: Dict[str, int] = defaultdict(int)
+        self.difficulty: Dict[str, int] = defaultdict(int)
+        # Lowercased searchable fields, kept to verify substring matches
+        self._text: List[tuple] = []
+
+        for pos, project in enumerate(projects):
+            bit = 1 << pos
+            title = project.get('title', '').lower()
+            description = project.get('description', '').lower()
+            skills = [skill.lower() for skill in project.get('skills', [])]
+
+            for token in TOKEN_RE.findall(' '.join([title, description] + skills)):
+                self.tokens[token] |= bit
+            for word in title.split():
+                self.title_words[word] |= bit
+            for word in description.split():
+                self.desc_words[word] |= bit
+            for skill in skills:
+                self.skills[skill] |= bit
+
+            self.category[project.get('category')] |= bit
+            self.difficulty[project.get('difficulty', '').lower()] |= bit
+            self._text.append((title, description, skills))
+
+        # Cached per catalog build; the vocabulary never changes after __init__
+        self._token_mask = lru_cache(maxsize=4096)(lambda f: _expand(self.tokens, f))
+        self._title_mask = lru_cache(maxsize=4096)(lambda f: _expand(self.title_words, f))
+        self._desc_mask = lru_cache(maxsize=4096)(lambda f: _expand(self.desc_words, f))
+
+    def __len__(self):
+        return len(self.projects)
+
+    def select(self, mask: int) -> List[Dict]:
+        return [self.projects[pos] for pos in iter_bits(mask)]
+
+    def query_mask(self, query: str) -> int:
+        """Bitmap of projects whose title, description or a skill contains query.
+
+        Every \\w+ run of the query must occur inside some indexed token, so
+        intersecting the expanded token bitmaps gives a small candidate set;
+        the exact substring test is then only run on those candidates.
+        """
+        query_lower = query.lower()
+        candidates = self.all_mask
+        for token in set(TOKEN_RE.findall(query_lower)):
+            candidates &= self._token_mask(token)
+            if not candidates:
+                return 0
+
+        mask = 0
+        for pos in iter_bits(candidates):
+            title, description, skills = self._text[pos]
+            if (query_lower in title or query_lower in description or
+                    any(query_lower in skill for skill in skills)):
+                mask |= 1 << pos
+        return mask
+
+    def search(self, query: str = None, category: str = None, difficulty: str = None) -> List[Dict]:
+        """Search projects with filters"""
+        mask = self.all_mask
+        if category:
+            mask &= self.category.get(category, 0)
+        if difficulty:
+            mask &= self.difficulty.get(difficulty.lower(), 0)
+        if query and mask:
+            mask &= self.query_mask(query)
+        return self.select(mask)
+
+    def rule_scores(self, aim_lower: str, mask: int) -> List[tuple]:
+        """Keyword scores used by the rule-based recommender.
+
+        Same scoring as the original per-project loop: +5 when an aim word
+        (longer than 3 chars) is inside a title word, +3 inside a description
+        word, +10 per matching skill and +15 for a category keyword hit.
+        Each aim word is expanded against the vocabularies once per query
+        instead of once per project.
+        """
+        aim_words = aim_lower.split()
+        long_words = [w for w in aim_words if len(w) > 3]
+        skill_words = [w for w in aim_words if len(w) > 2]
+
+        title_hits = [self._title_mask(w) for w in long_words]
+        desc_hits = [self._desc_mask(w) for w in long_words]
+        matched_skills = {
+            skill for skill in self.skills
+            if skill in aim_lower or any(w in skill for w in skill_words)
+        }
+        category_boost = 0
+        for cat, keywords in CATEGORY_KEYWORDS.items():
+            if any(keyword in aim_lower for keyword in keywords):
+                category_boost |= self.category.get(cat, 0)
+
+        scores = []
+        for pos in iter_bits(mask):
+            bit = 1 << pos
+            score = 5 * sum(1 for hits in title_hits if hits & bit)
+            score += 3 * sum(1 for hits in desc_hits if hits & bit)
+            score += 10 * sum(1 for skill in self._text[pos][2] if skill in matched_skills)
+            if category_boost & bit:
+                score += 15
+            scores.append((self.projects[pos], score))
+        return scores
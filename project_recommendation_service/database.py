@@ -3,10 +3,84 @@ Simple JSON database for storing AI-generated projects
 """
 import json
 import os
+import tempfile
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from typing import List, Dict
+from catalog import ProjectCatalog
 
-DATABASE_FILE = "ai_projects.json"
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within the process
+    fcntl = None
+
+DATABASE_FILE = os.getenv("PROJECTS_DB_FILE", "ai_projects.json")
+
+# Catalog built from the JSON file; rebuilt on write or when the file changes on disk
+_catalog = None
+_catalog_mtime = None
+# Serializes catalog rebuilds and writers within the process; handlers call in from worker threads
+_lock = threading.RLock()
+_write_depth = 0
+
+def _file_mtime():
+    try:
+        return os.path.getmtime(DATABASE_FILE)
+    except OSError:
+        return None
+
+@contextmanager
+def _writing():
+    """Hold the database for a read-modify-write.
+
+    The service and the precompute job are separate processes that both
+    rewrite the file, so the thread lock is paired with a flock on a
+    sidecar lock file. Re-entrant: save_projects() inside add_projects()
+    keeps the outer lock.
+    """
+    global _write_depth
+    with _lock:
+        if _write_depth or fcntl is None:
+            _write_depth += 1
+            try:
+                yield
+            finally:
+                _write_depth -= 1
+            return
+        with open(DATABASE_FILE + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            _write_depth += 1
+            try:
+                yield
+            finally:
+                _write_depth -= 1
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def write_json_atomic(path: str, data) -> None:
+    """Write data to a unique temp file beside path and swap it in, so readers never see a partial file"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.chmod(tmp_path, 0o644)  # mkstemp creates it owner-only
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def get_catalog() -> ProjectCatalog:
+    """Get the indexed project catalog, building it on first use"""
+    global _catalog, _catalog_mtime
+    mtime = _file_mtime()
+    if _catalog is not None and mtime == _catalog_mtime:
+        return _catalog
+    with _lock:
+        mtime = _file_mtime()
+        if _catalog is None or mtime != _catalog_mtime:
+            _catalog = ProjectCatalog(load_projects())
+            _catalog_mtime = mtime
+        return _catalog
 
 def load_projects() -> List[Dict]:
     """Load projects from JSON file"""
@@ -21,68 +95,64 @@ def load_projects() -> List[Dict]:
 
 def save_projects(projects: List[Dict]) -> None:
     """Save projects to JSON file"""
-    with open(DATABASE_FILE, 'w', encoding='utf-8') as f:
-        json.dump(projects, f, indent=2, ensure_ascii=False)
+    global _catalog, _catalog_mtime
+    with _writing():
+        write_json_atomic(DATABASE_FILE, projects)
+        _catalog = ProjectCatalog(projects)
+        _catalog_mtime = _file_mtime()
 
 def add_project(project: Dict) -> Dict:
     """Add a new project to the database"""
-    projects = load_projects()
-    
-    # Generate unique ID
-    max_id = max([p.get('id', 0) for p in projects], default=0)
-    project['id'] = max_id + 1
-    
-    # Add metadata
-    project['created_at'] = datetime.now().isoformat()
-    project['source'] = 'ai-generated'
-    
-    projects.append(project)
-    save_projects(projects)
+    return add_projects([project])[0]
+
+def add_projects(new_projects: List[Dict]) -> List[Dict]:
+    """Add several projects with a single rewrite of the database file"""
+    with _writing():
+        # Re-read the file: the other process may have written since the catalog was built
+        projects = load_projects()
+        
+        # Generate unique IDs
+        max_id = max([p.get('id', 0) for p in projects], default=0)
+        created_at = datetime.now().isoformat()
+        for offset, project in enumerate(new_projects, 1):
+            project['id'] = max_id + offset
+            
+            # Add metadata
+            project['created_at'] = created_at
+            project['source'] = 'ai-generated'
+            projects.append(project)
+        
+        save_projects(projects)
     
-    return project
+    return new_projects
 
 def get_all_projects() -> List[Dict]:
     """Get all projects from database"""
-    return load_projects()
+    return list(get_catalog().projects)
 
 def get_project_by_id(project_id: int) -> Dict:
     """Get a specific project by ID"""
-    projects = load_projects()
-    return next((p for p in projects if p['id'] == project_id), None)
+    return get_catalog().by_id.get(project_id)
 
 def search_projects(query: str = None, category: str = None, difficulty: str = None) -> List[Dict]:
     """Search projects with filters"""
-    projects = load_projects()
-    
-    if query:
-        query_lower = query.lower()
-        projects = [p for p in projects if 
-                   query_lower in p.get('title', '').lower() or
-                   query_lower in p.get('description', '').lower() or
-                   any(query_lower in skill.lower() for skill in p.get('skills', []))]
-    
-    if category:
-        projects = [p for p in projects if p.get('category') == category]
-    
-    if difficulty:
-        projects = [p for p in projects if p.get('difficulty', '').lower() == difficulty.lower()]
-    
-    return projects
+    return get_catalog().search(query=query, category=category, difficulty=difficulty)
 
 def delete_project(project_id: int) -> bool:
     """Delete a project by ID"""
-    projects = load_projects()
-    original_count = len(projects)
-    projects = [p for p in projects if p['id'] != project_id]
-    
-    if len(projects) < original_count:
-        save_projects(projects)
-        return True
-    return False
+    with _writing():
+        projects = load_projects()
+        original_count = len(projects)
+        projects = [p for p in projects if p['id'] != project_id]
+        
+        if len(projects) < original_count:
+            save_projects(projects)
+            return True
+        return False
 
 def get_stats() -> Dict:
     """Get database statistics"""
-    projects = load_projects()
+    projects = get_catalog().projects
     
     if not projects:
         return {
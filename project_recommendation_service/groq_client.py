@@ -0,0 +1,140 @@
+"""
+Groq client shared by the service and the offline precompute job
+Holds the upstream session and the phase prompt, so the job can call Groq
+without importing the FastAPI app.
+"""
+import asyncio
+import json
+import os
+import re
+from typing import Dict, List, Optional
+
+import aiohttp
+from dotenv import load_dotenv
+
+from pathwise_shared import metrics
+
+load_dotenv()
+
+# Groq API (free and fast) - get key from https://console.groq.com
+GROQ_API_KEY = os.getenv('GROQ_API_KEY', '')
+GROQ_API_URL = os.getenv('GROQ_API_URL', "https://api.groq.com/openai/v1/chat/completions")
+GROQ_TIMEOUT = float(os.getenv('GROQ_TIMEOUT', '20'))
+GROQ_MAX_CONNECTIONS = int(os.getenv('GROQ_MAX_CONNECTIONS', '100'))
+
+# Shared upstream session, opened on startup and closed on shutdown
+http_session: Optional[aiohttp.ClientSession] = None
+# Number of Groq requests currently awaiting a response
+groq_in_flight = 0
+
+
+async def open_http_session():
+    global http_session
+    http_session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=GROQ_MAX_CONNECTIONS, keepalive_timeout=30),
+        timeout=aiohttp.ClientTimeout(total=GROQ_TIMEOUT)
+    )
+
+
+async def close_http_session():
+    global http_session
+    if http_session is not None:
+        await http_session.close()
+        http_session = None
+
+
+async def call_groq(prompt: str, label: str,
+                    session: Optional[aiohttp.ClientSession] = None) -> Optional[List[Dict]]:
+    """Send a prompt to Groq and parse the JSON array of projects it returns.
+
+    Returns None on any upstream or parsing failure so callers can fall back
+    to rule-based recommendations. Uses the app's shared session unless one
+    is passed in (e.g. by the offline precompute job).
+    """
+    global groq_in_flight
+    groq_in_flight += 1
+    try:
+        with metrics.track_upstream("groq") as call:
+            async with (session or http_session).post(
+                GROQ_API_URL,
+                headers={
+                    "Authorization": f"Bearer {GROQ_API_KEY}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": "llama-3.1-8b-instant",
+                    "messages": [{"role": "user", "content": prompt}],
+                    "temperature": 0.7,  # Higher for more creativity
+                    "max_tokens": 1500   # More tokens for full project descriptions
+                }
+            ) as response:
+                call.status = response.status
+                print(f"📡 Groq API response status: {response.status}")
+            
+                if response.status == 200:
+                    result = await response.json()
+                    content = result['choices'][0]['message']['content'].strip()
+                    print(f"💬 AI {label} response received ({len(content)} chars)")
+                
+                    # Remove markdown code blocks if present
+                    content = re.sub(r'```json\s*', '', content)
+                    content = re.sub(r'```\s*', '', content)
+                    content = content.strip()
+                
+                    # Try to parse JSON
+                    try:
+                        projects = json.loads(content)
+                    except json.JSONDecodeError as e:
+                        print(f"⚠️  Could not parse AI {label} JSON response: {e}")
+                        print(f"Raw response: {content[:200]}...")
+                        return None
+                
+                    if isinstance(projects, list) and len(projects) > 0:
+                        return projects
+                    print(f"⚠️  AI {label} response not in expected format")
+                    return None
+                elif response.status == 401:
+                    print(f"❌ Groq API authentication failed for {label} - check your API key")
+                elif response.status == 429:
+                    print(f"⚠️  Groq API rate limit exceeded for {label} - using rule-based fallback")
+                else:
+                    text = await response.text()
+                    print(f"❌ Groq API error for {label}: {response.status} - {text[:200]}")
+                return None
+    
+    except asyncio.TimeoutError:
+        print(f"⏱️  Groq API timeout for {label} - using rule-based fallback")
+        return None
+    except aiohttp.ClientConnectionError:
+        print(f"🔌 Cannot connect to Groq API for {label} - using rule-based fallback")
+        return None
+    except Exception as e:
+        print(f"❌ Groq API error for {label}: {type(e).__name__} - {str(e)}")
+        return None
+    finally:
+        groq_in_flight -= 1
+
+
+def build_phase_prompt(phase: str, limit: int) -> str:
+    """Prompt asking Groq for projects that reinforce a completed phase"""
+    return f"""Based on the completed phase "{phase}", recommend {limit} practical projects that would help reinforce and apply the skills learned in this phase.
+
+The projects should be:
+- Directly related to the completed phase
+- Practical and hands-on
+- Progressive in difficulty
+- Include specific skills and technologies
+
+Return ONLY a JSON array of project objects with this exact structure:
+[
+  {{
+    "title": "Project Title",
+    "description": "Detailed project description explaining what to build and why it's relevant to the phase",
+    "difficulty": "beginner|intermediate|advanced",
+    "skills": ["skill1", "skill2", "skill3"],
+    "duration": "1-2 weeks|2-4 weeks|1-2 months",
+    "category": "web-dev|ai-ml|data-science|mobile-dev|design|other"
+  }}
+]
+
+Phase: {phase}"""
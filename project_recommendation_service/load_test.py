@@ -0,0 +1,145 @@
+"""
+Load test for the project recommendation service
+Starts a fake Groq endpoint with fixed latency, runs the service against it
+in a subprocess and measures how many recommendation requests one process
+keeps in flight at once.
+
+Usage: python load_test.py [--latency 2.0] [--levels 10,50,100,200]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+from aiohttp import web
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+SHARED_DIR = os.path.join(os.path.dirname(SERVICE_DIR), "shared")  # pathwise_shared, unless installed
+
+FAKE_PROJECTS = [
+    {
+        "title": f"Load Test Project {i}",
+        "description": "Generated by the fake Groq endpoint",
+        "difficulty": "beginner",
+        "skills": ["Python", "Testing"],
+        "duration": "1-2 weeks",
+        "category": "other"
+    }
+    for i in range(3)
+]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class FakeGroq:
+    """Chat-completions stand-in that sleeps, then returns a project list"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = 0
+
+    async def handle(self, request):
+        self.calls += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            return web.json_response({
+                "choices": [{"message": {"content": json.dumps(FAKE_PROJECTS)}}]
+            })
+        finally:
+            self.in_flight -= 1
+
+
+async def wait_for_service(session, url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with session.get(f"{url}/health") as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Service did not start")
+
+
+async def run_level(session, url, concurrency):
+    async def one(i):
+        async with session.post(
+            f"{url}/api/recommend/phase",
+            json={"phase": f"Phase {i}", "limit": 3}
+        ) as response:
+            body = await response.json()
+            return response.status == 200 and body.get("method") == "phase-based-ai"
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(concurrency)), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    ok = sum(1 for r in results if r is True)
+    return ok, elapsed
+
+
+async def main(latency, levels):
+    fake = FakeGroq(latency)
+    groq_app = web.Application()
+    groq_app.router.add_post("/openai/v1/chat/completions", fake.handle)
+    runner = web.AppRunner(groq_app)
+    await runner.setup()
+    groq_port = free_port()
+    await web.TCPSite(runner, "127.0.0.1", groq_port).start()
+
+    db_file = tempfile.NamedTemporaryFile(suffix=".json", delete=False)
+    db_file.write(b"[]")
+    db_file.close()
+
+    service_port = free_port()
+    env = dict(
+        os.environ,
+        GROQ_API_KEY="load-test",
+        GROQ_API_URL=f"http://127.0.0.1:{groq_port}/openai/v1/chat/completions",
+        GROQ_TIMEOUT=str(latency * 10),
+        PROJECTS_DB_FILE=db_file.name,
+        PYTHONPATH=os.pathsep.join(filter(None, [SHARED_DIR, os.environ.get("PYTHONPATH")]))
+    )
+    service = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(service_port), "--log-level", "warning"],
+        cwd=SERVICE_DIR, env=env, stdout=subprocess.DEVNULL
+    )
+    url = f"http://127.0.0.1:{service_port}"
+
+    try:
+        connector = aiohttp.TCPConnector(limit=0)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            await wait_for_service(session, url)
+            print(f"Upstream latency: {latency:.2f}s")
+            print(f"{'concurrency':>12} {'ok':>6} {'wall (s)':>9} {'req/s':>8} {'peak in flight':>15}")
+            for concurrency in levels:
+                fake.peak = 0
+                ok, elapsed = await run_level(session, url, concurrency)
+                print(f"{concurrency:>12} {ok:>6} {elapsed:>9.2f} {ok / elapsed:>8.1f} {fake.peak:>15}")
+    finally:
+        service.terminate()
+        service.wait()
+        await runner.cleanup()
+        os.unlink(db_file.name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=2.0, help="fake Groq latency in seconds")
+    parser.add_argument("--levels", default="10,50,100,200", help="comma-separated concurrency levels")
+    args = parser.parse_args()
+    asyncio.run(main(args.latency, [int(n) for n in args.levels.split(",")]))
@@ -1,24 +1,51 @@
-from flask import Flask, request, jsonify
-from flask_cors import CORS
+"""
+PathWise Project Recommendation Service
+Async FastAPI app; Groq calls go through one pooled aiohttp session
+"""
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+import asyncio
+from contextlib import asynccontextmanager
 import os
-from dotenv import load_dotenv
-import requests
-import re
-from typing import List, Dict
-import json
-from database import add_project, get_all_projects, get_project_by_id, search_projects, get_stats
-
-load_dotenv()
-
-app = Flask(__name__)
-CORS(app)
-
-# Groq API (free and fast) - get key from https://console.groq.com
-GROQ_API_KEY = os.getenv('GROQ_API_KEY', '')
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
-
-
-def recommend_with_groq(user_aim: str, num_recommendations: int = 5) -> List[Dict]:
+from typing import List, Dict, Optional
+import groq_client
+from groq_client import GROQ_API_KEY, build_phase_prompt, call_groq
+from database import add_projects, get_project_by_id, search_projects, get_stats, get_catalog
+from phase_store import get_phase_projects, load_store
+from pathwise_shared.prefork import serve
+from pathwise_shared import metrics
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # A session injected before startup (e.g. pointed at a fake Groq) is left to its owner
+    owns_session = groq_client.http_session is None
+    if owns_session:
+        await groq_client.open_http_session()
+    preload_catalogs()
+    yield
+    if owns_session:
+        await groq_client.close_http_session()
+
+
+app = FastAPI(
+    title="PathWise Project Recommendation Service",
+    description="AI and rule-based project recommendations",
+    version="2.0.0",
+    lifespan=lifespan
+)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+metrics.install(app)
+
+
+async def recommend_with_groq(user_aim: str, num_recommendations: int = 5) -> List[Dict]:
     """Use Groq AI to GENERATE custom project recommendations"""
     if not GROQ_API_KEY:
         print("⚠️  No Groq API key - using rule-based fallback")
@@ -58,80 +85,23 @@ Generate projects that are:
 Response (JSON array only, no markdown):"""
 
         print(f"🤖 Calling Groq AI to GENERATE projects for: '{user_aim[:50]}...'")
+        projects = await call_groq(prompt, "recommendation")
+        if projects is None:
+            return None
         
-        response = requests.post(
-            GROQ_API_URL,
-            headers={
-                "Authorization": f"Bearer {GROQ_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "llama-3.1-8b-instant",
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.7,  # Higher for more creativity
-                "max_tokens": 1500   # More tokens for full project descriptions
-            },
-            timeout=20
-        )
+        # Add default values and save to database
+        for proj in projects:
+            proj['rating'] = 4.5  # Default rating
+            proj['students'] = 0   # New project
+            proj['topics'] = proj.get('skills', [])[:3]  # Use first 3 skills as topics
+        saved_projects = await asyncio.to_thread(add_projects, projects)
         
-        print(f"📡 Groq API response status: {response.status_code}")
+        print(f"✅ AI generated {len(saved_projects)} custom projects and saved to database!")
+        for i, p in enumerate(saved_projects, 1):
+            print(f"  {i}. {p['title']} ({p['difficulty']}) [ID: {p['id']}]")
         
-        if response.status_code == 200:
-            result = response.json()
-            content = result['choices'][0]['message']['content'].strip()
-            print(f"💬 AI Response received ({len(content)} chars)")
-            
-            # Remove markdown code blocks if present
-            content = re.sub(r'```json\s*', '', content)
-            content = re.sub(r'```\s*', '', content)
-            content = content.strip()
-            
-            # Try to parse JSON
-            try:
-                projects = json.loads(content)
-                
-                if isinstance(projects, list) and len(projects) > 0:
-                    # Add default values and save to database
-                    saved_projects = []
-                    for proj in projects:
-                        proj['rating'] = 4.5  # Default rating
-                        proj['students'] = 0   # New project
-                        proj['topics'] = proj.get('skills', [])[:3]  # Use first 3 skills as topics
-                        
-                        # Save to database
-                        saved_proj = add_project(proj)
-                        saved_projects.append(saved_proj)
-                    
-                    print(f"✅ AI generated {len(saved_projects)} custom projects and saved to database!")
-                    for i, p in enumerate(saved_projects, 1):
-                        print(f"  {i}. {p['title']} ({p['difficulty']}) [ID: {p['id']}]")
-                    
-                    return saved_projects[:num_recommendations]
-                else:
-                    print(f"⚠️  AI response not in expected format")
-                    return None
-                    
-            except json.JSONDecodeError as e:
-                print(f"⚠️  Could not parse AI JSON response: {e}")
-                print(f"Raw response: {content[:200]}...")
-                return None
-                
-        elif response.status_code == 401:
-            print(f"❌ Groq API authentication failed - check your API key")
-            return None
-        elif response.status_code == 429:
-            print(f"⚠️  Groq API rate limit exceeded - using rule-based fallback")
-            return None
-        else:
-            print(f"❌ Groq API error: {response.status_code} - {response.text[:200]}")
-            return None
+        return saved_projects[:num_recommendations]
         
-    except requests.exceptions.Timeout:
-        print(f"⏱️  Groq API timeout - using rule-based fallback")
-        return None
-    except requests.exceptions.ConnectionError:
-        print(f"🔌 Cannot connect to Groq API - using rule-based fallback")
-        return None
     except Exception as e:
         print(f"❌ Groq API error: {type(e).__name__} - {str(e)}")
         return None
@@ -144,48 +114,16 @@ def recommend_with_rules(user_aim: str, num_recommendations: int = 5) -> List[Di
     print(f"🎯 Rule-based engine analyzing: '{aim_lower}'")
     
     # Search existing projects in database
-    projects = search_projects(query=aim_lower)
+    catalog = get_catalog()
+    candidates = catalog.query_mask(aim_lower)
     
-    if not projects:
+    if not candidates:
         print("📭 No projects found in database. Please generate some AI projects first!")
         return []
     
-    # Simple scoring based on keyword matches
-    scores = []
-    for project in projects:
-        score = 0
-        
-        # Check title and description
-        title_words = project.get('title', '').lower().split()
-        desc_words = project.get('description', '').lower().split()
-        aim_words = aim_lower.split()
-        
-        for aim_word in aim_words:
-            if len(aim_word) > 3:  # Skip short words
-                if any(aim_word in word for word in title_words):
-                    score += 5
-                if any(aim_word in word for word in desc_words):
-                    score += 3
-        
-        # Check skills
-        for skill in project.get('skills', []):
-            if skill.lower() in aim_lower or any(s in skill.lower() for s in aim_words if len(s) > 2):
-                score += 10
-        
-        # Check category match
-        category_keywords = {
-            'web-dev': ['web', 'html', 'css', 'javascript', 'frontend', 'backend', 'fullstack', 'full-stack', 'website', 'react', 'node', 'django', 'flask'],
-            'ai-ml': ['ai', 'ml', 'machine learning', 'neural', 'deep learning', 'model', 'tensorflow', 'pytorch', 'data science'],
-            'data-science': ['data', 'analytics', 'visualization', 'dashboard', 'pandas', 'numpy', 'analysis'],
-            'mobile-dev': ['mobile', 'app', 'android', 'ios', 'react native', 'flutter']
-        }
-        
-        for cat, keywords in category_keywords.items():
-            if project.get('category') == cat:
-                if any(keyword in aim_lower for keyword in keywords):
-                    score += 15  # Big boost for category match
-        
-        scores.append((project, score))
+    # Simple scoring based on keyword matches, evaluated against the catalog indexes
+    scores = catalog.rule_scores(aim_lower, candidates)
+    for project, score in scores:
         print(f"  Project: {project.get('title', 'Unknown')[:30]:30} | Score: {score}")
     
     # Sort by score and return top N
@@ -199,25 +137,26 @@ def recommend_with_rules(user_aim: str, num_recommendations: int = 5) -> List[Di
     return top_projects
 
 
-@app.route('/health', methods=['GET'])
-def health_check():
-    return jsonify({
+@app.get('/health')
+async def health_check():
+    return {
         "status": "healthy",
         "service": "project_recommendation",
-        "ai_enabled": bool(GROQ_API_KEY)
-    })
+        "ai_enabled": bool(GROQ_API_KEY),
+        "groq_in_flight": groq_client.groq_in_flight
+    }
 
 
-@app.route('/api/recommend', methods=['POST'])
-def recommend_projects():
+@app.post('/api/recommend')
+async def recommend_projects(request: Request):
     """Main endpoint to get project recommendations"""
     try:
-        data = request.get_json()
+        data = await request.json()
         user_aim = data.get('aim', '').strip()
         num_recommendations = data.get('limit', 5)
         
         if not user_aim:
-            return jsonify({"error": "Please provide your aim"}), 400
+            return JSONResponse({"error": "Please provide your aim"}, status_code=400)
         
         print(f"\n{'='*60}")
         print(f"📥 Recommendation Request")
@@ -226,11 +165,11 @@ def recommend_projects():
         print(f"Limit: {num_recommendations}")
         
         # Try AI to GENERATE custom projects first, fall back to database search
-        recommendations = recommend_with_groq(user_aim, num_recommendations)
+        recommendations = await recommend_with_groq(user_aim, num_recommendations)
         
         if recommendations is None:
             print(f"🎯 Using rule-based fallback (database search)")
-            recommendations = recommend_with_rules(user_aim, num_recommendations)
+            recommendations = await asyncio.to_thread(recommend_with_rules, user_aim, num_recommendations)
             method = "rule-based"
         else:
             method = "ai-powered"
@@ -238,65 +177,86 @@ def recommend_projects():
         print(f"✅ Returning {len(recommendations)} projects using {method} method")
         print(f"{'='*60}\n")
         
-        return jsonify({
+        return {
             "success": True,
             "aim": user_aim,
             "method": method,
             "recommendations": recommendations,
             "total": len(recommendations)
-        })
+        }
     
     except Exception as e:
         print(f"❌ Error in recommend endpoint: {e}")
-        return jsonify({"error": str(e)}), 500
+        return JSONResponse({"error": str(e)}, status_code=500)
 
 
-@app.route('/api/projects', methods=['GET'])
-def get_all_projects():
+@app.get('/api/projects')
+async def list_projects(category: Optional[str] = None, difficulty: Optional[str] = None,
+                        search: Optional[str] = None):
     """Get all available projects from database"""
-    category = request.args.get('category')
-    difficulty = request.args.get('difficulty')
-    search = request.args.get('search')
-    
-    projects = search_projects(query=search, category=category, difficulty=difficulty)
+    projects = await asyncio.to_thread(search_projects, query=search, category=category, difficulty=difficulty)
     
-    return jsonify({
+    return {
         "success": True,
         "projects": projects,
         "total": len(projects)
-    })
+    }
+
+
+@app.get('/api/projects/stats')
+async def get_project_stats():
+    """Get project database statistics"""
+    stats = await asyncio.to_thread(get_stats)
+    return {
+        "success": True,
+        "stats": stats
+    }
 
 
-@app.route('/api/projects/<int:project_id>', methods=['GET'])
-def get_project(project_id):
+@app.get('/api/projects/{project_id:int}')
+async def get_project(project_id: int):
     """Get a specific project by ID"""
-    project = get_project_by_id(project_id)
+    project = await asyncio.to_thread(get_project_by_id, project_id)
     
     if project:
-        return jsonify({"success": True, "project": project})
-    return jsonify({"error": "Project not found"}), 404
+        return {"success": True, "project": project}
+    return JSONResponse({"error": "Project not found"}, status_code=404)
 
 
-@app.route('/api/projects/stats', methods=['GET'])
-def get_project_stats():
-    """Get project database statistics"""
-    stats = get_stats()
-    return jsonify({
-        "success": True,
-        "stats": stats
-    })
+async def recommend_for_phase(phase: str, limit: int) -> tuple:
+    """Recommendations for one phase.
 
+    Served from the precomputed phase store when the phase is known; live
+    Groq generation is only the miss path, with the rule-based set as the
+    last resort.
+    """
+    recommendations = get_phase_projects(phase, limit)
+    if recommendations:
+        print(f"📦 Serving {len(recommendations)} precomputed projects for phase: {phase}")
+        return recommendations, "phase-based-precomputed"
+    
+    recommendations = await recommend_projects_for_phase_groq(phase, limit)
+    
+    if recommendations:
+        print(f"✅ Generated {len(recommendations)} phase-based recommendations using AI")
+        return recommendations, "phase-based-ai"
+    
+    # Fallback to rule-based phase recommendations
+    recommendations = recommend_projects_for_phase_rules(phase, limit)
+    print(f"🎯 Using fallback rule-based recommendations for phase: {phase}")
+    return recommendations, "phase-based-rules"
 
-@app.route('/api/recommend/phase', methods=['POST'])
-def recommend_projects_for_phase():
+
+@app.post('/api/recommend/phase')
+async def recommend_projects_for_phase(request: Request):
     """Recommend projects based on a completed phase"""
     try:
-        data = request.get_json()
+        data = await request.json()
         if not data or 'phase' not in data:
-            return jsonify({
+            return JSONResponse({
                 'success': False,
                 'error': 'Phase information is required'
-            }), 400
+            }, status_code=400)
         
         phase = data['phase']
         limit = data.get('limit', 3)
@@ -308,145 +268,99 @@ def recommend_projects_for_phase():
         print(f"Limit: {limit}")
         
         # Generate projects based on completed phase using Groq
-        recommendations = recommend_projects_for_phase_groq(phase, limit)
-        
-        if recommendations:
-            print(f"✅ Generated {len(recommendations)} phase-based recommendations using AI")
-            method = "phase-based-ai"
-        else:
-            # Fallback to rule-based phase recommendations
-            recommendations = recommend_projects_for_phase_rules(phase, limit)
-            print(f"🎯 Using fallback rule-based recommendations for phase: {phase}")
-            method = "phase-based-rules"
+        recommendations, method = await recommend_for_phase(phase, limit)
         
         print(f"✅ Returning {len(recommendations)} projects using {method} method")
         print(f"{'='*60}\n")
         
-        return jsonify({
+        return {
             'success': True,
             'recommendations': recommendations,
             'method': method,
             'phase': phase,
             'total': len(recommendations)
-        })
+        }
             
     except Exception as e:
         print(f"❌ Error in phase-based recommendation: {str(e)}")
-        return jsonify({
+        return JSONResponse({
+            'success': False,
+            'error': 'Failed to generate phase-based recommendations'
+        }, status_code=500)
+
+
+@app.post('/api/recommend/phases')
+async def recommend_projects_for_phases(request: Request):
+    """Recommend projects for several completed phases in one call.
+
+    Known phases are answered from the precomputed store; Groq calls for the
+    misses are issued concurrently, so the request takes about as long as the
+    slowest miss rather than the sum of all of them.
+    """
+    try:
+        data = await request.json()
+        phases = data.get('phases') if data else None
+        if not phases or not isinstance(phases, list):
+            return JSONResponse({
+                'success': False,
+                'error': 'A list of phases is required'
+            }, status_code=400)
+        
+        limit = data.get('limit', 3)
+        print(f"📚 Multi-phase Recommendation Request: {len(phases)} phases")
+        
+        results = await asyncio.gather(*(recommend_for_phase(phase, limit) for phase in phases))
+        
+        return {
+            'success': True,
+            'phases': [
+                {
+                    'phase': phase,
+                    'recommendations': recommendations,
+                    'method': method,
+                    'total': len(recommendations)
+                }
+                for phase, (recommendations, method) in zip(phases, results)
+            ],
+            'total': sum(len(recommendations) for recommendations, _ in results)
+        }
+    
+    except Exception as e:
+        print(f"❌ Error in multi-phase recommendation: {str(e)}")
+        return JSONResponse({
             'success': False,
             'error': 'Failed to generate phase-based recommendations'
-        }), 500
+        }, status_code=500)
 
 
-def recommend_projects_for_phase_groq(phase: str, limit: int = 3):
+async def recommend_projects_for_phase_groq(phase: str, limit: int = 3):
     """Generate project recommendations based on completed phase using Groq AI"""
     if not GROQ_API_KEY:
         print("⚠️  No Groq API key - using rule-based fallback for phase")
         return None
     
     try:
-        # Create a detailed prompt for phase-based project generation
-        prompt = f"""Based on the completed phase "{phase}", recommend {limit} practical projects that would help reinforce and apply the skills learned in this phase.
-
-The projects should be:
-- Directly related to the completed phase
-- Practical and hands-on
-- Progressive in difficulty
-- Include specific skills and technologies
-
-Return ONLY a JSON array of project objects with this exact structure:
-[
-  {{
-    "title": "Project Title",
-    "description": "Detailed project description explaining what to build and why it's relevant to the phase",
-    "difficulty": "beginner|intermediate|advanced",
-    "skills": ["skill1", "skill2", "skill3"],
-    "duration": "1-2 weeks|2-4 weeks|1-2 months",
-    "category": "web-dev|ai-ml|data-science|mobile-dev|design|other"
-  }}
-]
-
-Phase: {phase}"""
-
         print(f"🤖 Calling Groq AI for phase-based projects: '{phase}'")
+        projects = await call_groq(build_phase_prompt(phase, limit), "phase")
+        if projects is None:
+            return None
         
-        response = requests.post(
-            GROQ_API_URL,
-            headers={
-                "Authorization": f"Bearer {GROQ_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "llama-3.1-8b-instant",
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.7,
-                "max_tokens": 1500
-            },
-            timeout=20
-        )
+        # Add metadata to each project
+        for project in projects:
+            project['rating'] = 4.5
+            project['students'] = 0
+            project['topics'] = [phase.lower().replace(' ', '-')]
+            project['unlocked'] = True  # Phase-based projects are unlocked
+            project['saved'] = False  # Not saved yet
+            project['phase'] = phase  # Add phase information
+        saved_projects = await asyncio.to_thread(add_projects, projects)
         
-        print(f"📡 Groq API response status: {response.status_code}")
+        print(f"✅ AI generated {len(saved_projects)} phase-based projects and saved to database!")
+        for i, p in enumerate(saved_projects, 1):
+            print(f"  {i}. {p['title']} ({p['difficulty']}) [ID: {p['id']}]")
         
-        if response.status_code == 200:
-            result = response.json()
-            content = result['choices'][0]['message']['content'].strip()
-            print(f"💬 AI Phase Response received ({len(content)} chars)")
-            
-            # Remove markdown code blocks if present
-            content = re.sub(r'```json\s*', '', content)
-            content = re.sub(r'```\s*', '', content)
-            content = content.strip()
-            
-            # Try to parse JSON
-            try:
-                projects = json.loads(content)
-                
-                if isinstance(projects, list) and len(projects) > 0:
-                    # Add metadata to each project
-                    saved_projects = []
-                    for i, project in enumerate(projects):
-                        project['id'] = 200 + i  # Start from 200 for phase-based projects
-                        project['rating'] = 4.5
-                        project['students'] = 0
-                        project['topics'] = [phase.lower().replace(' ', '-')]
-                        project['unlocked'] = True  # Phase-based projects are unlocked
-                        project['saved'] = False  # Not saved yet
-                        project['phase'] = phase  # Add phase information
-                        
-                        # Save to database
-                        saved_proj = add_project(project)
-                        saved_projects.append(saved_proj)
-                    
-                    print(f"✅ AI generated {len(saved_projects)} phase-based projects and saved to database!")
-                    for i, p in enumerate(saved_projects, 1):
-                        print(f"  {i}. {p['title']} ({p['difficulty']}) [ID: {p['id']}]")
-                    
-                    return saved_projects[:limit]
-                else:
-                    print(f"⚠️  AI phase response not in expected format")
-                    return None
-                    
-            except json.JSONDecodeError as e:
-                print(f"⚠️  Could not parse AI phase JSON response: {e}")
-                print(f"Raw response: {content[:200]}...")
-                return None
-                
-        elif response.status_code == 401:
-            print(f"❌ Groq API authentication failed for phase recommendation")
-            return None
-        elif response.status_code == 429:
-            print(f"⚠️  Groq API rate limit exceeded for phase recommendation")
-            return None
-        else:
-            print(f"❌ Groq API error for phase: {response.status_code} - {response.text[:200]}")
-            return None
+        return saved_projects[:limit]
         
-    except requests.exceptions.Timeout:
-        print(f"⏱️  Groq API timeout for phase recommendation")
-        return None
-    except requests.exceptions.ConnectionError:
-        print(f"🔌 Cannot connect to Groq API for phase recommendation")
-        return None
     except Exception as e:
         print(f"❌ Groq API error for phase: {type(e).__name__} - {str(e)}")
         return None
@@ -559,9 +473,20 @@ def recommend_projects_for_phase_rules(phase: str, limit: int = 3):
     return recommendations[:limit]
 
 
+def preload_catalogs():
+    """Build the project catalog and load the phase store before the first request"""
+    get_catalog()
+    load_store()
+
+
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5003))
     print(f"🚀 Project Recommendation Service starting on port {port}")
     print(f"🤖 AI Mode: {'Enabled (Groq)' if GROQ_API_KEY else 'Disabled (Database search only)'}")
     print(f"💾 Database: JSON file (ai_projects.json)")
-    app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
+    # One worker only: the catalog is a JSON file rewritten whole on every
+    # write and rebuilt by each process that reads it, so more workers would
+    # multiply the rebuilds and serialize on the file lock anyway.
+    if int(os.getenv('WEB_CONCURRENCY', '1')) > 1:
+        print("⚠️  Ignoring WEB_CONCURRENCY: the project service runs a single worker")
+    serve(app, host='0.0.0.0', port=port, workers=1)
@@ -0,0 +1,91 @@
+"""
+Precomputed project sets per roadmap phase
+Written by precompute_phase_projects.py, read by the phase endpoints
+"""
+import json
+import os
+import re
+from typing import Dict, List, Optional
+
+from database import write_json_atomic
+
+PHASE_STORE_FILE = os.getenv("PHASE_STORE_FILE", "phase_projects.json")
+
+DIFFICULTIES = {"beginner", "intermediate", "advanced"}
+CATEGORIES = {"web-dev", "ai-ml", "data-science", "mobile-dev", "design", "other"}
+
+_store = None
+_store_mtime = None
+
+
+def normalize_phase(phase: str) -> str:
+    """Key used to look up a phase: lowercase alphanumerics separated by single spaces"""
+    return re.sub(r'[^a-z0-9]+', ' ', phase.lower()).strip()
+
+
+def vet_projects(projects: List[Dict], phase: str, max_projects: int = 5) -> List[Dict]:
+    """Keep only well-formed, distinct projects and normalise their fields"""
+    vetted = []
+    seen_titles = set()
+    for project in projects:
+        if not isinstance(project, dict):
+            continue
+        title = str(project.get('title', '')).strip()
+        description = str(project.get('description', '')).strip()
+        skills = [str(s).strip() for s in project.get('skills', []) if str(s).strip()] \
+            if isinstance(project.get('skills'), list) else []
+        if not title or not description or not skills or title.lower() in seen_titles:
+            continue
+        seen_titles.add(title.lower())
+
+        difficulty = str(project.get('difficulty', '')).lower()
+        category = str(project.get('category', '')).lower()
+        vetted.append({
+            "title": title,
+            "description": description,
+            "difficulty": difficulty if difficulty in DIFFICULTIES else "intermediate",
+            "skills": skills[:6],
+            "duration": str(project.get('duration', '')).strip() or "2-4 weeks",
+            "category": category if category in CATEGORIES else "other",
+            "rating": 4.5,
+            "students": 0,
+            "topics": [phase.lower().replace(' ', '-')],
+            "unlocked": True,
+            "saved": False,
+            "phase": phase
+        })
+        if len(vetted) >= max_projects:
+            break
+    return vetted
+
+
+def load_store() -> Dict[str, Dict]:
+    """Load the phase store, re-reading it only when the file changes"""
+    global _store, _store_mtime
+    try:
+        mtime = os.path.getmtime(PHASE_STORE_FILE)
+    except OSError:
+        _store, _store_mtime = {}, None
+        return _store
+    if _store is None or mtime != _store_mtime:
+        try:
+            with open(PHASE_STORE_FILE, 'r', encoding='utf-8') as f:
+                _store = json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            _store = {}
+        _store_mtime = mtime
+    return _store
+
+
+def save_store(store: Dict[str, Dict]) -> None:
+    # Swapped in whole: a half-written store would load as {} and send every phase to Groq
+    write_json_atomic(PHASE_STORE_FILE, store)
+
+
+def get_phase_projects(phase: str, limit: int) -> Optional[List[Dict]]:
+    """Precomputed projects for a phase, or None when the phase isn't stored"""
+    entry = load_store().get(normalize_phase(phase))
+    if not entry or not entry.get('projects'):
+        return None
+    # Echo the caller's phase name, as live generation does
+    return [dict(project, phase=phase) for project in entry['projects'][:limit]]
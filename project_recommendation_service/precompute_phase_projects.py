@@ -0,0 +1,104 @@
+"""
+Offline job: generate a vetted project set for every roadmap phase
+
+Collects the distinct step categories from the roadmap CSV datasets, asks
+Groq for projects for each one that isn't stored yet, vets the results and
+writes them to the phase store (phase_projects.json). The projects are also
+added to the project database in one write so they get stable ids.
+
+Usage: python precompute_phase_projects.py [--refresh] [--per-phase 5] [--concurrency 4] [--dry-run]
+"""
+import argparse
+import asyncio
+import csv
+import os
+from collections import Counter
+from datetime import datetime
+
+import aiohttp
+
+from database import add_projects
+from groq_client import GROQ_API_KEY, GROQ_TIMEOUT, build_phase_prompt, call_groq
+from phase_store import PHASE_STORE_FILE, load_store, normalize_phase, save_store, vet_projects
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASETS = [
+    os.path.join(SERVICE_DIR, "..", "comprehensive_roadmap_dataset.csv"),
+    os.path.join(SERVICE_DIR, "..", "enhanced_roadmap_datasets.csv"),
+    os.path.join(SERVICE_DIR, "..", "cross_domain_roadmaps_520.csv"),
+]
+
+
+def collect_phases(paths) -> Counter:
+    """Count roadmaps per step category, splitting the roadmap text like roadmap_api does"""
+    phases = Counter()
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"Dataset not found: {path}")
+            continue
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                for category in row.get('roadmap', '').split(' | '):
+                    if ':' in category:
+                        phases[category.split(':', 1)[0].strip()] += 1
+    return phases
+
+
+async def generate(session, semaphore, phase, per_phase):
+    async with semaphore:
+        projects = await call_groq(build_phase_prompt(phase, per_phase), "phase", session=session)
+    return phase, vet_projects(projects or [], phase, per_phase)
+
+
+async def main(args):
+    phases = collect_phases(DATASETS)
+    store = load_store()
+    # One entry per normalized name; keep the most common spelling
+    todo = {}
+    for phase, count in phases.most_common():
+        key = normalize_phase(phase)
+        if key and key not in todo and (args.refresh or key not in store):
+            todo[key] = (phase, count)
+
+    print(f"{len(phases)} distinct phases, {len(store)} already stored, {len(todo)} to generate")
+    if args.dry_run:
+        for key, (phase, count) in todo.items():
+            print(f"  {phase} ({count} roadmaps)")
+        return
+    if not GROQ_API_KEY:
+        print("GROQ_API_KEY is not set - nothing generated")
+        return
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    timeout = aiohttp.ClientTimeout(total=GROQ_TIMEOUT)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        results = await asyncio.gather(*(
+            generate(session, semaphore, phase, args.per_phase) for phase, _ in todo.values()
+        ))
+
+    generated = [(phase, projects) for phase, projects in results if projects]
+    add_projects([project for _, projects in generated for project in projects])
+
+    now = datetime.now().isoformat()
+    for phase, projects in generated:
+        store[normalize_phase(phase)] = {
+            "phase": phase,
+            "roadmaps": phases[phase],
+            "generated_at": now,
+            "projects": projects
+        }
+    save_store(store)
+
+    failed = [phase for phase, projects in results if not projects]
+    print(f"Stored {len(generated)} phases in {PHASE_STORE_FILE}")
+    if failed:
+        print(f"{len(failed)} phases failed and will use live generation: {', '.join(failed[:10])}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute project sets for roadmap phases")
+    parser.add_argument("--refresh", action="store_true", help="regenerate phases that are already stored")
+    parser.add_argument("--per-phase", type=int, default=5, help="projects to keep per phase")
+    parser.add_argument("--concurrency", type=int, default=4, help="parallel Groq requests")
+    parser.add_argument("--dry-run", action="store_true", help="list the phases that would be generated")
+    asyncio.run(main(parser.parse_args()))
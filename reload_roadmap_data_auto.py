@@ -3,10 +3,15 @@ Script to automatically reload roadmap data into MongoDB (no confirmation)
 This will clear existing CSV imports and reload fresh data from all datasets
 """
 import os
+import sys
 from pymongo import MongoClient
 from datetime import datetime
 import pandas as pd
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "roadmap_api"))
+from near_duplicates import assign_clusters
+from result_cache import bump_catalog_version
+
 # MongoDB connection
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "pathwise")
@@ -114,6 +119,13 @@ def main():
     result = roadmap_collection.insert_many(all_roadmaps)
     print(f"[OK] Successfully inserted {len(result.inserted_ids)} roadmaps")
     
+    # Link near-duplicate variants to one canonical roadmap per cluster
+    stats = assign_clusters(roadmap_collection)
+    print(f"[OK] {stats['collapsed']} near-duplicate variants collapsed into {stats['clusters']} clusters")
+    
+    # Bump the catalog version so running roadmap APIs drop their cached matches
+    print(f"[OK] Catalog version is now {bump_catalog_version(db)}")
+    
     # Show summary by dataset
     print("\n" + "=" * 60)
     print("Summary by Dataset:")
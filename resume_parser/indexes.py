@@ -0,0 +1,30 @@
+"""
+Index registry for the resume parser
+Every index the resume listing relies on, applied at startup by
+ensure_indexes. check_indexes.py (repo root) reads INDEXES and QUERY_SHAPES
+to report missing/unused indexes and explain plans.
+"""
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+INDEXES = {
+    "resume": [
+        # A user's resumes, newest first
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_created"),
+    ],
+}
+
+# Representative find shapes, explained by check_indexes.py
+QUERY_SHAPES = [
+    {"name": "user resumes", "collection": "resume",
+     "filter": {"user_id": "user_1"}, "sort": [("created_at", -1)]},
+]
+
+
+async def ensure_indexes(db):
+    """Create any declared index that is missing; existing identical indexes are a no-op"""
+    for collection, models in INDEXES.items():
+        for model in models:
+            try:
+                await db[collection].create_indexes([model])
+            except Exception as e:
+                print(f"Could not create index {collection}.{model.document['name']}: {e}")
@@ -2,37 +2,63 @@ from fastapi import FastAPI, HTTPException, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
-import uvicorn
+from contextlib import asynccontextmanager
 import os
 import re
 from datetime import datetime
 import json
-from docx import Document
-import PyPDF2
 from io import BytesIO
 from motor.motor_asyncio import AsyncIOMotorClient
 from bson import ObjectId
+from indexes import ensure_indexes
+from pathwise_shared.prefork import serve
+from pathwise_shared import metrics
+
+# MongoDB connection: opened in the lifespan, or injected with connect_mongo(client) before startup
+MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+client = None
+db = None
+resumes_collection = None
+
+def connect_mongo(mongo_client: Optional[AsyncIOMotorClient] = None):
+    global client, db, resumes_collection
+    try:
+        client = mongo_client if mongo_client is not None else AsyncIOMotorClient(MONGODB_URL, event_listeners=[metrics.mongo_listener()])
+        db = client.pathwise
+        resumes_collection = db.resume
+        print(f"Connected to MongoDB at {MONGODB_URL}")
+    except Exception as e:
+        print(f"MongoDB connection failed: {e}")
+        print("Server will start without MongoDB storage")
+        client = None
+        db = None
+        resumes_collection = None
+
+def close_mongo():
+    global client, db, resumes_collection
+    if client is not None:
+        client.close()
+    client = db = resumes_collection = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Motor clients belong to the event loop that first uses them, so they are created here
+    owns_client = client is None
+    if owns_client:
+        connect_mongo()
+    if db is not None:
+        await ensure_indexes(db)
+    yield
+    if owns_client:
+        close_mongo()
 
 app = FastAPI(
     title="Resume Parser API",
     description="A simple and professional resume parsing microservice",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-# MongoDB connection
-MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
-try:
-    client = AsyncIOMotorClient(MONGODB_URL)
-    db = client.pathwise
-    resumes_collection = db.resume
-    print(f"Connected to MongoDB at {MONGODB_URL}")
-except Exception as e:
-    print(f"MongoDB connection failed: {e}")
-    print("Server will start without MongoDB storage")
-    client = None
-    db = None
-    resumes_collection = None
-
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -41,6 +67,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+metrics.install(app)
 
 # Pydantic models
 class ParsedResume(BaseModel):
@@ -499,6 +526,8 @@ def extract_text_from_file(content: bytes, filename: str) -> str:
         return content.decode('utf-8')
     
     elif file_extension == 'docx':
+        # Parser libraries are imported on first use; python-docx pulls in lxml
+        from docx import Document
         try:
             doc = Document(BytesIO(content))
             text = []
@@ -509,6 +538,7 @@ def extract_text_from_file(content: bytes, filename: str) -> str:
             raise HTTPException(status_code=400, detail=f"Error reading .docx file: {str(e)}")
     
     elif file_extension == 'pdf':
+        import PyPDF2
         try:
             pdf_reader = PyPDF2.PdfReader(BytesIO(content))
             text = []
@@ -1091,4 +1121,4 @@ async def delete_resume(resume_id: str):
         raise HTTPException(status_code=500, detail=f"Error deleting resume: {str(e)}")
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    serve(app, host="0.0.0.0", port=8001)
@@ -0,0 +1,161 @@
+"""
+Worker-count benchmark for the pre-fork serving mode
+Starts main.py with WEB_CONCURRENCY=1, 2, 4, ... against the configured
+MongoDB, drives /api/roadmap/skill-path (matching, result cache and skill
+graph) at a fixed concurrency and reports throughput and memory per worker.
+
+RSS counts every page a worker touches, shared or not. PSS splits shared
+pages between the processes that map them, and USS is what a worker holds
+alone; USS staying flat while RSS is high is the copy-on-write sharing.
+Linux only (reads /proc).
+
+Usage: python benchmark_workers.py [--workers 1,2,4,8] [--duration 10] [--concurrency 64]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+SHARED_DIR = os.path.join(os.path.dirname(SERVICE_DIR), "shared")  # pathwise_shared, unless installed
+
+GOALS = [
+    "frontend developer", "backend developer", "full stack developer", "data scientist",
+    "machine learning engineer", "devops engineer", "mobile app developer", "ui ux designer",
+    "cloud architect", "cyber security analyst", "data analyst", "game developer"
+]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def worker_pids(master_pid: int):
+    pids = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces; ppid is the 2nd field after it
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        if ppid == master_pid:
+            pids.append(int(entry))
+    return pids
+
+
+def memory_kib(pid: int) -> dict:
+    """RSS, PSS and USS (private clean + dirty) in KiB"""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1])
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    }
+
+
+async def wait_for_service(session, url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with session.get(f"{url}/api/roadmap/skill-graph") as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Service did not start")
+
+
+async def drive(session, url, duration, concurrency):
+    """(completed requests, errors, sorted latencies) over duration seconds"""
+    latencies, errors = [], 0
+    deadline = time.monotonic() + duration
+
+    async def client(n):
+        nonlocal errors
+        i = n
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                async with session.post(f"{url}/api/roadmap/skill-path",
+                                        json={"goal": GOALS[i % len(GOALS)], "completed_skills": []}) as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+                        continue
+            except aiohttp.ClientError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            i += 1
+
+    await asyncio.gather(*(client(n) for n in range(concurrency)))
+    return len(latencies), errors, sorted(latencies)
+
+
+async def run_level(workers, duration, concurrency):
+    port = free_port()
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), PORT=str(port), LOG_LEVEL="warning",
+               PYTHONPATH=os.pathsep.join(filter(None, [SHARED_DIR, os.environ.get("PYTHONPATH")])))
+    master = subprocess.Popen([sys.executable, "main.py"], cwd=SERVICE_DIR, env=env, stdout=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0)) as session:
+            await wait_for_service(session, url)
+            await drive(session, url, 1.0, concurrency)  # warm every worker's result cache
+            completed, errors, latencies = await drive(session, url, duration, concurrency)
+
+        pids = worker_pids(master.pid) if workers > 1 else [master.pid]
+        memory = [memory_kib(pid) for pid in pids]
+        master_memory = memory_kib(master.pid)
+    finally:
+        master.terminate()
+        master.wait()
+
+    p = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0.0
+    mean = lambda key: sum(m[key] for m in memory) / len(memory) / 1024 if memory else 0.0
+    return {
+        "workers": workers,
+        "rps": completed / duration,
+        "errors": errors,
+        "p50": p(0.50),
+        "p99": p(0.99),
+        "rss": mean("rss"),
+        "pss": mean("pss"),
+        "uss": mean("uss"),
+        "total_pss": (sum(m["pss"] for m in memory) + (master_memory["pss"] if workers > 1 else 0)) / 1024
+    }
+
+
+async def main(levels, duration, concurrency):
+    print(f"{duration:.0f}s per level, {concurrency} concurrent clients, {os.cpu_count()} CPUs")
+    print(f"{'workers':>7} {'req/s':>8} {'errors':>6} {'p50 ms':>7} {'p99 ms':>7} "
+          f"{'RSS/worker':>10} {'PSS/worker':>10} {'USS/worker':>10} {'total PSS':>9}")
+    for workers in levels:
+        r = await run_level(workers, duration, concurrency)
+        print(f"{r['workers']:>7} {r['rps']:>8.1f} {r['errors']:>6} {r['p50']:>7.1f} {r['p99']:>7.1f} "
+              f"{r['rss']:>8.1f}MB {r['pss']:>8.1f}MB {r['uss']:>8.1f}MB {r['total_pss']:>7.1f}MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", default="1,2,4,8", help="comma-separated worker counts")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load per worker count")
+    parser.add_argument("--concurrency", type=int, default=64, help="concurrent client connections")
+    args = parser.parse_args()
+    asyncio.run(main([int(n) for n in args.workers.split(",")], args.duration, args.concurrency))
@@ -0,0 +1,30 @@
+"""
+Build step: compile the roadmap CSV datasets into the binary catalog
+The service maps the result at startup instead of parsing CSVs (see
+catalog_artifact.py). Run it from the roadmap_api directory whenever the
+datasets change; the Dockerfile runs it during the image build.
+
+Usage: python build_catalog.py [--out roadmap_catalog.bin]
+"""
+import argparse
+import os
+import time
+
+from catalog_artifact import CATALOG_FILE, DATASETS, CatalogArtifact, build_artifact
+
+
+def main(out_path):
+    start = time.perf_counter()
+    header = build_artifact(DATASETS, out_path)
+    elapsed = time.perf_counter() - start
+
+    catalog = CatalogArtifact(out_path)
+    print(f"Wrote {out_path}: version {header['version']}, {header['roadmaps']} roadmaps, "
+          f"{header['clusters']} clusters, {len(catalog.string_offsets) - 1} interned strings "
+          f"({os.path.getsize(out_path) / 1024:.0f} KiB) in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile the roadmap datasets into a catalog artifact")
+    parser.add_argument("--out", default=CATALOG_FILE, help="artifact path")
+    main(parser.parse_args().out)
@@ -0,0 +1,282 @@
+"""
+Prebuilt binary roadmap catalog
+build_catalog.py compiles the CSV datasets into one file. The service maps
+it read-only at startup (in the pre-fork master, so forked workers share
+the same pages): an empty database is seeded from it without CSV parsing,
+and the skill graph is built from its precomputed skill tokens. Roadmap
+matching still scores the MongoDB documents, so there is no matcher index.
+
+Layout (little endian):
+  8 bytes   magic b"PWCAT\\x00\\x00\\x01"
+  4 bytes   header length
+  header    JSON: format, version, sources, array table {name: [dtype, offset, count]}
+  arrays    raw NumPy arrays, each 8-byte aligned
+
+Strings are interned: every goal, domain, category and skill is stored once
+in string_data and referenced by index. Steps and skills are CSR arrays:
+roadmap r owns steps step_ptr[r]:step_ptr[r+1], step s owns skills
+skill_ptr[s]:skill_ptr[s+1]. canonical[r] is the near-duplicate cluster
+representative of r (r itself for canonical roadmaps).
+
+skill_tokens[i] is the token of skills[i]: one token per skill_key (case
+and whitespace folded), -1 for a blank skill. token_key[t] and
+token_name[t] are the string indexes of token t's key and its most common
+spelling.
+"""
+import csv
+import hashlib
+import json
+import mmap
+import os
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+MAGIC = b"PWCAT\x00\x00\x01"
+FORMAT = 2
+
+# Same datasets, relative to the service directory, as load_roadmap_datasets in main.py
+DATASETS = [
+    "../comprehensive_roadmap_dataset.csv",
+    "../enhanced_roadmap_datasets.csv",
+    "cross_domain_roadmaps_520.csv"
+]
+
+CATALOG_FILE = os.getenv("ROADMAP_CATALOG_FILE", "roadmap_catalog.bin")
+
+ROADMAP_STRING_FIELDS = ("goal", "domain", "roadmap_text", "difficulty", "prerequisites",
+                         "learning_outcomes", "dataset_source")
+
+
+def parse_roadmap_steps(roadmap_text: str) -> List[dict]:
+    """Parse roadmap text into structured steps"""
+    steps = []
+
+    # Split by | to get main categories
+    categories = roadmap_text.split(' | ')
+
+    for category in categories:
+        if ':' in category:
+            category_name, skills_text = category.split(':', 1)
+            category_name = category_name.strip()
+            # Split skills by semicolon and clean them up
+            skills = [skill.strip() for skill in skills_text.split(';') if skill.strip()]
+
+            steps.append({
+                "category": category_name,
+                "skills": skills
+            })
+
+    return steps
+
+
+def read_datasets(paths) -> List[dict]:
+    """CSV rows as catalog records (the fields of a csv_import document, minus timestamps)"""
+    records = []
+    for path in paths:
+        try:
+            with open(path, newline='', encoding='utf-8') as f:
+                rows = list(csv.DictReader(f))
+        except FileNotFoundError:
+            print(f"Dataset not found: {path}")
+            continue
+        print(f"Loaded {len(rows)} roadmaps from {path}")
+        for row in rows:
+            records.append({
+                "csv_id": int(row['id']),
+                "goal": row['goal'],
+                "domain": row['domain'],
+                "roadmap_text": row['roadmap'],
+                "steps": parse_roadmap_steps(row['roadmap']),
+                "difficulty": row.get('difficulty') or 'Intermediate',
+                "estimated_hours": int(row.get('estimated_hours') or 300),
+                "prerequisites": row.get('prerequisites') or '',
+                "learning_outcomes": row.get('learning_outcomes') or '',
+                "dataset_source": path
+            })
+    return records
+
+
+def build_artifact(paths, out_path: str) -> Dict:
+    """Compile the datasets into out_path; returns the header"""
+    from near_duplicates import find_clusters, roadmap_skill_set, variant_base
+    from skill_graph import skill_key
+
+    records = read_datasets(paths)
+    strings: Dict[str, int] = {}
+
+    def intern(value: str) -> int:
+        if value not in strings:
+            strings[value] = len(strings)
+        return strings[value]
+
+    fields = {name: [] for name in ROADMAP_STRING_FIELDS}
+    step_ptr, step_category, skill_ptr, skills = [0], [], [0], []
+    # Skill tokens: one per skill_key, so the skill graph needs no string work at startup
+    tokens: Dict[str, int] = {}
+    spellings = defaultdict(Counter)
+    skill_tokens = []
+    for record in records:
+        for name in ROADMAP_STRING_FIELDS:
+            fields[name].append(intern(record[name]))
+        for step in record["steps"]:
+            step_category.append(intern(step["category"]))
+            for skill in step["skills"]:
+                skills.append(intern(skill))
+                raw = skill.strip()
+                if raw:
+                    key = skill_key(raw)
+                    spellings[key][raw] += 1
+                    skill_tokens.append(tokens.setdefault(key, len(tokens)))
+                else:
+                    skill_tokens.append(-1)
+            skill_ptr.append(len(skills))
+        step_ptr.append(len(step_category))
+    token_key = [intern(key) for key in tokens]
+    token_name = [intern(spellings[key].most_common(1)[0][0]) for key in tokens]
+
+    canonical = np.arange(len(records), dtype=np.int32)
+    clusters = find_clusters(
+        [roadmap_skill_set(r) for r in records],
+        groups=[(r["domain"].lower(), variant_base(r["goal"])) for r in records]
+    )
+    for cluster in clusters:
+        canonical[cluster] = cluster[0]
+
+    encoded = [s.encode("utf-8") for s in strings]
+    string_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=string_offsets[1:])
+
+    arrays = {
+        "string_offsets": string_offsets,
+        "string_data": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "csv_id": np.array([r["csv_id"] for r in records], dtype=np.int64),
+        "estimated_hours": np.array([r["estimated_hours"] for r in records], dtype=np.int32),
+        "step_ptr": np.array(step_ptr, dtype=np.int32),
+        "step_category": np.array(step_category, dtype=np.int32),
+        "skill_ptr": np.array(skill_ptr, dtype=np.int32),
+        "skills": np.array(skills, dtype=np.int32),
+        "skill_tokens": np.array(skill_tokens, dtype=np.int32),
+        "token_key": np.array(token_key, dtype=np.int32),
+        "token_name": np.array(token_name, dtype=np.int32),
+        "canonical": canonical,
+        **{name: np.array(values, dtype=np.int32) for name, values in fields.items()}
+    }
+
+    digest = hashlib.sha256()
+    for path in paths:
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                digest.update(f.read())
+
+    table, offset = {}, 0
+    for name, array in arrays.items():
+        table[name] = [array.dtype.str, offset, len(array)]
+        offset += -(-array.nbytes // 8) * 8
+    header = {
+        "format": FORMAT,
+        "version": digest.hexdigest()[:16],
+        "built_at": datetime.now().isoformat(),
+        "sources": list(paths),
+        "roadmaps": len(records),
+        "clusters": len(clusters),
+        "skill_tokens": len(tokens),
+        "arrays": table
+    }
+    header_bytes = json.dumps(header).encode("utf-8")
+    header_bytes += b" " * (-(len(MAGIC) + 4 + len(header_bytes)) % 8)
+
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header_bytes).to_bytes(4, "little"))
+        f.write(header_bytes)
+        for array in arrays.values():
+            data = array.tobytes()
+            f.write(data + b"\0" * (-len(data) % 8))
+    os.replace(tmp_path, out_path)  # readers never see a half-written file
+    return header
+
+
+class CatalogArtifact:
+    """Read-only view of a built catalog; the arrays point straight into the mapped file"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a roadmap catalog artifact")
+        header_len = int.from_bytes(self._mm[len(MAGIC):len(MAGIC) + 4], "little")
+        base = len(MAGIC) + 4
+        self.header = json.loads(self._mm[base:base + header_len])
+        if self.header["format"] != FORMAT:
+            raise ValueError(f"{path} has catalog format {self.header['format']}, expected {FORMAT}")
+        self.version = self.header["version"]
+        self._strings = None
+
+        data_start = base + header_len
+        for name, (dtype, offset, count) in self.header["arrays"].items():
+            setattr(self, name, np.frombuffer(self._mm, dtype=np.dtype(dtype), count=count,
+                                              offset=data_start + offset))
+
+    def __len__(self):
+        return len(self.csv_id)
+
+    @property
+    def strings(self) -> List[str]:
+        """Every interned string, decoded once on first use"""
+        if self._strings is None:
+            data = self.string_data.tobytes()
+            offsets = self.string_offsets.tolist()
+            self._strings = [data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+        return self._strings
+
+    def steps(self, r: int) -> List[dict]:
+        strings = self.strings
+        step_ptr, skill_ptr = self.step_ptr, self.skill_ptr
+        return [
+            {
+                "category": strings[self.step_category[s]],
+                "skills": [strings[i] for i in self.skills[skill_ptr[s]:skill_ptr[s + 1]].tolist()]
+            }
+            for s in range(step_ptr[r], step_ptr[r + 1])
+        ]
+
+    def documents(self, created_at: Optional[datetime] = None) -> List[dict]:
+        """csv_import documents in the same shape load_roadmap_datasets produces"""
+        created_at = created_at or datetime.now()
+        strings = self.strings
+        columns = {name: getattr(self, name).tolist() for name in ROADMAP_STRING_FIELDS}
+        csv_ids, hours = self.csv_id.tolist(), self.estimated_hours.tolist()
+        docs = []
+        for r in range(len(self)):
+            goal = strings[columns["goal"][r]]
+            docs.append({
+                "csv_id": csv_ids[r],
+                "title": goal,
+                "goal": goal,
+                "domain": strings[columns["domain"][r]],
+                "roadmap_text": strings[columns["roadmap_text"][r]],
+                "steps": self.steps(r),
+                "created_at": created_at,
+                "source": "csv_import",
+                "difficulty": strings[columns["difficulty"][r]],
+                "estimated_hours": hours[r],
+                "prerequisites": strings[columns["prerequisites"][r]],
+                "learning_outcomes": strings[columns["learning_outcomes"][r]],
+                "dataset_source": strings[columns["dataset_source"][r]]
+            })
+        return docs
+
+
+def open_catalog(path: str = CATALOG_FILE) -> Optional[CatalogArtifact]:
+    """The built catalog, or None when it hasn't been built or can't be read"""
+    if not os.path.exists(path):
+        return None
+    try:
+        return CatalogArtifact(path)
+    except Exception as e:
+        print(f"Could not open catalog artifact {path}: {e}")
+        return None
@@ -0,0 +1,31 @@
+"""
+Offline job: collapse near-duplicate catalog roadmaps
+Clusters the csv_import roadmaps by skill-set similarity (MinHash + LSH,
+see near_duplicates.py), links every variant to its canonical roadmap and
+bumps the catalog version so running services drop their cached matches.
+The reload scripts run this after every import.
+
+Usage: python cluster_roadmaps.py
+"""
+import os
+
+from pymongo import MongoClient
+
+from near_duplicates import assign_clusters
+from result_cache import bump_catalog_version
+
+MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "pathwise")
+
+
+def main():
+    db = MongoClient(MONGODB_URL)[DATABASE_NAME]
+    stats = assign_clusters(db["roadmap"])
+    version = bump_catalog_version(db)
+    print(f"{stats['roadmaps']} catalog roadmaps -> {stats['clusters']} clusters "
+          f"({stats['collapsed']} variants collapsed, largest cluster {stats['largest_cluster']})")
+    print(f"Catalog version is now {version}")
+
+
+if __name__ == "__main__":
+    main()
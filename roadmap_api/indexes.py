@@ -0,0 +1,107 @@
+"""
+Index registry for the roadmap API
+Every index the service's queries rely on, applied at startup by
+ensure_indexes. check_indexes.py (repo root) reads INDEXES and QUERY_SHAPES
+to report missing/unused indexes and explain plans.
+"""
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+INDEXES = {
+    "roadmap": [
+        # One user_generated roadmap per (user_id, goal); backs the upsert in save_user_roadmap
+        IndexModel(
+            [("user_id", ASCENDING), ("goal", ASCENDING), ("source", ASCENDING)],
+            name="user_goal_source_unique",
+            unique=True,
+            partialFilterExpression={"source": "user_generated", "user_id": {"$type": "string"}}
+        ),
+        # Saved roadmaps of one user in listing order (updated_at, _id), see listing.py
+        IndexModel([("user_id", ASCENDING), ("source", ASCENDING), ("updated_at", DESCENDING), ("_id", DESCENDING)],
+                   name="user_source_updated_id"),
+        # Admin listing of all generated roadmaps, catalog loads and counts by source
+        IndexModel([("source", ASCENDING), ("updated_at", DESCENDING), ("_id", DESCENDING)],
+                   name="source_updated_id"),
+        IndexModel([("roadmap_id", ASCENDING)], name="roadmap_id"),
+        IndexModel([("domain", ASCENDING)], name="domain"),
+    ],
+}
+
+# Representative find shapes, explained by check_indexes.py
+QUERY_SHAPES = [
+    {"name": "user roadmaps", "collection": "roadmap",
+     "filter": {"user_id": "user_1", "source": "user_generated"}, "sort": [("updated_at", -1), ("_id", -1)]},
+    {"name": "all generated roadmaps", "collection": "roadmap",
+     "filter": {"source": "user_generated"}, "sort": [("updated_at", -1), ("_id", -1)]},
+    {"name": "catalog roadmaps", "collection": "roadmap",
+     "filter": {"source": "csv_import"}},
+    {"name": "saved roadmap by goal", "collection": "roadmap",
+     "filter": {"user_id": "user_1", "goal": "Full Stack Developer", "source": "user_generated"}},
+    {"name": "delete roadmap", "collection": "roadmap",
+     "filter": {"roadmap_id": "roadmap_1", "user_id": "user_1", "source": "user_generated"}},
+]
+
+
+def dedupe_user_roadmaps(db) -> int:
+    """Merge duplicate user_generated roadmaps per (user_id, goal) so that
+    user_goal_source_unique can be built; returns how many were removed.
+
+    The most recently updated document of each group is kept, with the
+    group's summed generation_count and earliest created_at.
+    """
+    roadmaps = db["roadmap"]
+    groups = roadmaps.aggregate([
+        {"$match": {"source": "user_generated", "user_id": {"$type": "string"}}},
+        {"$sort": {"updated_at": -1, "_id": -1}},
+        {"$group": {
+            "_id": {"user_id": "$user_id", "goal": "$goal"},
+            "ids": {"$push": "$_id"},
+            "generations": {"$sum": {"$ifNull": ["$generation_count", 1]}},
+            "created_at": {"$min": "$created_at"},
+        }},
+        {"$match": {"ids.1": {"$exists": True}}},
+    ], allowDiskUse=True)
+    removed = 0
+    for group in groups:
+        keep, duplicates = group["ids"][0], group["ids"][1:]
+        merged = {"generation_count": group["generations"]}
+        if group.get("created_at") is not None:
+            merged["created_at"] = group["created_at"]
+        roadmaps.update_one({"_id": keep}, {"$set": merged})
+        removed += roadmaps.delete_many({"_id": {"$in": duplicates}}).deleted_count
+    return removed
+
+
+# Run before building an index that existing data may violate; each returns documents removed
+MIGRATIONS = {
+    ("roadmap", "user_goal_source_unique"): dedupe_user_roadmaps,
+}
+
+
+def ensure_indexes(db) -> int:
+    """Create any declared index that is missing; existing identical indexes are a no-op.
+
+    A missing index's migration runs before it is built. A unique index that
+    can't be built raises, failing startup: writes rely on it for correctness.
+    Returns the number of documents the migrations removed.
+    """
+    removed = 0
+    for collection, models in INDEXES.items():
+        existing = None
+        for model in models:
+            name = model.document["name"]
+            try:
+                migration = MIGRATIONS.get((collection, name))
+                if migration is not None:
+                    if existing is None:
+                        existing = db[collection].index_information()
+                    if name not in existing:
+                        merged = migration(db)
+                        if merged:
+                            print(f"Removed {merged} duplicate documents before building {collection}.{name}")
+                        removed += merged
+                db[collection].create_indexes([model])
+            except Exception as e:
+                print(f"Could not create index {collection}.{name}: {e}")
+                if model.document.get("unique"):
+                    raise
+    return removed
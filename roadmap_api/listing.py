@@ -0,0 +1,114 @@
+"""
+Keyset pagination for generated-roadmap listings
+Pages are ordered by (updated_at, _id) descending and continued from an
+opaque cursor, so page N costs the same as page 1. The total number of
+generated roadmaps is kept in catalog_meta and updated on every insert and
+delete instead of being counted per request.
+"""
+import base64
+import json
+import time
+from datetime import datetime
+from typing import Optional
+
+from bson import ObjectId
+
+COUNT_META_ID = "user_generated_count"
+
+# Newest first; _id breaks ties between roadmaps updated in the same millisecond
+LISTING_SORT = [("updated_at", -1), ("_id", -1)]
+
+# Largest page a listing endpoint serves
+MAX_PAGE_SIZE = 200
+
+# List views that don't render the steps skip the largest field
+SUMMARY_PROJECTION = {"steps": 0}
+
+
+def encode_cursor(doc: dict) -> str:
+    """Cursor pointing just past doc in LISTING_SORT order"""
+    updated_at = doc.get("updated_at")
+    payload = {"u": updated_at.isoformat() if updated_at else None, "i": str(doc["_id"])}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """(updated_at, _id) from a cursor; raises ValueError for anything malformed"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        updated_at = datetime.fromisoformat(payload["u"]) if payload["u"] else None
+        return updated_at, ObjectId(payload["i"])
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def after_cursor(query: dict, cursor: Optional[str]) -> dict:
+    """Restrict query to documents that sort after the cursor"""
+    if not cursor:
+        return query
+    updated_at, last_id = decode_cursor(cursor)
+    if updated_at is None:
+        # Legacy roadmaps without updated_at sort last; only the _id tie-break is left
+        return {**query, "updated_at": None, "_id": {"$lt": last_id}}
+    return {**query, "$or": [
+        {"updated_at": {"$lt": updated_at}},
+        {"updated_at": updated_at, "_id": {"$lt": last_id}},
+        {"updated_at": None},
+    ]}
+
+
+def fetch_page(collection, query: dict, limit: int, cursor: Optional[str] = None,
+               projection: Optional[dict] = None, skip: int = 0):
+    """One page of documents plus the cursor for the next page (None on the last page).
+
+    skip is only for clients still paging by offset; it costs a scan of
+    every skipped index entry. Raises ValueError for a limit below 1 or a negative skip.
+    """
+    if limit < 1 or skip < 0:
+        raise ValueError(f"Invalid page: limit={limit}, skip={skip}")
+    docs = list(collection.find(after_cursor(query, cursor), projection)
+                .sort(LISTING_SORT).skip(skip).limit(limit + 1))
+    next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+    return docs[:limit], next_cursor
+
+
+class GeneratedRoadmapCount:
+    """Number of user_generated roadmaps, maintained incrementally.
+
+    The stored count is adjusted with $inc by every write path and re-read
+    at most every ttl seconds. It is seeded (and can be re-seeded) with a
+    single count_documents when the counter document is missing.
+    """
+
+    def __init__(self, collection, meta_collection, ttl: float = 30.0):
+        self.collection = collection
+        self.meta = meta_collection
+        self.ttl = ttl
+        self._value = None
+        self._read_at = 0.0
+
+    def get(self) -> int:
+        if self._value is not None and time.monotonic() - self._read_at < self.ttl:
+            return self._value
+        doc = self.meta.find_one({"_id": COUNT_META_ID}, {"count": 1})
+        if doc is None:
+            return self.reconcile()
+        self._value, self._read_at = doc["count"], time.monotonic()
+        return self._value
+
+    def add(self, n: int):
+        """Record n inserted (or -n deleted) roadmaps; a missing counter is left for get() to seed"""
+        self.meta.update_one({"_id": COUNT_META_ID}, {"$inc": {"count": n}})
+        if self._value is not None:
+            self._value += n
+
+    def reconcile(self) -> int:
+        """Recount from the collection and overwrite the stored counter"""
+        count = self.collection.count_documents({"source": "user_generated"})
+        self.meta.update_one(
+            {"_id": COUNT_META_ID},
+            {"$set": {"count": count, "reconciled_at": datetime.now()}},
+            upsert=True
+        )
+        self._value, self._read_at = count, time.monotonic()
+        return count
@@ -1,17 +1,133 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
-import pandas as pd
+from contextlib import asynccontextmanager
 import random
 import re
 from datetime import datetime
-import uvicorn
-from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import MongoClient
+from pymongo import MongoClient, ReturnDocument
+from pymongo.errors import DuplicateKeyError
 import os
+from indexes import ensure_indexes
+from catalog_artifact import DATASETS, open_catalog, read_datasets
+from near_duplicates import assign_clusters, link_clusters
+from pathwise_shared.prefork import serve
+from pathwise_shared import metrics
+from listing import GeneratedRoadmapCount, LISTING_SORT, MAX_PAGE_SIZE, SUMMARY_PROJECTION, after_cursor, fetch_page
+from skill_graph import SkillGraph
+from result_cache import RoadmapResultCache, bump_catalog_version, canonicalize_domain, canonicalize_goal, seeded_artifact
 
-app = FastAPI(title="Roadmap Generator API", version="1.0.0")
+# MongoDB connection
+MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "pathwise")
+
+# Set by connect_mongo(), which the lifespan calls unless a client was injected first
+client = None
+db = None
+roadmap_collection = None
+# Best-match results per (goal, domain); cleared whenever the catalog version changes
+result_cache = None
+# Total shown by the admin listing; adjusted on every insert/delete of a generated roadmap
+generated_count = None
+# Catalog artifact, mapped once at startup (before the fork under pre-fork serving); None when not built
+artifact = None
+
+def connect_mongo(mongo_client: Optional[MongoClient] = None):
+    """Use mongo_client (e.g. a test double), or create the service's client.
+
+    Nothing here talks to the server: MongoClient connects in the background
+    on first use.
+    """
+    global client, db, roadmap_collection, result_cache, generated_count
+    client = mongo_client if mongo_client is not None else MongoClient(MONGODB_URL, event_listeners=[metrics.mongo_listener()])
+    db = client[DATABASE_NAME]
+    roadmap_collection = db["roadmap"]
+    result_cache = RoadmapResultCache(
+        db,
+        max_size=int(os.getenv("ROADMAP_CACHE_SIZE", "2048")),
+        version_ttl=float(os.getenv("CATALOG_VERSION_TTL", "5"))
+    )
+    generated_count = GeneratedRoadmapCount(
+        roadmap_collection, db["catalog_meta"],
+        ttl=float(os.getenv("ROADMAP_COUNT_TTL", "30"))
+    )
+
+def close_mongo():
+    global client, db, roadmap_collection, result_cache, generated_count
+    if client is not None:
+        client.close()
+    client = db = roadmap_collection = result_cache = generated_count = None
+
+# Load CSV data from multiple sources
+def load_roadmap_datasets():
+    """Parse the CSV datasets; only used when no catalog artifact has been built"""
+    now = datetime.now()
+    return [
+        {**record, "title": record["goal"], "created_at": now, "source": "csv_import"}
+        for record in read_datasets(DATASETS)
+    ]
+
+def open_artifact():
+    """Map the catalog artifact once; workers forked afterwards share its pages"""
+    global artifact
+    if artifact is None:
+        artifact = open_catalog()
+        if artifact is not None:
+            print(f"Mapped catalog artifact {artifact.version} ({len(artifact)} roadmaps)")
+    return artifact
+
+def seed_catalog():
+    """Load the catalog roadmaps into an empty collection"""
+    try:
+        # Check if we need to load data
+        existing_count = roadmap_collection.count_documents({"source": "csv_import"})
+        
+        if existing_count == 0:
+            print("Loading roadmap datasets...")
+            catalog = open_artifact()
+            if catalog is not None:
+                print(f"Using catalog artifact {catalog.version} ({len(catalog)} roadmaps)")
+                all_roadmaps = catalog.documents()
+            else:
+                all_roadmaps = load_roadmap_datasets()
+            
+            if all_roadmaps:
+                result = roadmap_collection.insert_many(all_roadmaps)
+                if catalog is not None:
+                    link_clusters(roadmap_collection, result.inserted_ids, catalog.canonical)
+                else:
+                    assign_clusters(roadmap_collection)
+                bump_catalog_version(db, catalog.version if catalog is not None else None)
+                print(f"Stored {len(all_roadmaps)} roadmaps in MongoDB from all datasets")
+            else:
+                print("No roadmap data loaded")
+        else:
+            print(f"MongoDB already contains {existing_count} roadmaps from datasets")
+            
+    except Exception as e:
+        print(f"Error loading roadmap datasets: {e}")
+
+def ensure_roadmap_indexes():
+    """Apply the index registry; the upsert in save_user_roadmap relies on user_goal_source_unique,
+    so failing to build it fails startup"""
+    if ensure_indexes(db):
+        generated_count.reconcile()  # duplicates were merged away
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    owns_client = client is None
+    if owns_client:
+        connect_mongo()
+    open_artifact()
+    seed_catalog()
+    ensure_roadmap_indexes()
+    build_skill_graph()
+    yield
+    if owns_client:
+        close_mongo()
+
+app = FastAPI(title="Roadmap Generator API", version="1.0.0", lifespan=lifespan)
 
 # Health check endpoint
 @app.get("/health")
@@ -31,77 +147,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-
-# MongoDB connection
-MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
-DATABASE_NAME = os.getenv("DATABASE_NAME", "pathwise")
-
-# Initialize MongoDB client
-client = MongoClient(MONGODB_URL)
-db = client[DATABASE_NAME]
-roadmap_collection = db["roadmap"]
-
-# Load CSV data from multiple sources
-def load_roadmap_datasets():
-    """Load roadmap data from multiple CSV sources"""
-    datasets = [
-        "../comprehensive_roadmap_dataset.csv",
-        "../enhanced_roadmap_datasets.csv",
-        "cross_domain_roadmaps_520.csv"
-    ]
-    
-    all_roadmaps = []
-    
-    for dataset_path in datasets:
-        try:
-            df = pd.read_csv(dataset_path)
-            print(f"Loaded {len(df)} roadmaps from {dataset_path}")
-            
-            for _, row in df.iterrows():
-                roadmap_doc = {
-                    "csv_id": int(row['id']),
-                    "title": row['goal'],
-                    "goal": row['goal'],
-                    "domain": row['domain'],
-                    "roadmap_text": row['roadmap'],
-                    "steps": parse_roadmap_steps(row['roadmap']),
-                    "created_at": datetime.now(),
-                    "source": "csv_import",
-                    # Enhanced metadata
-                    "difficulty": row.get('difficulty', 'Intermediate'),
-                    "estimated_hours": row.get('estimated_hours', 300),
-                    "prerequisites": row.get('prerequisites', ''),
-                    "learning_outcomes": row.get('learning_outcomes', ''),
-                    "dataset_source": dataset_path
-                }
-                all_roadmaps.append(roadmap_doc)
-                
-        except FileNotFoundError:
-            print(f"Dataset not found: {dataset_path}")
-        except Exception as e:
-            print(f"Error loading {dataset_path}: {e}")
-    
-    return all_roadmaps
-
-# Load and store roadmap data
-try:
-    # Check if we need to load data
-    existing_count = roadmap_collection.count_documents({"source": "csv_import"})
-    
-    if existing_count == 0:
-        print("Loading roadmap datasets...")
-        all_roadmaps = load_roadmap_datasets()
-        
-        if all_roadmaps:
-            roadmap_collection.insert_many(all_roadmaps)
-            print(f"Stored {len(all_roadmaps)} roadmaps in MongoDB from all datasets")
-        else:
-            print("No roadmap data loaded")
-    else:
-        print(f"MongoDB already contains {existing_count} roadmaps from datasets")
-        
-except Exception as e:
-    print(f"Error loading roadmap datasets: {e}")
+metrics.install(app)
 
 # Pydantic models
 class RoadmapRequest(BaseModel):
@@ -127,29 +173,15 @@ class DomainResponse(BaseModel):
 
 class UserRoadmapsResponse(BaseModel):
     roadmaps: List[dict]
+    next_cursor: Optional[str] = None
 
-# MongoDB is used for storage instead of in-memory
+class SkillPathRequest(BaseModel):
+    goal: Optional[str] = None
+    domain: Optional[str] = None
+    target_skills: Optional[List[str]] = None
+    completed_skills: List[str] = []
 
-def parse_roadmap_steps(roadmap_text: str) -> List[dict]:
-    """Parse roadmap text into structured steps"""
-    steps = []
-    
-    # Split by | to get main categories
-    categories = roadmap_text.split(' | ')
-    
-    for category in categories:
-        if ':' in category:
-            category_name, skills_text = category.split(':', 1)
-            category_name = category_name.strip()
-            # Split skills by semicolon and clean them up
-            skills = [skill.strip() for skill in skills_text.split(';') if skill.strip()]
-            
-            steps.append({
-                "category": category_name,
-                "skills": skills
-            })
-    
-    return steps
+# MongoDB is used for storage instead of in-memory
 
 def calculate_semantic_similarity(text1: str, text2: str) -> float:
     """Calculate semantic similarity between two texts using simple word overlap"""
@@ -164,153 +196,169 @@ def calculate_semantic_similarity(text1: str, text2: str) -> float:
     
     return len(intersection) / len(union) if union else 0.0
 
+# Comprehensive keyword mappings
+KEYWORD_MAPPINGS = {
+    'frontend': ['frontend', 'front-end', 'ui', 'ux', 'react', 'vue', 'angular', 'javascript', 'css', 'html', 'web design', 'client-side', 'browser', 'svelte', 'next.js'],
+    'backend': ['backend', 'back-end', 'server', 'api', 'node', 'python', 'java', 'php', 'ruby', 'go', 'server-side', 'database', 'express', 'fastapi', 'django', 'flask'],
+    'fullstack': ['fullstack', 'full-stack', 'full stack', 'mern', 'mean', 'lamp', 'end-to-end', 'complete', 'full', 'stack'],
+    'data': ['data', 'analytics', 'science', 'scientist', 'analysis', 'machine learning', 'ai', 'ml', 'statistics', 'big data', 'visualization', 'analyst', 'engineer'],
+    'devops': ['devops', 'dev ops', 'deployment', 'ci/cd', 'docker', 'kubernetes', 'aws', 'cloud', 'infrastructure', 'automation', 'sre', 'reliability', 'terraform', 'ansible'],
+    'mobile': ['mobile', 'ios', 'android', 'react native', 'flutter', 'swift', 'kotlin', 'app development', 'smartphone', 'app', 'native'],
+    'python': ['python', 'django', 'flask', 'fastapi', 'pandas', 'numpy', 'data science', 'automation', 'scripting', 'py'],
+    'javascript': ['javascript', 'js', 'node', 'react', 'vue', 'angular', 'typescript', 'es6', 'web development', 'nodejs', 'ts'],
+    'java': ['java', 'spring', 'hibernate', 'maven', 'gradle', 'enterprise', 'jvm', 'android'],
+    'web': ['web', 'website', 'web development', 'html', 'css', 'javascript', 'responsive', 'progressive', 'internet'],
+    'cybersecurity': ['security', 'cybersecurity', 'ethical hacking', 'penetration testing', 'vulnerability', 'encryption', 'infosec', 'cyber', 'hacking', 'pentesting'],
+    'blockchain': ['blockchain', 'cryptocurrency', 'bitcoin', 'ethereum', 'smart contracts', 'defi', 'web3', 'crypto', 'solidity', 'nft'],
+    'game': ['game', 'gaming', 'unity', 'unreal', 'gamedev', 'interactive', 'entertainment', '3d', '2d'],
+    'cloud': ['cloud', 'aws', 'azure', 'gcp', 'serverless', 'microservices', 'scalability', 'google cloud', 'amazon web services'],
+    'design': ['design', 'ui', 'ux', 'user experience', 'user interface', 'visual', 'graphic', 'prototype', 'figma', 'sketch', 'designer'],
+    'qa': ['qa', 'quality assurance', 'testing', 'test automation', 'selenium', 'cypress', 'tester', 'quality'],
+    'ai': ['ai', 'artificial intelligence', 'machine learning', 'deep learning', 'ml', 'neural network', 'nlp', 'computer vision'],
+    'database': ['database', 'sql', 'mysql', 'postgresql', 'mongodb', 'nosql', 'db', 'data storage'],
+    'product': ['product', 'product manager', 'pm', 'product management', 'product owner'],
+    'marketing': ['marketing', 'digital marketing', 'seo', 'sem', 'social media', 'content marketing', 'email marketing'],
+    'ios': ['ios', 'swift', 'swiftui', 'xcode', 'iphone', 'ipad', 'apple'],
+    'android': ['android', 'kotlin', 'java', 'android studio', 'google play']
+}
+
+# Experience level mappings
+EXPERIENCE_KEYWORDS = {
+    'beginner': ['beginner', 'start', 'learn', 'basic', 'introduction', 'fundamentals'],
+    'intermediate': ['intermediate', 'advance', 'improve', 'enhance', 'develop'],
+    'advanced': ['advanced', 'expert', 'master', 'professional', 'senior', 'architect']
+}
+
+def score_roadmap(roadmap: dict, goal_lower: str, domain: Optional[str] = None) -> float:
+    """Relevance of a catalog roadmap to a goal; higher is better"""
+    score = 0
+    roadmap_goal = roadmap['goal'].lower()
+    roadmap_domain = roadmap['domain'].lower()
+    roadmap_text = roadmap.get('roadmap_text', '').lower()
+
+    # 1. Exact goal match (highest priority)
+    if goal_lower == roadmap_goal:
+        score += 100  # Perfect match
+    elif goal_lower in roadmap_goal:
+        score += 50
+    elif roadmap_goal in goal_lower:
+        score += 40
+
+    # 2. Semantic similarity (word overlap)
+    semantic_score = calculate_semantic_similarity(goal_lower, roadmap_goal)
+    score += semantic_score * 30
+
+    # 3. Domain matching (very important)
+    if domain:
+        domain_lower = domain.lower()
+        if domain_lower == roadmap_domain:
+            score += 35
+        elif domain_lower in roadmap_domain:
+            score += 20
+        elif roadmap_domain in domain_lower:
+            score += 15
+
+    # 4. Enhanced keyword category matching
+    goal_words = set(goal_lower.split())
+    roadmap_goal_words = set(roadmap_goal.split())
+
+    # Direct word overlap bonus
+    word_overlap = goal_words.intersection(roadmap_goal_words)
+    score += len(word_overlap) * 8
+
+    for word in goal_words:
+        # Category keyword matching with stronger weights
+        for category, keywords in KEYWORD_MAPPINGS.items():
+            if word in keywords:
+                # Check if category appears in roadmap
+                if category in roadmap_goal:
+                    score += 12
+                elif category in roadmap_domain:
+                    score += 10
+                elif category in roadmap_text:
+                    score += 5
+
+                # Check for exact keyword match
+                for keyword in keywords:
+                    if keyword in roadmap_goal and len(keyword) > 3:
+                        score += 6
+
+    # 5. Experience level matching
+    for level, level_keywords in EXPERIENCE_KEYWORDS.items():
+        goal_has_level = any(kw in goal_lower for kw in level_keywords)
+        roadmap_level = roadmap.get('difficulty', 'Intermediate').lower()
+
+        if goal_has_level and level in roadmap_level:
+            score += 15
+
+    # 6. Role/title matching
+    role_terms = ['developer', 'engineer', 'programmer', 'coder', 'architect', 'specialist', 'designer', 'manager', 'analyst', 'scientist']
+    for term in role_terms:
+        if term in goal_lower and term in roadmap_goal:
+            score += 8
+
+    # 7. Technology/framework specific matching
+    goal_technologies = []
+    for category, keywords in KEYWORD_MAPPINGS.items():
+        for keyword in keywords:
+            if keyword in goal_lower and len(keyword) > 3:
+                goal_technologies.append(keyword)
+
+    for tech in goal_technologies:
+        if tech in roadmap_goal or tech in roadmap_domain:
+            score += 10
+        elif tech in roadmap_text:
+            score += 3
+
+    # 8. Penalize poor matches and boost good ones
+    if score < 5:
+        score = score * 0.3  # Heavily penalize very poor matches
+    elif score > 50:
+        score = score * 1.2  # Boost good matches
+
+    return score
+
 def find_best_roadmap(goal: str, domain: Optional[str] = None) -> dict:
-    """Enhanced roadmap matching with semantic analysis and comprehensive scoring"""
+    """Enhanced roadmap matching with semantic analysis and comprehensive scoring
+
+    Only canonical roadmaps are scored first; the near-duplicate variants of
+    the winner (see near_duplicates.py) are scored afterwards, in case one
+    of them matches the goal text better.
+    """
     try:
         # Build MongoDB query with source prioritization
-        query = {"source": "csv_import"}
+        query = {"source": "csv_import", "duplicate_of": None}
         if domain:
             query["domain"] = {"$regex": domain, "$options": "i"}
         
-        # Get all roadmaps from MongoDB
+        # Get all canonical roadmaps from MongoDB
         roadmaps = list(roadmap_collection.find(query))
         
         if not roadmaps:
             # Fallback to all roadmaps if domain filter returns nothing
-            roadmaps = list(roadmap_collection.find({"source": "csv_import"}))
+            roadmaps = list(roadmap_collection.find({"source": "csv_import", "duplicate_of": None}))
         
         if not roadmaps:
             raise HTTPException(status_code=500, detail="No roadmaps available in database")
         
-        # Enhanced keyword mappings with synonyms and related terms
         goal_lower = goal.lower()
         best_match = None
         best_score = 0
         
-        # Comprehensive keyword mappings
-        keyword_mappings = {
-            'frontend': ['frontend', 'front-end', 'ui', 'ux', 'react', 'vue', 'angular', 'javascript', 'css', 'html', 'web design', 'client-side', 'browser', 'svelte', 'next.js'],
-            'backend': ['backend', 'back-end', 'server', 'api', 'node', 'python', 'java', 'php', 'ruby', 'go', 'server-side', 'database', 'express', 'fastapi', 'django', 'flask'],
-            'fullstack': ['fullstack', 'full-stack', 'full stack', 'mern', 'mean', 'lamp', 'end-to-end', 'complete', 'full', 'stack'],
-            'data': ['data', 'analytics', 'science', 'scientist', 'analysis', 'machine learning', 'ai', 'ml', 'statistics', 'big data', 'visualization', 'analyst', 'engineer'],
-            'devops': ['devops', 'dev ops', 'deployment', 'ci/cd', 'docker', 'kubernetes', 'aws', 'cloud', 'infrastructure', 'automation', 'sre', 'reliability', 'terraform', 'ansible'],
-            'mobile': ['mobile', 'ios', 'android', 'react native', 'flutter', 'swift', 'kotlin', 'app development', 'smartphone', 'app', 'native'],
-            'python': ['python', 'django', 'flask', 'fastapi', 'pandas', 'numpy', 'data science', 'automation', 'scripting', 'py'],
-            'javascript': ['javascript', 'js', 'node', 'react', 'vue', 'angular', 'typescript', 'es6', 'web development', 'nodejs', 'ts'],
-            'java': ['java', 'spring', 'hibernate', 'maven', 'gradle', 'enterprise', 'jvm', 'android'],
-            'web': ['web', 'website', 'web development', 'html', 'css', 'javascript', 'responsive', 'progressive', 'internet'],
-            'cybersecurity': ['security', 'cybersecurity', 'ethical hacking', 'penetration testing', 'vulnerability', 'encryption', 'infosec', 'cyber', 'hacking', 'pentesting'],
-            'blockchain': ['blockchain', 'cryptocurrency', 'bitcoin', 'ethereum', 'smart contracts', 'defi', 'web3', 'crypto', 'solidity', 'nft'],
-            'game': ['game', 'gaming', 'unity', 'unreal', 'gamedev', 'interactive', 'entertainment', '3d', '2d'],
-            'cloud': ['cloud', 'aws', 'azure', 'gcp', 'serverless', 'microservices', 'scalability', 'google cloud', 'amazon web services'],
-            'design': ['design', 'ui', 'ux', 'user experience', 'user interface', 'visual', 'graphic', 'prototype', 'figma', 'sketch', 'designer'],
-            'qa': ['qa', 'quality assurance', 'testing', 'test automation', 'selenium', 'cypress', 'tester', 'quality'],
-            'ai': ['ai', 'artificial intelligence', 'machine learning', 'deep learning', 'ml', 'neural network', 'nlp', 'computer vision'],
-            'database': ['database', 'sql', 'mysql', 'postgresql', 'mongodb', 'nosql', 'db', 'data storage'],
-            'product': ['product', 'product manager', 'pm', 'product management', 'product owner'],
-            'marketing': ['marketing', 'digital marketing', 'seo', 'sem', 'social media', 'content marketing', 'email marketing'],
-            'ios': ['ios', 'swift', 'swiftui', 'xcode', 'iphone', 'ipad', 'apple'],
-            'android': ['android', 'kotlin', 'java', 'android studio', 'google play']
-        }
-        
-        # Experience level mappings
-        experience_keywords = {
-            'beginner': ['beginner', 'start', 'learn', 'basic', 'introduction', 'fundamentals'],
-            'intermediate': ['intermediate', 'advance', 'improve', 'enhance', 'develop'],
-            'advanced': ['advanced', 'expert', 'master', 'professional', 'senior', 'architect']
-        }
-        
         for roadmap in roadmaps:
-            score = 0
-            roadmap_goal = roadmap['goal'].lower()
-            roadmap_domain = roadmap['domain'].lower()
-            roadmap_text = roadmap.get('roadmap_text', '').lower()
-            
-            # 1. Exact goal match (highest priority)
-            if goal_lower == roadmap_goal:
-                score += 100  # Perfect match
-            elif goal_lower in roadmap_goal:
-                score += 50
-            elif roadmap_goal in goal_lower:
-                score += 40
-            
-            # 2. Semantic similarity (word overlap)
-            semantic_score = calculate_semantic_similarity(goal_lower, roadmap_goal)
-            score += semantic_score * 30
-            
-            # 3. Domain matching (very important)
-            if domain:
-                domain_lower = domain.lower()
-                if domain_lower == roadmap_domain:
-                    score += 35
-                elif domain_lower in roadmap_domain:
-                    score += 20
-                elif roadmap_domain in domain_lower:
-                    score += 15
-            
-            # 4. Enhanced keyword category matching
-            goal_words = set(goal_lower.split())
-            roadmap_goal_words = set(roadmap_goal.split())
-            
-            # Direct word overlap bonus
-            word_overlap = goal_words.intersection(roadmap_goal_words)
-            score += len(word_overlap) * 8
-            
-            for word in goal_words:
-                # Category keyword matching with stronger weights
-                for category, keywords in keyword_mappings.items():
-                    if word in keywords:
-                        # Check if category appears in roadmap
-                        if category in roadmap_goal:
-                            score += 12
-                        elif category in roadmap_domain:
-                            score += 10
-                        elif category in roadmap_text:
-                            score += 5
-                        
-                        # Check for exact keyword match
-                        for keyword in keywords:
-                            if keyword in roadmap_goal and len(keyword) > 3:
-                                score += 6
-            
-            # 5. Experience level matching
-            for level, level_keywords in experience_keywords.items():
-                goal_has_level = any(kw in goal_lower for kw in level_keywords)
-                roadmap_level = roadmap.get('difficulty', 'Intermediate').lower()
-                
-                if goal_has_level and level in roadmap_level:
-                    score += 15
-            
-            # 6. Role/title matching
-            role_terms = ['developer', 'engineer', 'programmer', 'coder', 'architect', 'specialist', 'designer', 'manager', 'analyst', 'scientist']
-            for term in role_terms:
-                if term in goal_lower and term in roadmap_goal:
-                    score += 8
-            
-            # 7. Technology/framework specific matching
-            goal_technologies = []
-            for category, keywords in keyword_mappings.items():
-                for keyword in keywords:
-                    if keyword in goal_lower and len(keyword) > 3:
-                        goal_technologies.append(keyword)
-            
-            for tech in goal_technologies:
-                if tech in roadmap_goal or tech in roadmap_domain:
-                    score += 10
-                elif tech in roadmap_text:
-                    score += 3
-            
-            # 8. Penalize poor matches and boost good ones
-            if score < 5:
-                score = score * 0.3  # Heavily penalize very poor matches
-            elif score > 50:
-                score = score * 1.2  # Boost good matches
-            
-            # Track best match
+            score = score_roadmap(roadmap, goal_lower, domain)
             if score > best_score:
                 best_score = score
                 best_match = roadmap
         
+        # Expand the winning cluster
+        if best_match is not None and best_match.get('variant_ids'):
+            for variant in roadmap_collection.find({"_id": {"$in": best_match['variant_ids']}}):
+                score = score_roadmap(variant, goal_lower, domain)
+                if score > best_score:
+                    best_score = score
+                    best_match = variant
+        
         # Enhanced fallback strategy
         if best_match is None or best_score < 10:
             # Try to find a general match by domain
@@ -323,13 +371,90 @@ def find_best_roadmap(goal: str, domain: Optional[str] = None) -> dict:
             else:
                 best_match = roadmaps[0]
         
-        print(f"Best match for '{goal}': {best_match['goal']} (score: {best_score})")
         return best_match
         
     except Exception as e:
         print(f"Error finding roadmap in MongoDB: {e}")
         raise HTTPException(status_code=500, detail=f"Error finding roadmap: {str(e)}")
 
+def match_roadmap(goal: str, domain: Optional[str] = None) -> dict:
+    """Best matching catalog roadmap for a goal, served from the result cache when possible.
+
+    Matching runs on the canonical goal so every spelling that folds to the
+    same key gets the same roadmap, whichever one filled the cache first.
+    """
+    canonical_goal = canonicalize_goal(goal)
+    key = (canonical_goal, canonicalize_domain(domain))
+    best_match = result_cache.get(key)
+    if best_match is None:
+        best_match = find_best_roadmap(canonical_goal or goal, domain)
+        result_cache.put(key, best_match)
+    return best_match
+
+# Skill precedence graph over the catalog; rebuilt when the catalog version changes
+skill_graph = None
+
+def get_skill_graph() -> SkillGraph:
+    global skill_graph
+    version = result_cache.current_version()
+    if skill_graph is None or skill_graph.version != version:
+        min_support = int(os.getenv("SKILL_GRAPH_MIN_SUPPORT", "2"))
+        # The artifact's skill tokens stand in for the documents only if it is what they were seeded from
+        if artifact is not None and seeded_artifact(db) == artifact.version:
+            skill_graph = SkillGraph.from_artifact(artifact, min_support=min_support, version=version)
+        else:
+            roadmaps = roadmap_collection.find({"source": "csv_import"}, {"steps": 1})
+            skill_graph = SkillGraph.build(roadmaps, min_support=min_support, version=version)
+        print(f"Built skill graph: {len(skill_graph)} skills, {skill_graph.edge_count} edges")
+    return skill_graph
+
+def build_skill_graph():
+    try:
+        get_skill_graph()
+    except Exception as e:
+        print(f"Could not build skill graph: {e}")
+
+def save_user_roadmap(user_id: str, goal: str, domain: str, steps: List[dict],
+                      base_roadmap_id, roadmap_id: str) -> dict:
+    """Create or refresh a user's roadmap for a goal in one round-trip.
+
+    The unique (user_id, goal, source) index makes concurrent identical
+    requests converge on a single document; roadmap_id and created_at are
+    only set on insert and generation_count counts every generation.
+    """
+    now = datetime.now()
+    update = {
+        "$set": {
+            "title": goal,
+            "domain": domain,
+            "steps": steps,
+            "updated_at": now,
+            "base_roadmap_id": base_roadmap_id
+        },
+        "$setOnInsert": {
+            "roadmap_id": roadmap_id,
+            "created_at": now
+        },
+        "$inc": {"generation_count": 1}
+    }
+    query = {"user_id": user_id, "goal": goal, "source": "user_generated"}
+    try:
+        saved = roadmap_collection.find_one_and_update(
+            query, update, upsert=True,
+            projection={"roadmap_id": 1, "generation_count": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if saved["generation_count"] == 1:
+            generated_count.add(1)
+        return saved
+    except DuplicateKeyError:
+        # Lost an insert race the server didn't retry; the document exists now
+        return roadmap_collection.find_one_and_update(
+            query, update,
+            projection={"roadmap_id": 1, "generation_count": 1},
+            return_document=ReturnDocument.AFTER
+        )
+
 @app.get("/")
 async def root():
     return {"message": "Roadmap Generator API is running"}
@@ -338,8 +463,8 @@ async def root():
 async def generate_roadmap(request: RoadmapRequest):
     """Generate a roadmap based on goal and domain and store/update in MongoDB"""
     try:
-        # Find best matching roadmap from MongoDB with scoring
-        best_match = find_best_roadmap(request.goal, request.domain)
+        # Find best matching roadmap (cached per canonical goal and domain)
+        best_match = match_roadmap(request.goal, request.domain)
         
         # Use pre-parsed steps from MongoDB
         steps = best_match.get('steps', [])
@@ -347,14 +472,6 @@ async def generate_roadmap(request: RoadmapRequest):
         # Calculate match score for transparency
         match_score = calculate_semantic_similarity(request.goal.lower(), best_match['goal'].lower())
         
-        # Debug logging
-        print(f"Generated roadmap for goal: '{request.goal}'")
-        print(f"Matched domain: {best_match['domain']}")
-        print(f"Match score: {match_score:.2f}")
-        print(f"Number of steps: {len(steps)}")
-        for i, step in enumerate(steps):
-            print(f"Step {i+1}: {step['category']} - {len(step['skills'])} skills")
-        
         # Create response with enhanced metadata
         roadmap_id = f"roadmap_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{random.randint(1000, 9999)}"
         
@@ -373,67 +490,30 @@ async def generate_roadmap(request: RoadmapRequest):
         )
         
         # Store/Update roadmap in MongoDB
-        roadmap_doc = {
-            "roadmap_id": roadmap_id,
-            "title": request.goal,  # Add explicit title field
-            "goal": request.goal,
-            "domain": best_match['domain'],
-            "steps": steps,
-            "created_at": datetime.now(),
-            "updated_at": datetime.now(),
-            "source": "user_generated",
-            "user_id": request.user_id,
-            "base_roadmap_id": best_match.get('_id'),  # Reference to original roadmap
-            "generation_count": 1
-        }
-        
-        # Check if user already has a roadmap for this goal
         if request.user_id:
-            existing_roadmap = roadmap_collection.find_one({
-                "user_id": request.user_id,
-                "goal": request.goal,
-                "source": "user_generated"
-            })
-            
-            if existing_roadmap:
-                # Update existing roadmap
-                roadmap_doc["generation_count"] = existing_roadmap.get("generation_count", 1) + 1
-                roadmap_doc["roadmap_id"] = existing_roadmap["roadmap_id"]  # Keep same ID
-                roadmap_doc["created_at"] = existing_roadmap["created_at"]  # Keep original creation date
-                
-                result = roadmap_collection.update_one(
-                    {
-                        "user_id": request.user_id,
-                        "goal": request.goal,
-                        "source": "user_generated"
-                    },
-                    {
-                        "$set": {
-                            "title": request.goal,  # Update title field
-                            "domain": best_match['domain'],
-                            "steps": steps,
-                            "updated_at": datetime.now(),
-                            "generation_count": roadmap_doc["generation_count"],
-                            "base_roadmap_id": best_match.get('_id')
-                        }
-                    }
-                )
-                
-                if result.modified_count > 0:
-                    print(f"Updated existing roadmap for user {request.user_id} (generation #{roadmap_doc['generation_count']})")
-                else:
-                    print(f"No changes made to roadmap for user {request.user_id}")
-                
-                # Update response with existing roadmap ID
-                response.id = existing_roadmap["roadmap_id"]
-            else:
-                # Insert new roadmap
-                roadmap_collection.insert_one(roadmap_doc)
-                print(f"Created new roadmap for user {request.user_id}")
+            saved = save_user_roadmap(
+                request.user_id, request.goal, best_match['domain'], steps,
+                best_match.get('_id'), roadmap_id
+            )
+            # Keep the ID of the user's existing roadmap for this goal
+            response.id = saved["roadmap_id"]
         else:
             # Insert new roadmap without user_id
-            roadmap_collection.insert_one(roadmap_doc)
-            print(f"Created new roadmap (no user)")
+            now = datetime.now()
+            roadmap_collection.insert_one({
+                "roadmap_id": roadmap_id,
+                "title": request.goal,  # Add explicit title field
+                "goal": request.goal,
+                "domain": best_match['domain'],
+                "steps": steps,
+                "created_at": now,
+                "updated_at": now,
+                "source": "user_generated",
+                "user_id": None,
+                "base_roadmap_id": best_match.get('_id'),  # Reference to original roadmap
+                "generation_count": 1
+            })
+            generated_count.add(1)
         
         return response
         
@@ -441,6 +521,33 @@ async def generate_roadmap(request: RoadmapRequest):
         print(f"Error generating roadmap: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error generating roadmap: {str(e)}")
 
+@app.post("/api/roadmap/skill-path")
+async def get_skill_path(request: SkillPathRequest):
+    """Skills still to learn for a goal, in prerequisite order, given the skills already completed.
+
+    Targets are target_skills when given, otherwise every skill of the
+    roadmap that matches the goal.
+    """
+    if request.target_skills:
+        targets = request.target_skills
+        goal = request.goal
+    elif request.goal:
+        best_match = match_roadmap(request.goal, request.domain)
+        targets = [skill for step in best_match.get("steps", []) for skill in step.get("skills", [])]
+        goal = best_match["goal"]
+    else:
+        raise HTTPException(status_code=400, detail="Provide a goal or target_skills")
+    try:
+        return {"goal": goal, **get_skill_graph().remaining_path(targets, request.completed_skills)}
+    except Exception as e:
+        print(f"Error computing skill path: {e}")
+        raise HTTPException(status_code=500, detail=f"Error computing skill path: {str(e)}")
+
+@app.get("/api/roadmap/skill-graph")
+async def get_skill_graph_stats():
+    """Size of the skill precedence graph"""
+    return get_skill_graph().stats()
+
 @app.get("/api/roadmap/roadmaps/domains", response_model=DomainResponse)
 async def get_available_domains():
     """Get list of available domains from MongoDB"""
@@ -457,7 +564,7 @@ async def get_similar_roadmaps(goal: str, domain: Optional[str] = None, limit: i
     """Get similar roadmaps based on goal from MongoDB"""
     try:
         # Build MongoDB query
-        query = {}
+        query = {"duplicate_of": None}  # one result per cluster of near-duplicate variants
         if domain:
             query["domain"] = {"$regex": domain, "$options": "i"}
         
@@ -482,8 +589,9 @@ async def get_similar_roadmaps(goal: str, domain: Optional[str] = None, limit: i
                     score += 1
             
             if score > 0:
-                # Convert MongoDB document to dict and remove _id
-                roadmap_dict = {k: v for k, v in roadmap.items() if k != '_id'}
+                # Convert MongoDB document to dict and remove _id and cluster links
+                roadmap_dict = {k: v for k, v in roadmap.items() if k not in ('_id', 'variant_ids')}
+                roadmap_dict['variant_count'] = len(roadmap.get('variant_ids', []))
                 scored_roadmaps.append((score, roadmap_dict))
         
         # Sort by score and return top results
@@ -564,76 +672,83 @@ async def get_roadmap_recommendations(
         print(f"Error getting roadmap recommendations: {e}")
         raise HTTPException(status_code=500, detail=f"Error getting recommendations: {str(e)}")
 
+def serialize_user_roadmap(roadmap: dict) -> dict:
+    """API shape of a saved roadmap; steps are left out when the projection skipped them"""
+    roadmap_dict = {
+        "_id": str(roadmap["_id"]),
+        "id": roadmap["roadmap_id"],
+        "title": roadmap.get("title", roadmap["goal"]),  # Use title field, fallback to goal
+        "goal": roadmap["goal"],
+        "domain": roadmap["domain"],
+        "created_at": roadmap["created_at"].isoformat(),
+        "updated_at": roadmap.get("updated_at", roadmap["created_at"]).isoformat(),
+        "generation_count": roadmap.get("generation_count", 1)
+    }
+    if "steps" in roadmap:
+        roadmap_dict["steps"] = roadmap["steps"]
+    return roadmap_dict
+
 @app.get("/api/roadmap/roadmaps/user/{user_id}", response_model=UserRoadmapsResponse)
-async def get_user_roadmaps(user_id: str):
-    """Get saved roadmaps for a user from MongoDB"""
+async def get_user_roadmaps(user_id: str, limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+                            cursor: Optional[str] = None,
+                            include_steps: bool = True):
+    """Get saved roadmaps for a user from MongoDB, most recently modified first.
+
+    Without limit every roadmap is returned; with limit the response carries
+    next_cursor for the following page. include_steps=false omits the steps.
+    """
+    projection = None if include_steps else SUMMARY_PROJECTION
+    query = {"user_id": user_id, "source": "user_generated"}
     try:
-        # Get user roadmaps from MongoDB
-        user_roadmaps = list(roadmap_collection.find(
-            {"user_id": user_id, "source": "user_generated"}
-        ).sort("updated_at", -1))  # Sort by updated_at to show most recently modified first
-        
-        # Convert MongoDB documents to dict format
-        roadmaps = []
-        for roadmap in user_roadmaps:
-            roadmap_dict = {
-                "_id": str(roadmap["_id"]),
-                "id": roadmap["roadmap_id"],
-                "title": roadmap.get("title", roadmap["goal"]),  # Use title field, fallback to goal
-                "goal": roadmap["goal"],
-                "domain": roadmap["domain"],
-                "steps": roadmap["steps"],
-                "created_at": roadmap["created_at"].isoformat(),
-                "updated_at": roadmap.get("updated_at", roadmap["created_at"]).isoformat(),
-                "generation_count": roadmap.get("generation_count", 1)
-            }
-            roadmaps.append(roadmap_dict)
-        
-        return UserRoadmapsResponse(roadmaps=roadmaps)
-        
+        if limit:
+            user_roadmaps, next_cursor = fetch_page(roadmap_collection, query, limit, cursor, projection)
+        else:
+            user_roadmaps = list(roadmap_collection.find(after_cursor(query, cursor), projection).sort(LISTING_SORT))
+            next_cursor = None
+        return UserRoadmapsResponse(
+            roadmaps=[serialize_user_roadmap(roadmap) for roadmap in user_roadmaps],
+            next_cursor=next_cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"Error getting user roadmaps: {e}")
         return UserRoadmapsResponse(roadmaps=[])
 
 @app.get("/api/roadmap/roadmaps/all")
-async def get_all_generated_roadmaps(limit: int = 50, skip: int = 0):
-    """Get all generated roadmaps from MongoDB"""
+async def get_all_generated_roadmaps(limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE), skip: int = Query(0, ge=0),
+                                     cursor: Optional[str] = None,
+                                     include_steps: bool = True):
+    """Get all generated roadmaps from MongoDB, most recently modified first.
+
+    Pass the returned next_cursor to fetch the following page; skip is still
+    accepted for old clients but gets slower with page depth.
+    """
+    projection = None if include_steps else SUMMARY_PROJECTION
+    query = {"source": "user_generated"}
     try:
-        # Get all user-generated roadmaps
-        roadmaps = list(roadmap_collection.find(
-            {"source": "user_generated"}
-        ).sort("updated_at", -1).skip(skip).limit(limit))
-        
-        # Convert MongoDB documents to dict format
+        roadmaps, next_cursor = fetch_page(roadmap_collection, query, limit, cursor, projection,
+                                           skip=0 if cursor else skip)
+
         roadmap_list = []
         for roadmap in roadmaps:
-            roadmap_dict = {
-                "_id": str(roadmap["_id"]),
-                "id": roadmap["roadmap_id"],
-                "title": roadmap.get("title", roadmap["goal"]),  # Use title field, fallback to goal
-                "goal": roadmap["goal"],
-                "domain": roadmap["domain"],
-                "steps": roadmap["steps"],
-                "created_at": roadmap["created_at"].isoformat(),
-                "updated_at": roadmap.get("updated_at", roadmap["created_at"]).isoformat(),
-                "generation_count": roadmap.get("generation_count", 1),
-                "user_id": roadmap.get("user_id")
-            }
+            roadmap_dict = serialize_user_roadmap(roadmap)
+            roadmap_dict["user_id"] = roadmap.get("user_id")
             roadmap_list.append(roadmap_dict)
-        
-        # Get total count
-        total_count = roadmap_collection.count_documents({"source": "user_generated"})
-        
+
         return {
             "roadmaps": roadmap_list,
-            "total": total_count,
+            "total": generated_count.get(),
             "limit": limit,
-            "skip": skip
+            "skip": skip,
+            "next_cursor": next_cursor
         }
-        
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"Error getting all roadmaps: {e}")
-        return {"roadmaps": [], "total": 0, "limit": limit, "skip": skip}
+        return {"roadmaps": [], "total": 0, "limit": limit, "skip": skip, "next_cursor": None}
 
 @app.get("/api/roadmap/resources/domain/{domain}")
 async def get_resources_by_domain(domain: str):
@@ -697,6 +812,22 @@ async def get_all_skills():
         print(f"Error getting all skills: {e}")
         raise HTTPException(status_code=500, detail=f"Error getting all skills: {str(e)}")
 
+@app.get("/api/roadmap/admin/cache")
+async def get_cache_stats():
+    """Hit ratio and size of the generated-roadmap result cache"""
+    return result_cache.stats()
+
+@app.post("/api/roadmap/admin/cache/invalidate")
+async def invalidate_cache():
+    """Drop all cached matches"""
+    result_cache.invalidate()
+    return {"message": "Roadmap cache cleared", **result_cache.stats()}
+
+@app.post("/api/roadmap/admin/roadmaps/count/reconcile")
+async def reconcile_generated_count():
+    """Recount generated roadmaps, e.g. after deleting some directly in MongoDB"""
+    return {"total": generated_count.reconcile()}
+
 @app.delete("/api/roadmap/roadmaps/{roadmap_id}")
 async def delete_roadmap(roadmap_id: str, user_id: str):
     """Delete a saved roadmap from MongoDB"""
@@ -710,6 +841,7 @@ async def delete_roadmap(roadmap_id: str, user_id: str):
         
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Roadmap not found")
+        generated_count.add(-1)
         
         return {"message": "Roadmap deleted successfully"}
         
@@ -719,5 +851,29 @@ async def delete_roadmap(roadmap_id: str, user_id: str):
         print(f"Error deleting roadmap: {e}")
         raise HTTPException(status_code=500, detail=f"Error deleting roadmap: {str(e)}")
 
+def preload_catalogs():
+    """Map the artifact, seed and build the skill graph in the pre-fork master, then drop its connection.
+
+    Workers inherit the mapping and the graph and open their own client in
+    the lifespan; a client must not be shared across a fork.
+    """
+    open_artifact()
+    connect_mongo()
+    seed_catalog()
+    build_skill_graph()
+    close_mongo()
+
+# The pre-fork master's catalog version reader, on a client opened once and kept.
+# It is not the workers' client: they open their own in the lifespan.
+_master_versions = None
+
+def catalog_version():
+    global _master_versions
+    if _master_versions is None:
+        _master_versions = RoadmapResultCache(MongoClient(MONGODB_URL)[DATABASE_NAME], max_size=0, version_ttl=0)
+    return _master_versions.current_version()
+
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # WEB_CONCURRENCY > 1 forks workers that share the artifact mapping and skill graph built here
+    serve(app, host="0.0.0.0", port=int(os.getenv("PORT", "8000")),
+          preload=preload_catalogs, dataset_version=catalog_version)
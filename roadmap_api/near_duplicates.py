@@ -0,0 +1,139 @@
+"""
+Near-duplicate detection for catalog roadmaps
+The cross-domain dataset holds many "Path Variant N" rows that are
+reshuffles of the same skills. Each roadmap's skill set gets a MinHash
+signature; LSH banding proposes candidate pairs, which are confirmed with
+the exact Jaccard similarity and merged with union-find.
+
+assign_clusters() stores the result on the csv_import documents:
+  canonical roadmap:  variant_ids = [_id of every other member]
+  other members:      duplicate_of = _id of the canonical roadmap
+Roadmaps without duplicate_of are the ones the matchers score first.
+
+Only roadmaps with the same domain and the same title (ignoring the
+"Path Variant N" suffix) are merged: the dataset reuses one skill set for
+several job titles, and the matchers need every title.
+"""
+import hashlib
+import re
+from collections import defaultdict
+from typing import Dict, List, Sequence, Set
+
+import numpy as np
+from pymongo import UpdateOne
+
+from skill_graph import skill_key
+
+NUM_PERM = 128
+BANDS = 16  # 16 bands x 8 rows: pairs above ~0.7 Jaccard almost always collide
+ROWS = NUM_PERM // BANDS
+JACCARD_THRESHOLD = 0.8
+_PRIME = (1 << 31) - 1
+
+_rng = np.random.default_rng(20240601)
+_A = _rng.integers(1, _PRIME, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, size=NUM_PERM, dtype=np.uint64)
+
+
+def variant_base(goal: str) -> str:
+    """Roadmap title without its "- Path Variant N" suffix"""
+    return re.sub(r'\s*-\s*path variant\s*\d+\s*$', '', goal, flags=re.IGNORECASE).strip().lower()
+
+
+def roadmap_skill_set(roadmap: dict) -> Set[str]:
+    return {skill_key(skill) for step in roadmap.get("steps", []) for skill in step.get("skills", []) if skill.strip()}
+
+
+def minhash_signature(items: Set[str]) -> np.ndarray:
+    """NUM_PERM minimum hash values of the set under (a*x + b) mod p"""
+    if not items:
+        return np.full(NUM_PERM, _PRIME, dtype=np.uint64)
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(item.encode(), digest_size=4).digest(), "little") for item in items],
+        dtype=np.uint64
+    )
+    return ((_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME).min(axis=1)
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def find_clusters(skill_sets: Sequence[Set[str]], groups: Sequence = None,
+                  threshold: float = JACCARD_THRESHOLD) -> List[List[int]]:
+    """Clusters of near-duplicate sets as lists of indices, singletons included.
+
+    When groups is given, only sets with the same group key are merged.
+    Each cluster is sorted, so its first index is the earliest roadmap.
+    """
+    parent = list(range(len(skill_sets)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    signatures = np.stack([minhash_signature(s) for s in skill_sets]) if skill_sets else np.zeros((0, NUM_PERM))
+    checked = set()
+    for band in range(BANDS):
+        buckets = defaultdict(list)
+        for i, row in enumerate(signatures[:, band * ROWS:(band + 1) * ROWS]):
+            buckets[row.tobytes()].append(i)
+        for members in buckets.values():
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    i, j = members[x], members[y]
+                    if (i, j) in checked:
+                        continue
+                    checked.add((i, j))
+                    if groups is not None and groups[i] != groups[j]:
+                        continue
+                    if find(i) != find(j) and jaccard(skill_sets[i], skill_sets[j]) >= threshold:
+                        parent[max(find(i), find(j))] = min(find(i), find(j))
+
+    clusters = defaultdict(list)
+    for i in range(len(skill_sets)):
+        clusters[find(i)].append(i)
+    return sorted(clusters.values())
+
+
+def link_clusters(collection, ids: Sequence, canonical: Sequence[int]):
+    """Store cluster links for documents ids[i], whose representative is ids[canonical[i]]"""
+    variants = defaultdict(list)
+    for i, c in enumerate(canonical):
+        if i != c:
+            variants[int(c)].append(ids[i])
+
+    updates = []
+    for i, c in enumerate(canonical):
+        if i == c:
+            updates.append(UpdateOne({"_id": ids[i]},
+                                     {"$set": {"variant_ids": variants[i]}, "$unset": {"duplicate_of": ""}}))
+        else:
+            updates.append(UpdateOne({"_id": ids[i]},
+                                     {"$set": {"duplicate_of": ids[int(c)]}, "$unset": {"variant_ids": ""}}))
+    if updates:
+        collection.bulk_write(updates, ordered=False)
+
+
+def assign_clusters(collection) -> Dict:
+    """Cluster the csv_import roadmaps and record canonical/variant links on them"""
+    roadmaps = list(collection.find({"source": "csv_import"}, {"steps": 1, "domain": 1, "goal": 1}).sort("_id", 1))
+    clusters = find_clusters(
+        [roadmap_skill_set(r) for r in roadmaps],
+        groups=[(r.get("domain", "").lower(), variant_base(r.get("goal", ""))) for r in roadmaps]
+    )
+
+    canonical = list(range(len(roadmaps)))
+    for cluster in clusters:
+        for i in cluster:
+            canonical[i] = cluster[0]
+    link_clusters(collection, [r["_id"] for r in roadmaps], canonical)
+
+    return {
+        "roadmaps": len(roadmaps),
+        "clusters": len(clusters),
+        "collapsed": len(roadmaps) - len(clusters),
+        "largest_cluster": max((len(c) for c in clusters), default=0)
+    }
@@ -0,0 +1,155 @@
+"""
+LRU cache for generated-roadmap matches
+Keyed by a canonicalized goal and domain and tied to the catalog version,
+so a dataset reload invalidates every cached match
+"""
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+from pymongo import ReturnDocument
+
+CATALOG_META_ID = "roadmap_catalog"
+
+# Spellings folded onto the form the CSV goals and keyword mappings use
+GOAL_SYNONYMS = {
+    "fullstack": "full stack",
+    "full-stack": "full stack",
+    "front-end": "frontend",
+    "back-end": "backend",
+    "dev-ops": "devops",
+    "developers": "developer",
+    "engineers": "engineer",
+    "scientists": "scientist",
+    "analysts": "analyst",
+    "designers": "designer",
+    "ml": "machine learning",
+    "k8s": "kubernetes",
+    "nodejs": "node.js",
+    "reactjs": "react",
+    "golang": "go",
+}
+
+# Leading phrases that carry no matching signal
+GOAL_PREFIXES = ("i want to become a ", "i want to become an ", "i want to be a ", "i want to be an ",
+                 "become a ", "become an ")
+
+
+def canonicalize_goal(goal: str) -> str:
+    """Fold case, whitespace, edge punctuation and common synonyms.
+
+    Punctuation inside tokens is kept because it is meaningful for
+    technologies ("c++", "c#", "node.js"); only separators and trailing
+    punctuation are removed.
+    """
+    text = goal.lower().strip()
+    text = re.sub(r'[\s_/,;:!?"\']+', ' ', text)
+    tokens = []
+    for token in text.split():
+        token = token.strip('.-()[]')
+        if token:
+            tokens.append(GOAL_SYNONYMS.get(token, token))
+    text = ' '.join(tokens)
+    for prefix in GOAL_PREFIXES:
+        if text.startswith(prefix):
+            text = text[len(prefix):]
+            break
+    return text
+
+
+def canonicalize_domain(domain: Optional[str]) -> str:
+    return re.sub(r'\s+', ' ', domain.lower()).strip() if domain else ""
+
+
+def bump_catalog_version(db, artifact_version: Optional[str] = None) -> int:
+    """Record a dataset reload; every process drops its cached matches on the next check.
+
+    artifact_version names the catalog artifact the roadmaps were seeded
+    from, None when they were loaded some other way (e.g. the reload scripts).
+    """
+    meta = db["catalog_meta"].find_one_and_update(
+        {"_id": CATALOG_META_ID},
+        {"$inc": {"version": 1}, "$set": {"reloaded_at": datetime.now(), "artifact": artifact_version}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return meta["version"]
+
+
+def seeded_artifact(db) -> Optional[str]:
+    """Version of the catalog artifact the current roadmaps came from, if any"""
+    meta = db["catalog_meta"].find_one({"_id": CATALOG_META_ID}, {"artifact": 1})
+    return meta.get("artifact") if meta else None
+
+
+class RoadmapResultCache:
+    """LRU map of (canonical goal, canonical domain) -> best matching catalog roadmap.
+
+    The catalog version is read from MongoDB at most every version_ttl
+    seconds; when it changes the cache is cleared.
+    """
+
+    def __init__(self, db, max_size: int = 2048, version_ttl: float = 5.0):
+        self.db = db
+        self.max_size = max_size
+        self.version_ttl = version_ttl
+        self.version = None
+        self._version_checked_at = 0.0
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _check_version(self):
+        now = time.monotonic()
+        if now - self._version_checked_at < self.version_ttl:
+            return
+        self._version_checked_at = now
+        meta = self.db["catalog_meta"].find_one({"_id": CATALOG_META_ID}, {"version": 1})
+        version = meta["version"] if meta else 0
+        if version != self.version:
+            if self.version is not None:
+                self.invalidations += 1
+            self._entries.clear()
+            self.version = version
+
+    def current_version(self):
+        """Catalog version, re-read from MongoDB at most every version_ttl seconds"""
+        self._check_version()
+        return self.version
+
+    def invalidate(self):
+        """Drop all entries and re-read the catalog version on the next lookup"""
+        self._entries.clear()
+        self._version_checked_at = 0.0
+        self.invalidations += 1
+
+    def get(self, key):
+        self._check_version()
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "catalog_version": self.version
+        }
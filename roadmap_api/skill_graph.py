@@ -0,0 +1,254 @@
+"""
+Skill prerequisite graph derived from the order of roadmap steps
+Every catalog roadmap says "the skills of step i come before the skills of
+step i+1". Counting those transitions over all roadmaps gives a weighted
+precedence graph, stored as CSR arrays with integer skill ids:
+
+  indptr[u]:indptr[u+1]  slice of indices/weights holding u's successors
+  pred_indptr / pred_indices / pred_weights  the same for predecessors
+
+Skill ids are assigned in order of each skill's mean relative position in
+the roadmaps that contain it, and only edges from a lower to a higher id are
+kept. The id order is therefore a topological order and the graph is a DAG
+even when individual roadmaps disagree.
+
+An edge u->v costs -log(w(u,v) / out_weight(u)), precomputed per
+predecessor entry: following the most common continuation is cheap, rare
+detours are expensive. A path query relaxes the target's ancestors once in
+id order, with completed skills as zero-cost sources and every skill still
+to learn costing SKILL_COST, so a completed alternative branch shortens the
+path instead of being ignored.
+"""
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+# Cost of a skill still to learn; large next to edge costs, so fewer skills beats a more common ordering
+SKILL_COST = 10.0
+# Incoming edges kept for a skill with none at min_support
+FALLBACK_EDGES = 3
+
+
+def skill_key(skill: str) -> str:
+    return " ".join(skill.lower().split())
+
+
+class SkillGraph:
+    def __init__(self, names, indptr, indices, weights, pred_indptr, pred_indices, pred_weights,
+                 pred_costs, version=None):
+        self.names = names
+        self.ids = {skill_key(name): i for i, name in enumerate(names)}
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.pred_indptr = pred_indptr
+        self.pred_indices = pred_indices
+        self.pred_weights = pred_weights
+        self.pred_costs = pred_costs
+        self.version = version
+        # Plain lists for the per-query loop, where NumPy's per-call overhead dominates tiny slices
+        self._pred_ptr = pred_indptr.tolist()
+        self._preds = pred_indices.tolist()
+        self._costs = pred_costs.tolist()
+
+    @classmethod
+    def build(cls, roadmaps: Iterable[dict], min_support: int = 2, version=None) -> "SkillGraph":
+        """Build from roadmap documents with parsed steps ([{category, skills}, ...]).
+
+        min_support drops transitions seen in fewer roadmaps, which filters
+        out orderings that only one shuffled variant happens to have. A skill
+        left with no predecessor keeps its FALLBACK_EDGES most frequent
+        incoming edges instead, since most skills appear in too few roadmaps to reach
+        min_support and would otherwise all look like entry skills.
+        """
+        spellings = defaultdict(Counter)
+        tokens = {}
+        token_roadmaps = []
+        for roadmap in roadmaps:
+            steps = []
+            for step in roadmap.get("steps", []):
+                keys = []
+                for raw in step.get("skills", []):
+                    raw = raw.strip()
+                    if raw:
+                        key = skill_key(raw)
+                        spellings[key][raw] += 1
+                        keys.append(tokens.setdefault(key, len(tokens)))
+                if keys:
+                    steps.append(keys)
+            token_roadmaps.append(steps)
+        keys = list(tokens)
+        names = [spellings[key].most_common(1)[0][0] for key in keys]
+        return cls._build(keys, names, token_roadmaps, min_support, version)
+
+    @classmethod
+    def from_artifact(cls, catalog, min_support: int = 2, version=None) -> "SkillGraph":
+        """Build from a catalog artifact's precomputed skill tokens; no string is parsed or keyed"""
+        strings = catalog.strings
+        keys = [strings[i] for i in catalog.token_key.tolist()]
+        names = [strings[i] for i in catalog.token_name.tolist()]
+        step_ptr, skill_ptr = catalog.step_ptr.tolist(), catalog.skill_ptr.tolist()
+        skill_tokens = catalog.skill_tokens.tolist()
+        token_roadmaps = []
+        for r in range(len(catalog)):
+            steps = []
+            for s in range(step_ptr[r], step_ptr[r + 1]):
+                step = [t for t in skill_tokens[skill_ptr[s]:skill_ptr[s + 1]] if t >= 0]
+                if step:
+                    steps.append(step)
+            token_roadmaps.append(steps)
+        return cls._build(keys, names, token_roadmaps, min_support, version)
+
+    @classmethod
+    def _build(cls, keys: List[str], names: List[str], token_roadmaps: List[List[List[int]]],
+               min_support: int, version) -> "SkillGraph":
+        """Graph from roadmaps given as steps of skill tokens (indexes into keys/names)"""
+        positions = defaultdict(list)
+        transitions = Counter()
+        for steps in token_roadmaps:
+            last = max(len(steps) - 1, 1)
+            for i, step in enumerate(steps):
+                for token in step:
+                    positions[token].append(i / last)
+            for earlier, later in zip(steps, steps[1:]):
+                for u in set(earlier):
+                    for v in set(later):
+                        if u != v:
+                            transitions[(u, v)] += 1
+
+        # Topological ids: earlier mean position first, name as tie-break
+        order = sorted(positions, key=lambda t: (sum(positions[t]) / len(positions[t]), keys[t]))
+        ids = {token: i for i, token in enumerate(order)}
+        names = [names[token] for token in order]
+        n = len(order)
+
+        forward = [(ids[u], ids[v], w) for (u, v), w in transitions.items() if ids[u] < ids[v]]
+        supported = {v for _, v, w in forward if w >= min_support}
+        fallback = defaultdict(list)
+        for u, v, w in forward:
+            if v not in supported:
+                fallback[v].append((w, u))
+        edges = [(u, v, w) for u, v, w in forward if w >= min_support]
+        for v, incoming in fallback.items():
+            # Strongest first; among equals the closest predecessor in topological order
+            edges.extend((u, v, w) for w, u in sorted(incoming, reverse=True)[:FALLBACK_EDGES])
+        edges.sort()
+        src = np.array([e[0] for e in edges], dtype=np.int32)
+        dst = np.array([e[1] for e in edges], dtype=np.int32)
+        weights = np.array([e[2] for e in edges], dtype=np.float32)
+
+        indptr = np.zeros(n + 1, dtype=np.int32)
+        np.add.at(indptr, src + 1, 1)
+        np.cumsum(indptr, out=indptr)
+
+        order = np.lexsort((src, dst))
+        pred_indices = src[order]
+        pred_weights = weights[order]
+        pred_indptr = np.zeros(n + 1, dtype=np.int32)
+        np.add.at(pred_indptr, dst + 1, 1)
+        np.cumsum(pred_indptr, out=pred_indptr)
+
+        out_weight = np.bincount(src, weights=weights, minlength=n)
+        pred_costs = -np.log(pred_weights / out_weight[pred_indices]) if len(edges) else np.zeros(0)
+        return cls(names, indptr, dst, weights, pred_indptr, pred_indices, pred_weights,
+                   pred_costs.astype(np.float32), version)
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.indices)
+
+    def resolve(self, skills: Iterable[str]):
+        """(ids of known skills, names of unknown ones)"""
+        known, unknown = [], []
+        for skill in skills:
+            i = self.ids.get(skill_key(skill))
+            if i is None:
+                unknown.append(skill)
+            else:
+                known.append(i)
+        return known, unknown
+
+    def successors(self, skill: str) -> List[Dict]:
+        i = self.ids.get(skill_key(skill))
+        if i is None:
+            return []
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return [{"skill": self.names[j], "weight": int(w)}
+                for j, w in sorted(zip(self.indices[start:end], self.weights[start:end]), key=lambda x: -x[1])]
+
+    def _relax(self, target_ids: List[int], done: set) -> Dict[int, int]:
+        """Cheapest prerequisite parent of every ancestor of the targets.
+
+        Ancestors are collected up to the completed skills, which are
+        sources and are not expanded, then relaxed once in id (topological)
+        order. Returns {skill: parent}, -1 for a source.
+        """
+        pred_ptr, preds = self._pred_ptr, self._preds
+        relevant, stack = set(target_ids), list(target_ids)
+        while stack:
+            v = stack.pop()
+            if v in done:
+                continue
+            for u in preds[pred_ptr[v]:pred_ptr[v + 1]]:
+                if u not in relevant:
+                    relevant.add(u)
+                    stack.append(u)
+
+        costs = self._costs
+        cost, parent = {}, {}
+        for v in sorted(relevant):
+            if v in done:
+                cost[v], parent[v] = 0.0, -1
+                continue
+            best, best_parent = 0.0, -1
+            for e in range(pred_ptr[v], pred_ptr[v + 1]):
+                candidate = cost[preds[e]] + costs[e]
+                if best_parent == -1 or candidate < best:
+                    best, best_parent = candidate, preds[e]
+            cost[v], parent[v] = best + SKILL_COST, best_parent
+        return parent
+
+    def remaining_path(self, targets: Iterable[str], completed: Iterable[str]) -> Dict:
+        """Ordered skills still to learn to reach every target.
+
+        Each target pulls in its cheapest chain of prerequisites, which ends
+        at a completed skill whenever one is reachable for fewer skills than
+        the default chain. The result is in topological order; targets
+        unknown to the graph are appended at the end.
+        """
+        completed = list(completed)
+        target_ids, unknown_targets = self.resolve(targets)
+        completed_ids, _ = self.resolve(completed)
+        done = set(completed_ids)
+        parent = self._relax(target_ids, done)
+
+        needed = {}
+        for target in target_ids:
+            node = target
+            while node != -1 and node not in done and node not in needed:
+                needed[node] = parent[node]
+                node = parent[node]
+
+        path = [{"skill": self.names[i], "after": self.names[p] if p != -1 else None}
+                for i, p in sorted(needed.items())]
+        completed_set = {skill_key(s) for s in completed}
+        path.extend({"skill": skill, "after": None} for skill in unknown_targets
+                    if skill_key(skill) not in completed_set)
+        return {
+            "path": path,
+            "remaining": len(path),
+            "completed_matched": len(done),
+            "unknown_skills": unknown_targets
+        }
+
+    def stats(self) -> Dict:
+        return {
+            "skills": len(self),
+            "edges": self.edge_count,
+            "entry_skills": int((np.diff(self.pred_indptr) == 0).sum()),
+            "catalog_version": self.version
+        }
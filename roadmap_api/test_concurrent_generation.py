@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test that concurrent identical roadmap generations converge on one document
+Runs the save path from many threads against a local MongoDB and counts the
+commands each call sends to the roadmap collection; skipped when no MongoDB
+is reachable on MONGODB_URL
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import MongoClient, monitoring
+from pymongo.errors import PyMongoError
+
+os.environ.setdefault("DATABASE_NAME", "pathwise_concurrency_test")
+
+PARALLEL = 32
+
+
+class RoadmapCommandCounter(monitoring.CommandListener):
+    """Counts commands that touch the roadmap collection"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.commands = []
+
+    def started(self, event):
+        if event.command.get(event.command_name) == "roadmap":
+            with self.lock:
+                self.commands.append(event.command_name)
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+counter = RoadmapCommandCounter()
+monitoring.register(counter)
+
+import main  # noqa: E402
+
+
+def mongo_available() -> bool:
+    probe = MongoClient(main.MONGODB_URL, serverSelectionTimeoutMS=2000)
+    try:
+        probe.admin.command("ping")
+        return True
+    except PyMongoError:
+        return False
+    finally:
+        probe.close()
+
+
+def test_concurrent_generation():
+    print("Testing concurrent roadmap generation...")
+    if not mongo_available():
+        print(f"  ⏭️  Skipped: no MongoDB reachable at {main.MONGODB_URL}")
+        return
+    main.connect_mongo()  # after registering the listener, which only sees clients created later
+    main.roadmap_collection.delete_many({"source": "user_generated"})
+    main.ensure_roadmap_indexes()
+    counter.commands.clear()
+
+    user_id, goal = "concurrency_user", "Full Stack Developer"
+
+    def generate(i):
+        return main.save_user_roadmap(
+            user_id, goal, "Full Stack Development", [{"category": "Foundations", "skills": ["HTML"]}],
+            None, f"roadmap_test_{i}"
+        )
+
+    with ThreadPoolExecutor(max_workers=PARALLEL) as pool:
+        results = list(pool.map(generate, range(PARALLEL)))
+
+    docs = list(main.roadmap_collection.find({"user_id": user_id, "goal": goal, "source": "user_generated"}))
+    print(f"  Documents: {len(docs)}")
+    print(f"  generation_count: {docs[0]['generation_count'] if docs else None}")
+    print(f"  Commands sent: {len(counter.commands)} ({set(counter.commands)})")
+
+    assert len(docs) == 1, "parallel identical requests created duplicate roadmaps"
+    assert docs[0]["generation_count"] == PARALLEL
+    assert len({r["roadmap_id"] for r in results}) == 1, "callers saw different roadmap ids"
+    assert counter.commands.count("findAndModify") == PARALLEL
+    assert len(counter.commands) == PARALLEL, "expected exactly one round-trip per request"
+
+    main.roadmap_collection.delete_many({"user_id": user_id})
+    print("\n✅ Concurrent generation test passed!")
+
+
+if __name__ == "__main__":
+    test_concurrent_generation()
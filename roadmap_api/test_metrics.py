@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test the /metrics instrumentation
+Checks that requests are labelled by route template and rendered in
+Prometheus text format, and that the middleware stays under a fixed
+per-request overhead budget. Needs no MongoDB.
+"""
+import asyncio
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from pathwise_shared import metrics
+
+OVERHEAD_BUDGET_US = 50  # per request, middleware + counters + histogram
+REQUESTS = 20000
+
+
+def make_app():
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        return {"id": item_id}
+
+    metrics.install(app)
+    return app
+
+
+def test_metrics_endpoint():
+    print("Testing /metrics output...")
+    client = TestClient(make_app())
+    for item_id in ("a", "b", "c"):
+        assert client.get(f"/items/{item_id}").status_code == 200
+    assert client.get("/missing").status_code == 404
+    with metrics.track_upstream("groq") as call:
+        call.status = 200
+
+    response = client.get("/metrics")
+    body = response.text
+    print(body[:400])
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_requests_total{route="/items/{item_id}",method="GET",status="200"} 3.0' in body
+    assert 'http_requests_total{route="unmatched",method="GET",status="404"} 1.0' in body
+    assert 'http_request_duration_seconds_bucket{route="/items/{item_id}",method="GET",le="+Inf"} 3' in body
+    assert 'http_request_duration_seconds_count{route="/items/{item_id}",method="GET"} 3' in body
+    assert 'upstream_request_duration_seconds_count{target="groq",status="200"} 1' in body
+    assert "# TYPE http_requests_in_flight gauge" in body
+    print("\n✅ /metrics output test passed!")
+
+
+async def bare_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def time_requests(app) -> float:
+    """Seconds per request for app, called directly with no server or network"""
+    scope = {"type": "http", "method": "GET", "path": "/items/1", "endpoint": None}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / REQUESTS
+
+
+def test_middleware_overhead():
+    print("Testing metrics middleware overhead...")
+    instrumented = metrics.MetricsMiddleware(bare_app)
+    instrumented.routes = {}
+
+    async def measure():
+        # Warm up, then keep the best of a few rounds to ignore scheduler noise
+        await time_requests(bare_app)
+        await time_requests(instrumented)
+        rounds = [(await time_requests(bare_app), await time_requests(instrumented)) for _ in range(5)]
+        return min(r[0] for r in rounds), min(r[1] for r in rounds)
+
+    bare, with_metrics = asyncio.run(measure())
+    overhead_us = (with_metrics - bare) * 1e6
+    print(f"  Bare app: {bare * 1e6:.1f}us/request")
+    print(f"  With metrics: {with_metrics * 1e6:.1f}us/request")
+    print(f"  Overhead: {overhead_us:.1f}us/request (budget {OVERHEAD_BUDGET_US}us)")
+
+    assert overhead_us < OVERHEAD_BUDGET_US, "metrics middleware is over its per-request budget"
+    print("\n✅ Middleware overhead test passed!")
+
+
+if __name__ == "__main__":
+    test_metrics_endpoint()
+    test_middleware_overhead()
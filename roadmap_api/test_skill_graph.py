@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test SkillGraph path queries
+Builds graphs from small synthetic roadmaps and checks that completed
+skills shorten the remaining path, including through an alternative
+prerequisite branch, and that a graph built from a catalog artifact's skill
+tokens matches one built from the documents. Needs no MongoDB.
+"""
+import csv
+import os
+import tempfile
+
+from catalog_artifact import CatalogArtifact, build_artifact
+from skill_graph import SkillGraph
+
+
+def roadmap(*steps):
+    return {"steps": [{"category": f"Step {i}", "skills": list(skills)} for i, skills in enumerate(steps)]}
+
+
+# The default way to Kubernetes is the short Linux -> Docker chain; a longer
+# cloud branch also leads there
+ROADMAPS = [roadmap(["Linux"], ["Docker"], ["Kubernetes"])] * 3 + \
+    [roadmap(["Networking"], ["AWS"], ["Terraform"], ["Helm"], ["Kubernetes"])] * 2
+
+
+def skills(result):
+    return [step["skill"] for step in result["path"]]
+
+
+def test_default_path():
+    print("Testing the path with nothing completed...")
+    graph = SkillGraph.build(ROADMAPS, min_support=2)
+    result = graph.remaining_path(["Kubernetes"], [])
+    print(f"  Path: {skills(result)}")
+    assert skills(result) == ["Linux", "Docker", "Kubernetes"], skills(result)
+    assert result["path"][-1]["after"] == "Docker"
+    print("\n✅ Default path test passed!")
+
+
+def test_completed_alternative_branch():
+    print("Testing a completed alternative branch...")
+    graph = SkillGraph.build(ROADMAPS, min_support=2)
+    result = graph.remaining_path(["Kubernetes"], ["networking", "AWS", "Terraform", "Helm"])
+    print(f"  Path: {skills(result)}")
+    assert skills(result) == ["Kubernetes"], "the finished cloud branch must replace the default chain"
+    assert result["path"][0]["after"] == "Helm"
+    assert result["completed_matched"] == 4
+
+    partial = graph.remaining_path(["Kubernetes"], ["Linux"])
+    assert skills(partial) == ["Docker", "Kubernetes"], skills(partial)
+    print("\n✅ Alternative branch test passed!")
+
+
+def test_unknown_and_unsupported():
+    print("Testing unknown targets and the min_support fallback...")
+    graph = SkillGraph.build(ROADMAPS + [roadmap(["Python"], ["Django"])], min_support=2)
+    result = graph.remaining_path(["Django", "Rust"], ["Rust"])
+    print(f"  Path: {skills(result)}, unknown: {result['unknown_skills']}")
+    # Python -> Django is seen once, but it is Django's only evidence, so it is kept
+    assert skills(result) == ["Python", "Django"], skills(result)
+    assert result["unknown_skills"] == ["Rust"]
+    print("\n✅ Unknown target test passed!")
+
+
+def test_artifact_tokens():
+    print("Testing a graph built from catalog artifact tokens...")
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset = os.path.join(tmp, "roadmaps.csv")
+        with open(dataset, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=["id", "goal", "domain", "roadmap"])
+            writer.writeheader()
+            for i, r in enumerate(ROADMAPS):
+                text = " | ".join(f"{step['category']}: {'; '.join(step['skills'])}" for step in r["steps"])
+                writer.writerow({"id": i, "goal": f"Goal {i}", "domain": "Cloud", "roadmap": text.replace("Docker", " docker ")})
+        build_artifact([dataset], os.path.join(tmp, "catalog.bin"))
+        catalog = CatalogArtifact(os.path.join(tmp, "catalog.bin"))
+        from_tokens = SkillGraph.from_artifact(catalog, min_support=2)
+        from_documents = SkillGraph.build([{"steps": catalog.steps(r)} for r in range(len(catalog))], min_support=2)
+        result = from_tokens.remaining_path(["Kubernetes"], [])
+        del catalog, from_tokens  # release the mapping before the directory is removed
+    print(f"  Path: {skills(result)}")
+    assert skills(result) == ["Linux", "docker", "Kubernetes"], skills(result)
+    assert result == from_documents.remaining_path(["Kubernetes"], [])
+    print("\n✅ Artifact token test passed!")
+
+
+if __name__ == "__main__":
+    test_default_path()
+    test_completed_alternative_branch()
+    test_unknown_and_unsupported()
+    test_artifact_tokens()
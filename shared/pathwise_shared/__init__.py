@@ -0,0 +1,5 @@
+"""
+Code shared by the PathWise FastAPI services
+  prefork.py   pre-fork multi-worker serving with graceful reload
+  metrics.py   Prometheus /metrics, summed across pre-forked workers
+"""
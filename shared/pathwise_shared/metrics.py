@@ -0,0 +1,394 @@
+"""
+Prometheus metrics for the FastAPI services
+install(app) adds a middleware that records every request and serves the
+registry in Prometheus text format on GET /metrics:
+
+  http_requests_total{route,method,status}              counter
+  http_request_duration_seconds{route,method}           histogram
+  http_requests_in_flight                               gauge
+  mongodb_command_duration_seconds{command,collection}  histogram (mongo_listener())
+  mongodb_command_failures_total{command,collection}    counter
+  upstream_request_duration_seconds{target,status}      histogram (track_upstream())
+  upstream_requests_in_flight{target}                   gauge
+
+A service can add its own series with register(Counter(...)) at import time.
+
+Routes are labelled with their path template ("/api/roadmap/roadmaps/{roadmap_id}"),
+never the raw path, so label cardinality stays bounded.
+
+Under pre-fork serving each worker has its own registry. When METRICS_DIR
+is set (prefork.py sets it), every worker writes a snapshot there every
+METRICS_FLUSH_INTERVAL seconds and /metrics sums the snapshots of all
+workers; gauges only count workers that are still alive. As the master
+reaps a worker it folds that worker's snapshot into retired.json
+(prune_snapshots()), so the directory holds one file per live worker and
+the dead workers' counters and histograms keep adding up.
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no pre-fork serving, so no shared METRICS_DIR to lock
+    fcntl = None
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UPSTREAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+
+_lock = threading.Lock()
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.series: Dict[tuple, object] = {}
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, label_values: tuple = (), amount: float = 1.0):
+        with _lock:
+            self.series[label_values] = self.series.get(label_values, 0.0) + amount
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, label_values: tuple = (), amount: float = 1.0):
+        self.inc(label_values, -amount)
+
+
+class Histogram(Metric):
+    """Per-bucket (non-cumulative) counts plus +Inf count and sum for each label set"""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, label_values: tuple, value: float):
+        with _lock:
+            counts = self.series.get(label_values)
+            if counts is None:
+                counts = self.series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+
+
+REQUESTS = Counter("http_requests_total", "HTTP requests by route, method and status",
+                   ("route", "method", "status"))
+LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency by route",
+                    ("route", "method"))
+IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being served")
+MONGO_LATENCY = Histogram("mongodb_command_duration_seconds", "MongoDB command latency",
+                          ("command", "collection"), MONGO_BUCKETS)
+MONGO_FAILURES = Counter("mongodb_command_failures_total", "MongoDB commands that failed",
+                         ("command", "collection"))
+UPSTREAM_LATENCY = Histogram("upstream_request_duration_seconds", "Upstream HTTP call latency by target",
+                             ("target", "status"), UPSTREAM_BUCKETS)
+UPSTREAM_IN_FLIGHT = Gauge("upstream_requests_in_flight", "Upstream HTTP calls awaiting a response",
+                           ("target",))
+
+REGISTRY = [REQUESTS, LATENCY, IN_FLIGHT, MONGO_LATENCY, MONGO_FAILURES, UPSTREAM_LATENCY, UPSTREAM_IN_FLIGHT]
+
+
+def register(metric: Metric) -> Metric:
+    """Add a service-specific metric to the registry served on /metrics"""
+    REGISTRY.append(metric)
+    return metric
+
+
+# Upstream calls
+
+class UpstreamCall:
+    status = "ok"
+
+
+@contextmanager
+def track_upstream(target: str):
+    """Time an upstream call; set call.status to the response status code when there is one.
+
+        with track_upstream("groq") as call:
+            response = requests.post(...)
+            call.status = response.status_code
+    """
+    call = UpstreamCall()
+    UPSTREAM_IN_FLIGHT.inc((target,))
+    start = time.perf_counter()
+    try:
+        yield call
+    except BaseException:
+        call.status = "error"
+        raise
+    finally:
+        UPSTREAM_IN_FLIGHT.dec((target,))
+        UPSTREAM_LATENCY.observe((target, str(call.status)), time.perf_counter() - start)
+
+
+# MongoDB commands
+
+def mongo_listener():
+    """CommandListener to pass as MongoClient(..., event_listeners=[mongo_listener()])"""
+    from pymongo import monitoring
+
+    class MongoCommandTimer(monitoring.CommandListener):
+        def __init__(self):
+            self.pending = {}
+
+        def started(self, event):
+            target = event.command.get(event.command_name)
+            collection = target if isinstance(target, str) else ""
+            self.pending[(event.connection_id, event.request_id)] = (event.command_name, collection)
+
+        def succeeded(self, event):
+            labels = self.pending.pop((event.connection_id, event.request_id), (event.command_name, ""))
+            MONGO_LATENCY.observe(labels, event.duration_micros / 1e6)
+
+        def failed(self, event):
+            labels = self.pending.pop((event.connection_id, event.request_id), (event.command_name, ""))
+            MONGO_LATENCY.observe(labels, event.duration_micros / 1e6)
+            MONGO_FAILURES.inc(labels)
+
+    return MongoCommandTimer()
+
+
+# HTTP requests
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so it adds no extra task or body buffering per request"""
+
+    def __init__(self, app):
+        self.app = app
+        self.routes = None  # endpoint -> path template, built on the first request
+
+    def route_label(self, scope) -> str:
+        route = scope.get("route")
+        if route is not None and hasattr(route, "path"):
+            return route.path
+        if self.routes is None:
+            app = scope.get("app")
+            self.routes = {getattr(r, "endpoint", None): r.path for r in getattr(app, "routes", [])}
+        return self.routes.get(scope.get("endpoint"), "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if _writer is None and METRICS_DIR:
+            _start_writer()
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            IN_FLIGHT.dec()
+            route = self.route_label(scope)
+            method = scope["method"]
+            REQUESTS.inc((route, method, str(status)))
+            LATENCY.observe((route, method), elapsed)
+
+
+# Exposition
+
+METRICS_DIR = os.getenv("METRICS_DIR")
+FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+_writer = None
+
+
+def snapshot() -> dict:
+    with _lock:
+        return {m.name: [[list(k), v if not isinstance(v, list) else list(v)] for k, v in m.series.items()]
+                for m in REGISTRY}
+
+
+def _write_snapshot():
+    path = os.path.join(METRICS_DIR, f"{os.getpid()}.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(snapshot(), f)
+    os.replace(path + ".tmp", path)
+
+
+def _start_writer():
+    global _writer
+
+    def flush_forever():
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            try:
+                _write_snapshot()
+            except OSError as e:
+                print(f"Could not write metrics snapshot: {e}")
+
+    _writer = threading.Thread(target=flush_forever, daemon=True)
+    _writer.start()
+
+
+def _reset_after_fork():
+    # A forked worker starts with an empty registry and its own snapshot writer;
+    # the pre-fork master sets METRICS_DIR after this module was imported
+    global _writer, METRICS_DIR
+    _writer = None
+    METRICS_DIR = os.getenv("METRICS_DIR")
+    for metric in REGISTRY:
+        metric.series.clear()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+RETIRED = "retired.json"  # counters and histograms of workers that have exited
+
+
+@contextmanager
+def _dir_lock(metrics_dir: str, exclusive: bool):
+    """Keeps collect() from reading a snapshot and the retired.json it is being folded into"""
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(metrics_dir, ".lock"), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _load(path: str):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _add(merged: Dict[str, dict], other: dict, kinds: Dict[str, str], gauges: bool):
+    """Sum a snapshot's series into merged (only metrics merged already has)"""
+    for name, series in other.items():
+        if name not in merged or (kinds.get(name) == "gauge" and not gauges):
+            continue
+        for labels, value in series:
+            labels = tuple(labels)
+            current = merged[name].get(labels)
+            if current is None:
+                merged[name][labels] = value
+            elif isinstance(value, list):
+                merged[name][labels] = [a + b for a, b in zip(current, value)]
+            else:
+                merged[name][labels] = current + value
+
+
+def collect() -> Dict[str, dict]:
+    """This process's series, plus every other worker's last snapshot when METRICS_DIR is set"""
+    merged = {name: {tuple(k): v for k, v in series} for name, series in snapshot().items()}
+    if not METRICS_DIR:
+        return merged
+    kinds = {m.name: m.kind for m in REGISTRY}
+    own = f"{os.getpid()}.json"
+    with _dir_lock(METRICS_DIR, exclusive=False):
+        for filename in os.listdir(METRICS_DIR):
+            if not filename.endswith(".json") or filename == own:
+                continue
+            alive = filename != RETIRED and _pid_alive(int(filename[:-5]))
+            other = _load(os.path.join(METRICS_DIR, filename))
+            if other is not None:
+                _add(merged, other, kinds, gauges=alive)
+    return merged
+
+
+def prune_snapshots(metrics_dir: str) -> int:
+    """Fold the snapshots of workers that are no longer running into retired.json
+    and delete them; returns how many were pruned. Called by the pre-fork master,
+    the only writer of retired.json, whenever it reaps a worker."""
+    dead = [
+        filename for filename in os.listdir(metrics_dir)
+        if filename.endswith(".json") and filename[:-5].isdigit() and not _pid_alive(int(filename[:-5]))
+    ]
+    if not dead:
+        return 0
+    kinds = {m.name: m.kind for m in REGISTRY}
+    merged: Dict[str, dict] = {name: {} for name in kinds}
+    retired_path = os.path.join(metrics_dir, RETIRED)
+    with _dir_lock(metrics_dir, exclusive=True):
+        _add(merged, _load(retired_path) or {}, kinds, gauges=False)
+        for filename in dead:
+            _add(merged, _load(os.path.join(metrics_dir, filename)) or {}, kinds, gauges=False)
+        with open(retired_path + ".tmp", "w") as f:
+            json.dump({name: [[list(k), v] for k, v in series.items()] for name, series in merged.items() if series}, f)
+        os.replace(retired_path + ".tmp", retired_path)
+        for filename in dead:
+            os.remove(os.path.join(metrics_dir, filename))
+    return len(dead)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names, values, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def render() -> str:
+    """The registry in Prometheus text exposition format 0.0.4"""
+    data = collect()
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for labels, value in sorted(data[metric.name].items()):
+            if metric.kind != "histogram":
+                lines.append(f"{metric.name}{_label_text(metric.labels, labels)} {value}")
+                continue
+            cumulative = 0
+            for bound, count in zip(metric.buckets + ("+Inf",), value[:-1]):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{metric.name}_bucket{_label_text(metric.labels, labels, le)} {cumulative}")
+            lines.append(f"{metric.name}_sum{_label_text(metric.labels, labels)} {value[-1]}")
+            lines.append(f"{metric.name}_count{_label_text(metric.labels, labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def install(app):
+    """Record every request on app and serve GET /metrics"""
+    from starlette.responses import PlainTextResponse
+
+    async def metrics_endpoint(request):
+        return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
+
+    app.add_middleware(MetricsMiddleware)
+    app.add_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
@@ -0,0 +1,248 @@
+"""
+Pre-fork serving for the FastAPI services
+The master process imports the app, runs the preload hook (catalogs, graphs)
+and binds the listening socket, then forks the workers. Workers inherit the
+preloaded objects copy-on-write and accept on the shared socket, so N workers
+cost one copy of the catalogs plus what each one dirties while serving.
+
+  WEB_CONCURRENCY         number of workers; 1 (the default) runs uvicorn in-process
+  RELOAD_CHECK_INTERVAL   seconds between dataset_version() checks (default 30)
+  GRACEFUL_TIMEOUT        seconds a retired worker gets to finish its requests (default 30)
+
+Graceful reload (SIGHUP, or dataset_version() returning something new): the
+master re-runs the preload hook, forks a new generation of workers on the
+same socket and sends SIGTERM to the old one. Uvicorn stops accepting in the
+old workers and lets in-flight requests finish; new connections are never
+refused, only idle keep-alive connections to old workers are closed. The
+master keeps supervising (replacing crashed workers, handling signals) while
+the old generation drains.
+SIGTERM/SIGINT on the master shut everything down the same way.
+"""
+import gc
+import os
+import signal
+import socket
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import uvicorn
+
+from . import metrics
+
+RESPAWN_BACKOFF = 1.0  # seconds before replacing a worker that died right after starting
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class PreforkServer:
+    def __init__(self, app, host: str, port: int, workers: int,
+                 preload: Optional[Callable[[], None]] = None,
+                 dataset_version: Optional[Callable[[], object]] = None,
+                 check_interval: float = 30.0, graceful_timeout: float = 30.0,
+                 log_level: str = "info"):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.preload = preload
+        self.dataset_version = dataset_version
+        self.check_interval = check_interval
+        self.graceful_timeout = graceful_timeout
+        self.log_level = log_level
+
+        self.sock = None
+        self.generation = 0
+        self.children: Dict[int, tuple] = {}  # pid -> (generation, started_at)
+        self.retiring: Dict[int, float] = {}  # pid -> when to SIGKILL it
+        self.version = None
+        self._reload_requested = False
+        self._stopping = False
+
+    # Master
+
+    def run(self):
+        self.sock = bind_socket(self.host, self.port)
+        self._prune_metrics()  # left by an earlier master using the same METRICS_DIR
+        self._preload()
+        self.version = self._current_version()
+        signal.signal(signal.SIGHUP, self._on_hup)
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        print(f"Pre-fork master {os.getpid()} on {self.host}:{self.port} with {self.workers} workers")
+
+        for _ in range(self.workers):
+            self._spawn()
+        next_check = time.monotonic() + self.check_interval
+        while not self._stopping:
+            self._reap()
+            self._kill_overdue()
+            if self._reload_requested:
+                self._reload("SIGHUP")
+            elif self.dataset_version is not None and time.monotonic() >= next_check:
+                next_check = time.monotonic() + self.check_interval
+                version = self._current_version()
+                if version != self.version:
+                    self._reload(f"dataset version {self.version} -> {version}")
+            time.sleep(0.2)
+
+        print("Stopping workers")
+        self._retire(list(self.children))
+        while self.children:
+            self._reap()
+            self._kill_overdue()
+            time.sleep(0.05)
+        self.sock.close()
+
+    def _on_hup(self, signum, frame):
+        self._reload_requested = True
+
+    def _on_stop(self, signum, frame):
+        self._stopping = True
+
+    def _current_version(self):
+        if self.dataset_version is None:
+            return None
+        try:
+            return self.dataset_version()
+        except Exception as e:
+            print(f"Could not read dataset version: {e}")
+            return self.version
+
+    def _preload(self):
+        if self.preload is not None:
+            self.preload()
+        # Move everything loaded so far out of the collector's reach: a GC pass
+        # in a worker would otherwise write to every object header and copy the pages
+        gc.collect()
+        gc.freeze()
+
+    def _reload(self, reason: str):
+        self._reload_requested = False
+        print(f"Reloading ({reason})")
+        gc.unfreeze()
+        try:
+            self._preload()
+        except Exception as e:
+            print(f"Reload failed, keeping the current workers: {e}")
+            gc.freeze()
+            return
+        self.version = self._current_version()
+        old = list(self.children)
+        self.generation += 1
+        for _ in range(self.workers):
+            self._spawn()
+        self._retire(old)
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._run_worker()
+            except BaseException as e:
+                print(f"Worker {os.getpid()} failed: {e}")
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = (self.generation, time.monotonic())
+
+    def _reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()  # none left to wait for
+                return
+            if pid == 0:
+                return
+            generation, started_at = self.children.pop(pid, (None, 0.0))
+            self._prune_metrics()
+            if generation != self.generation or self._stopping:
+                continue
+            print(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, replacing it")
+            if time.monotonic() - started_at < RESPAWN_BACKOFF:
+                time.sleep(RESPAWN_BACKOFF)
+            self._spawn()
+
+    def _prune_metrics(self):
+        metrics_dir = os.getenv("METRICS_DIR")
+        if metrics_dir:
+            try:
+                metrics.prune_snapshots(metrics_dir)
+            except OSError as e:
+                print(f"Could not prune metrics snapshots: {e}")
+
+    def _retire(self, pids):
+        """SIGTERM the given workers without waiting for them: _reap() collects them as
+        they exit and _kill_overdue() kills any that overrun graceful_timeout"""
+        deadline = time.monotonic() + self.graceful_timeout
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+            self.retiring[pid] = deadline
+
+    def _kill_overdue(self):
+        now = time.monotonic()
+        for pid, deadline in list(self.retiring.items()):
+            if pid not in self.children:
+                del self.retiring[pid]  # exited and reaped
+            elif now >= deadline:
+                print(f"Worker {pid} did not stop within {self.graceful_timeout}s, killing it")
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                del self.retiring[pid]  # reaped by the next _reap()
+
+    # Worker
+
+    def _run_worker(self):
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, signal.SIG_DFL)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        master = os.getppid()
+
+        def watch_master():
+            # Don't outlive a master that was killed without stopping us
+            while os.getppid() == master:
+                time.sleep(1.0)
+            os.kill(os.getpid(), signal.SIGTERM)
+
+        threading.Thread(target=watch_master, daemon=True).start()
+        config = uvicorn.Config(self.app, log_level=self.log_level)
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+
+def serve(app, host: str = "0.0.0.0", port: int = 8000,
+          preload: Optional[Callable[[], None]] = None,
+          dataset_version: Optional[Callable[[], object]] = None,
+          workers: Optional[int] = None):
+    """Run app with WEB_CONCURRENCY pre-forked workers, or in-process when it is 1.
+    A service whose state must live in one process passes workers=1."""
+    if workers is None:
+        workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    if workers <= 1:
+        # Explicit: uvicorn would otherwise take its worker count from WEB_CONCURRENCY
+        uvicorn.run(app, host=host, port=port, workers=1)
+        return
+    # Workers publish metrics snapshots here so /metrics can sum all of them
+    os.environ.setdefault("METRICS_DIR", tempfile.mkdtemp(prefix="metrics-"))
+    PreforkServer(
+        app, host, port, workers,
+        preload=preload,
+        dataset_version=dataset_version,
+        check_interval=float(os.getenv("RELOAD_CHECK_INTERVAL", "30")),
+        graceful_timeout=float(os.getenv("GRACEFUL_TIMEOUT", "30")),
+        log_level=os.getenv("LOG_LEVEL", "info")
+    ).run()
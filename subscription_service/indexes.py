@@ -0,0 +1,36 @@
+"""
+Index registry for the subscription service
+Every index the subscription and usage queries rely on, applied at startup
+by ensure_indexes. check_indexes.py (repo root) reads INDEXES and
+QUERY_SHAPES to report missing/unused indexes and explain plans.
+"""
+from pymongo import ASCENDING, IndexModel
+
+INDEXES = {
+    "subscriptions": [
+        # One subscription document per user; every lookup and upsert is by user_id
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+    ],
+    "usage_counters": [
+        # Usage counters are upserted per (user_id, period) by UsageMeter.flush
+        IndexModel([("user_id", ASCENDING), ("period", ASCENDING)], name="user_period_unique", unique=True),
+    ],
+}
+
+# Representative find shapes, explained by check_indexes.py
+QUERY_SHAPES = [
+    {"name": "user subscription", "collection": "subscriptions",
+     "filter": {"user_id": "user_1"}},
+    {"name": "usage counters", "collection": "usage_counters",
+     "filter": {"user_id": "user_1", "period": "2025-01-01"}},
+]
+
+
+async def ensure_indexes(db):
+    """Create any declared index that is missing; existing identical indexes are a no-op"""
+    for collection, models in INDEXES.items():
+        for model in models:
+            try:
+                await db[collection].create_indexes([model])
+            except Exception as e:
+                print(f"Could not create index {collection}.{model.document['name']}: {e}")
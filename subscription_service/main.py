@@ -7,24 +7,44 @@ from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
+from collections import OrderedDict
 import os
 import json
 import razorpay
 from motor.motor_asyncio import AsyncIOMotorClient
 from bson import ObjectId
-import uvicorn
 from dotenv import load_dotenv
 import secrets
 import hashlib
 import hmac
+from indexes import ensure_indexes
+from pathwise_shared.prefork import serve
+from pathwise_shared import metrics
+from usage import UsageMeter, USAGE_FIELDS, billing_period
 
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Motor clients belong to the event loop that first uses them, so they are created here
+    owns_client = client is None
+    if owns_client:
+        connect_mongo()
+    await ensure_indexes(db)
+    usage_meter.start()
+    yield
+    # Flush buffered usage before the connection goes away
+    await usage_meter.stop()
+    if owns_client:
+        close_mongo()
+
 app = FastAPI(
     title="PathWise Subscription Service",
     description="Subscription management and payment processing",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -35,18 +55,50 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+metrics.install(app)
 
 # Razorpay configuration
 RAZORPAY_KEY_ID = os.getenv("RAZORPAY_KEY_ID", "rzp_test_...")
 RAZORPAY_KEY_SECRET = os.getenv("RAZORPAY_KEY_SECRET", "...")
-razorpay_client = razorpay.Client(auth=(RAZORPAY_KEY_ID, RAZORPAY_KEY_SECRET))
+RAZORPAY_BASE_URL = os.getenv("RAZORPAY_BASE_URL")  # e.g. a local stand-in for benchmarks
+razorpay_client = None
+
+def get_razorpay_client():
+    """Razorpay API client, created on the first payment call unless one was assigned"""
+    global razorpay_client
+    if razorpay_client is None:
+        options = {"base_url": RAZORPAY_BASE_URL} if RAZORPAY_BASE_URL else {}
+        razorpay_client = razorpay.Client(auth=(RAZORPAY_KEY_ID, RAZORPAY_KEY_SECRET), **options)
+    return razorpay_client
 
-# MongoDB connection
+# MongoDB connection: opened in the lifespan, or injected with connect_mongo(client) before startup
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
-client = AsyncIOMotorClient(MONGODB_URL)
-db = client.pathwise
-subscriptions_collection = db.subscriptions
-users_collection = db.users
+client = None
+db = None
+subscriptions_collection = None
+users_collection = None
+usage_collection = None
+# Feature usage is buffered in memory and flushed in batches
+usage_meter = None
+
+def connect_mongo(mongo_client: Optional[AsyncIOMotorClient] = None):
+    global client, db, subscriptions_collection, users_collection, usage_collection, usage_meter
+    client = mongo_client if mongo_client is not None else AsyncIOMotorClient(MONGODB_URL, event_listeners=[metrics.mongo_listener()])
+    db = client.pathwise
+    subscriptions_collection = db.subscriptions
+    users_collection = db.users
+    usage_collection = db.usage_counters
+    usage_meter = UsageMeter(
+        usage_collection,
+        flush_interval=float(os.getenv("USAGE_FLUSH_INTERVAL", "1.0")),
+        max_pending=int(os.getenv("USAGE_MAX_PENDING", "5000"))
+    )
+
+def close_mongo():
+    global client, db, subscriptions_collection, users_collection, usage_collection, usage_meter
+    if client is not None:
+        client.close()
+    client = db = subscriptions_collection = users_collection = usage_collection = usage_meter = None
 
 # Subscription Plans
 SUBSCRIPTION_PLANS = {
@@ -138,6 +190,9 @@ class UsageStats(BaseModel):
     resources_viewed: int
     opportunities_applied: int
 
+class UsageEvent(BaseModel):
+    count: int = 1
+
 # Helper Functions
 async def get_user_subscription(user_id: str) -> Optional[UserSubscription]:
     """Get user's current subscription"""
@@ -147,21 +202,29 @@ async def get_user_subscription(user_id: str) -> Optional[UserSubscription]:
         return UserSubscription(**subscription)
     return None
 
-async def get_user_usage_stats(user_id: str) -> UsageStats:
-    """Get user's current usage statistics"""
-    # This would integrate with your existing services
-    # For now, returning mock data - you'd implement actual counting
-    return UsageStats(
-        roadmaps_created=5,
-        projects_accessed=12,
-        resources_viewed=45,
-        opportunities_applied=3
-    )
+# user_id -> (expires_at, period) so recording usage doesn't read the subscription every event;
+# least recently used first, at most PERIOD_CACHE_SIZE users
+_period_cache: "OrderedDict[str, tuple]" = OrderedDict()
+PERIOD_CACHE_TTL = 60
+PERIOD_CACHE_SIZE = 10000
+
+def get_billing_period(subscription: Optional[UserSubscription]) -> str:
+    """Get the billing period key usage is counted against"""
+    if subscription and subscription.plan != "free":
+        return billing_period(subscription.start_date)
+    return billing_period()
+
+async def get_user_usage_stats(user_id: str, subscription: Optional[UserSubscription] = None) -> UsageStats:
+    """Get user's usage statistics for the current billing period"""
+    if subscription is None:
+        subscription = await get_user_subscription(user_id)
+    counters = await usage_meter.get_counters(user_id, get_billing_period(subscription))
+    return UsageStats(**{field: counters.get(field, 0) for field in USAGE_FIELDS.values()})
 
 async def check_feature_access(user_id: str, feature: str) -> FeatureAccess:
     """Check if user has access to a specific feature"""
     subscription = await get_user_subscription(user_id)
-    usage_stats = await get_user_usage_stats(user_id)
+    usage_stats = await get_user_usage_stats(user_id, subscription)
     
     # Default to free plan if no subscription
     plan = subscription.plan if subscription else "free"
@@ -221,7 +284,7 @@ async def get_subscription_plans():
 async def get_user_subscription_info(user_id: str):
     """Get user's subscription information"""
     subscription = await get_user_subscription(user_id)
-    usage_stats = await get_user_usage_stats(user_id)
+    usage_stats = await get_user_usage_stats(user_id, subscription)
     
     if not subscription:
         # Create default free subscription
@@ -250,6 +313,28 @@ async def check_user_feature_access(user_id: str, feature: str):
     access = await check_feature_access(user_id, feature)
     return access
 
+@app.post("/api/subscription/usage/{user_id}/{feature}")
+async def record_feature_usage(user_id: str, feature: str, event: Optional[UsageEvent] = None):
+    """Record feature usage. Buffered in memory and flushed in batches."""
+    if feature not in USAGE_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Unknown metered feature: {feature}")
+    count = event.count if event else 1
+    if count < 1:
+        raise HTTPException(status_code=400, detail="count must be positive")
+    cached = _period_cache.get(user_id)
+    now = datetime.now().timestamp()
+    if cached and cached[0] > now:
+        period = cached[1]
+        _period_cache.move_to_end(user_id)
+    else:
+        period = get_billing_period(await get_user_subscription(user_id))
+        _period_cache[user_id] = (now + PERIOD_CACHE_TTL, period)
+        _period_cache.move_to_end(user_id)
+        while len(_period_cache) > PERIOD_CACHE_SIZE:
+            _period_cache.popitem(last=False)
+    usage_meter.record(user_id, feature, period, count)
+    return {"status": "recorded", "feature": feature, "count": count}
+
 @app.post("/api/subscription/create-order")
 async def create_razorpay_order(request: CreateOrderRequest):
     """Create a Razorpay order for subscription"""
@@ -276,7 +361,8 @@ async def create_razorpay_order(request: CreateOrderRequest):
             }
         }
         
-        order = razorpay_client.order.create(data=order_data)
+        with metrics.track_upstream("razorpay"):
+            order = get_razorpay_client().order.create(data=order_data)
         
         return {
             "order_id": order["id"],
@@ -332,7 +418,7 @@ async def verify_payment(request: dict):
             
             # Verify payment with Razorpay
             try:
-                razorpay_client.utility.verify_payment_signature({
+                get_razorpay_client().utility.verify_payment_signature({
                     'razorpay_order_id': razorpay_order_id,
                     'razorpay_payment_id': razorpay_payment_id,
                     'razorpay_signature': razorpay_signature
@@ -358,6 +444,7 @@ async def verify_payment(request: dict):
             {"$set": subscription_data},
             upsert=True
         )
+        _period_cache.pop(user_id, None)
         
         # Also update the user document to mark as premium
         await users_collection.update_one(
@@ -390,6 +477,7 @@ async def cancel_subscription(user_id: str):
             {"user_id": user_id},
             {"$set": {"status": "canceled", "end_date": datetime.now()}}
         )
+        _period_cache.pop(user_id, None)
         
         return {"message": "Subscription canceled successfully"}
         
@@ -402,4 +490,4 @@ async def get_razorpay_config():
     return {"key_id": RAZORPAY_KEY_ID}
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8005)
+    serve(app, host="0.0.0.0", port=8005)
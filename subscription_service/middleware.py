@@ -3,8 +3,11 @@ Middleware to integrate subscription checking with existing services
 """
 
 import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from functools import wraps
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 import aiohttp
 import os
 from dotenv import load_dotenv
@@ -13,19 +16,149 @@ load_dotenv()
 
 SUBSCRIPTION_SERVICE_URL = os.getenv("SUBSCRIPTION_SERVICE_URL", "http://localhost:8004")
 
+# Connection pool and timeout budget for calls to the subscription service
+SUBSCRIPTION_POOL_SIZE = int(os.getenv("SUBSCRIPTION_POOL_SIZE", "20"))
+SUBSCRIPTION_KEEPALIVE = float(os.getenv("SUBSCRIPTION_KEEPALIVE", "30"))
+SUBSCRIPTION_TIMEOUT = float(os.getenv("SUBSCRIPTION_TIMEOUT", "2.0"))
+SUBSCRIPTION_CONNECT_TIMEOUT = float(os.getenv("SUBSCRIPTION_CONNECT_TIMEOUT", "0.5"))
+
+# Circuit breaker and decision cache
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("SUBSCRIPTION_BREAKER_FAILURES", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("SUBSCRIPTION_BREAKER_RESET", "30"))
+DECISION_CACHE_TTL = float(os.getenv("SUBSCRIPTION_DECISION_TTL", "60"))
+DECISION_CACHE_SIZE = int(os.getenv("SUBSCRIPTION_DECISION_CACHE_SIZE", "10000"))
+# Whether to allow access when the service is unreachable and nothing is cached
+FAIL_OPEN = os.getenv("SUBSCRIPTION_FAIL_OPEN", "true").lower() == "true"
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    closed    -> calls go through; failures are counted
+    open      -> calls are skipped until reset_timeout has passed
+    half_open -> a single trial call is let through; success closes the
+                 breaker, failure opens it again
+    """
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.state = "closed"
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow_request(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.state = "closed"
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                print(f"Subscription service circuit opened after {self.failures} failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release_trial(self):
+        """Let another trial through after one ended without an outcome (e.g. cancelled)"""
+        self._trial_in_flight = False
+
+
 class SubscriptionMiddleware:
-    """Middleware to check subscription access for API endpoints"""
+    """Middleware to check subscription access for API endpoints.
+
+    Holds one pooled keep-alive aiohttp session for the lifetime of the host
+    app. Enter lifespan() from the host app's lifespan, or use install(app)
+    to wrap the app's lifespan with it.
+    """
     
     def __init__(self):
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.breaker = CircuitBreaker()
+        # (user_id, feature) -> (expires_at, decision), least recently cached first
+        self._decisions: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+    
+    async def startup(self):
+        """Create the pooled session. Safe to call more than once."""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=SUBSCRIPTION_POOL_SIZE,
+                limit_per_host=SUBSCRIPTION_POOL_SIZE,
+                keepalive_timeout=SUBSCRIPTION_KEEPALIVE,
+                ttl_dns_cache=300
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=SUBSCRIPTION_TIMEOUT,
+                sock_connect=SUBSCRIPTION_CONNECT_TIMEOUT
+            )
+            self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+    
+    async def shutdown(self):
+        """Close the session and release pooled connections"""
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
         self.session = None
     
+    @asynccontextmanager
+    async def lifespan(self):
+        """Open the session on entry and close it on exit: `async with subscription_middleware.lifespan():`"""
+        await self.startup()
+        try:
+            yield self
+        finally:
+            await self.shutdown()
+    
+    def install(self, app):
+        """Wrap a FastAPI app's lifespan so the session opens and closes with the app.
+        Event handlers are not run for apps built with lifespan=, so this wraps the context instead."""
+        inner = app.router.lifespan_context
+        
+        @asynccontextmanager
+        async def lifespan(app):
+            async with self.lifespan():
+                async with inner(app) as state:
+                    yield state
+        
+        app.router.lifespan_context = lifespan
+    
     async def get_session(self):
-        if not self.session:
-            self.session = aiohttp.ClientSession()
+        if self.session is None or self.session.closed:
+            await self.startup()
         return self.session
     
+    def _cache_decision(self, user_id: str, feature: str, decision: Dict[str, Any]):
+        key = (user_id, feature)
+        self._decisions[key] = (time.monotonic() + DECISION_CACHE_TTL, decision)
+        self._decisions.move_to_end(key)
+        while len(self._decisions) > DECISION_CACHE_SIZE:
+            self._decisions.popitem(last=False)
+    
+    def _fallback_decision(self, user_id: str, feature: str) -> Dict[str, Any]:
+        """Decision to use when the subscription service can't be asked"""
+        cached = self._decisions.get((user_id, feature))
+        if cached and cached[0] > time.monotonic():
+            return {**cached[1], "cached": True}
+        return {"allowed": FAIL_OPEN, "current_usage": 0, "limit": -1, "plan": "free", "degraded": True}
+    
     async def check_feature_access(self, user_id: str, feature: str) -> Dict[str, Any]:
         """Check if user has access to a specific feature"""
+        if not self.breaker.allow_request():
+            return self._fallback_decision(user_id, feature)
+        trial = self.breaker.state == "half_open"
         try:
             session = await self.get_session()
             async with session.get(
@@ -33,29 +166,52 @@ class SubscriptionMiddleware:
             ) as response:
                 if response.status == 200:
                     data = await response.json()
-                    return {
+                    self.breaker.record_success()
+                    decision = {
                         "allowed": data.get("allowed", False),
                         "current_usage": data.get("current_usage", 0),
                         "limit": data.get("limit", 0),
                         "plan": data.get("plan", "free")
                     }
+                    self._cache_decision(user_id, feature, decision)
+                    return decision
+                if response.status >= 500:
+                    self.breaker.record_failure()
                 else:
-                    # If subscription service is down, allow access
-                    return {"allowed": True, "current_usage": 0, "limit": -1, "plan": "free"}
+                    self.breaker.record_success()
+                print(f"Subscription check returned {response.status}")
+                return self._fallback_decision(user_id, feature)
         except Exception as e:
             print(f"Subscription check failed: {e}")
-            # If subscription service is down, allow access
-            return {"allowed": True, "current_usage": 0, "limit": -1, "plan": "free"}
+            self.breaker.record_failure()
+            return self._fallback_decision(user_id, feature)
+        finally:
+            if trial:
+                self.breaker.release_trial()
     
-    async def increment_usage(self, user_id: str, feature: str) -> bool:
-        """Increment usage count for a feature (would be implemented in subscription service)"""
+    async def increment_usage(self, user_id: str, feature: str, count: int = 1) -> bool:
+        """Record feature usage with the subscription service's usage meter"""
+        if not self.breaker.allow_request():
+            return False
+        trial = self.breaker.state == "half_open"
         try:
-            # This would be implemented as an API call to subscription service
-            # For now, we'll just return True
-            return True
+            session = await self.get_session()
+            async with session.post(
+                f"{SUBSCRIPTION_SERVICE_URL}/api/subscription/usage/{user_id}/{feature}",
+                json={"count": count}
+            ) as response:
+                if response.status >= 500:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                return response.status == 200
         except Exception as e:
             print(f"Usage increment failed: {e}")
-            return True
+            self.breaker.record_failure()
+            return False
+        finally:
+            if trial:
+                self.breaker.release_trial()
 
 # Global middleware instance
 subscription_middleware = SubscriptionMiddleware()
@@ -0,0 +1,198 @@
+"""
+Test SubscriptionMiddleware's circuit breaker and fallbacks
+Runs a local stand-in for the subscription service (aiohttp, random port)
+whose status and latency each test sets; needs no MongoDB.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from aiohttp import web
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import middleware
+from middleware import CircuitBreaker, SubscriptionMiddleware
+
+upstream = {"status": 200, "delay": 0.0, "calls": 0}
+
+
+async def feature_access(request):
+    upstream["calls"] += 1
+    await asyncio.sleep(upstream["delay"])
+    if upstream["status"] != 200:
+        return web.json_response({"detail": "error"}, status=upstream["status"])
+    return web.json_response({"allowed": True, "current_usage": 1, "limit": 3, "plan": "basic"})
+
+
+async def usage(request):
+    upstream["calls"] += 1
+    return web.json_response({"status": "recorded"}, status=upstream["status"])
+
+
+async def start_upstream():
+    app = web.Application()
+    app.router.add_get("/api/subscription/feature-access/{user_id}/{feature}", feature_access)
+    app.router.add_post("/api/subscription/usage/{user_id}/{feature}", usage)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    middleware.SUBSCRIPTION_SERVICE_URL = f"http://127.0.0.1:{port}"
+    return runner
+
+
+def new_middleware(failures=3, reset=0.2):
+    subscription = SubscriptionMiddleware()
+    subscription.breaker = CircuitBreaker(failure_threshold=failures, reset_timeout=reset)
+    return subscription
+
+
+async def test_breaker_states():
+    print("1. Opening after consecutive failures, then half-open and closed...")
+    subscription = new_middleware()
+    upstream.update(status=200, calls=0)
+    decision = await subscription.check_feature_access("user_1", "roadmaps")
+    assert decision["allowed"] and decision["plan"] == "basic"
+
+    upstream["status"] = 500
+    for _ in range(3):
+        await subscription.check_feature_access("user_1", "roadmaps")
+    assert subscription.breaker.state == "open", subscription.breaker.state
+    calls = upstream["calls"]
+    decision = await subscription.check_feature_access("user_1", "roadmaps")
+    assert upstream["calls"] == calls, "an open breaker must not call the service"
+    assert decision.get("cached") and decision["plan"] == "basic", decision
+    print(f"   ✓ open after 3 failures; served the cached decision: {decision}")
+
+    await asyncio.sleep(0.25)
+    await subscription.check_feature_access("user_1", "roadmaps")
+    assert subscription.breaker.state == "open", "a failed trial opens the breaker again"
+    await asyncio.sleep(0.25)
+    upstream["status"] = 200
+    await subscription.check_feature_access("user_1", "roadmaps")
+    assert subscription.breaker.state == "closed" and subscription.breaker.failures == 0
+    print("   ✓ failed trial re-opened it, successful trial closed it")
+    await subscription.shutdown()
+
+
+async def test_single_trial_and_cancellation():
+    print("\n2. One trial at a time in half-open, released when cancelled...")
+    subscription = new_middleware(failures=1, reset=0.1)
+    upstream.update(status=500, delay=0.0)
+    await subscription.check_feature_access("user_2", "projects")
+    await asyncio.sleep(0.15)
+
+    upstream.update(status=200, delay=0.5, calls=0)
+    trial = asyncio.create_task(subscription.check_feature_access("user_2", "projects"))
+    await asyncio.sleep(0.05)
+    decision = await subscription.check_feature_access("user_2", "projects")
+    assert decision.get("degraded") and upstream["calls"] == 1, "only the trial may reach the service"
+    trial.cancel()
+    try:
+        await trial
+    except asyncio.CancelledError:
+        pass
+    assert subscription.breaker.state == "half_open"
+
+    upstream["delay"] = 0.0
+    await subscription.check_feature_access("user_2", "projects")
+    assert subscription.breaker.state == "closed", "a cancelled trial must not wedge the breaker"
+    print("   ✓ concurrent call fell back; next trial ran after the cancelled one")
+    await subscription.shutdown()
+
+
+async def test_fail_open_and_closed():
+    print("\n3. Fallback with nothing cached...")
+    subscription = new_middleware(failures=1, reset=60)
+    upstream.update(status=503, delay=0.0)
+    try:
+        middleware.FAIL_OPEN = True
+        opened = await subscription.check_feature_access("user_3", "resources")
+        middleware.FAIL_OPEN = False
+        closed = await subscription.check_feature_access("user_3", "resources")
+    finally:
+        middleware.FAIL_OPEN = True
+    assert opened["allowed"] and opened["degraded"]
+    assert not closed["allowed"] and closed["degraded"]
+    print("   ✓ fail-open allows, fail-closed denies")
+    await subscription.shutdown()
+
+
+async def test_usage_counts_toward_breaker():
+    print("\n4. Usage increments are breaker-accounted...")
+    subscription = new_middleware(failures=2, reset=60)
+    upstream.update(status=500, calls=0)
+    results = [await subscription.increment_usage("user_4", "opportunities") for _ in range(4)]
+    assert results == [False] * 4
+    assert subscription.breaker.state == "open" and upstream["calls"] == 2, upstream
+    print("   ✓ opened after 2 failed increments; later ones skipped the service")
+    await subscription.shutdown()
+
+
+def test_decision_cache_bound():
+    print("\n5. Decision cache stays at DECISION_CACHE_SIZE...")
+    subscription = SubscriptionMiddleware()
+    size = middleware.DECISION_CACHE_SIZE
+    start = time.perf_counter()
+    for i in range(size + 5000):
+        subscription._cache_decision(f"user_{i}", "roadmaps", {"allowed": True})
+    elapsed = time.perf_counter() - start
+    assert len(subscription._decisions) == size
+    assert ("user_0", "roadmaps") not in subscription._decisions
+    assert (f"user_{size + 4999}", "roadmaps") in subscription._decisions
+    print(f"   ✓ {size + 5000} inserts in {elapsed * 1000:.1f}ms, oldest evicted")
+
+
+async def test_lifespan_closes_session():
+    print("\n6. Session follows the host app's lifespan...")
+    subscription = new_middleware()
+    async with subscription.lifespan():
+        session = subscription.session
+        assert session is not None and not session.closed
+        upstream.update(status=200, delay=0.0)
+        assert (await subscription.check_feature_access("user_6", "roadmaps"))["allowed"]
+    assert session.closed and subscription.session is None
+    print("   ✓ async with lifespan() opened the session and closed it on exit")
+
+
+def test_install_on_lifespan_app():
+    print("\n7. install() on an app built with lifespan=...")
+    events = []
+
+    @asynccontextmanager
+    async def host_lifespan(app):
+        events.append("host startup")
+        yield
+        events.append("host shutdown")
+
+    app = FastAPI(lifespan=host_lifespan)
+    subscription = SubscriptionMiddleware()
+    subscription.install(app)
+    with TestClient(app):
+        session = subscription.session
+        assert session is not None and not session.closed
+    assert events == ["host startup", "host shutdown"], events
+    assert session.closed and subscription.session is None
+    print("   ✓ host lifespan ran and the session was closed on shutdown")
+
+
+async def main():
+    runner = await start_upstream()
+    try:
+        await test_breaker_states()
+        await test_single_trial_and_cancellation()
+        await test_fail_open_and_closed()
+        await test_usage_counts_toward_breaker()
+        await test_lifespan_closes_session()
+    finally:
+        await runner.cleanup()
+    test_decision_cache_bound()
+    test_install_on_lifespan_app()
+    print("\n✅ Middleware tests passed!")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
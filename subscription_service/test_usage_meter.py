@@ -0,0 +1,55 @@
+"""
+Test the usage meter against a local MongoDB
+Run with a mongod on MONGODB_URL (default mongodb://localhost:27017)
+"""
+
+import asyncio
+import os
+import time
+from motor.motor_asyncio import AsyncIOMotorClient
+from usage import UsageMeter, billing_period
+
+MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+EVENTS = 20000
+USERS = 50
+
+
+async def test_usage_meter():
+    client = AsyncIOMotorClient(MONGODB_URL, serverSelectionTimeoutMS=3000)
+    db = client.pathwise_usage_test
+    await db.usage_counters.drop()
+
+    meter = UsageMeter(db.usage_counters, flush_interval=0.2, max_pending=5000)
+    await meter.ensure_indexes()
+    meter.start()
+    period = billing_period()
+
+    print(f"1. Recording {EVENTS} events for {USERS} users...")
+    start = time.perf_counter()
+    for i in range(EVENTS):
+        meter.record(f"user_{i % USERS}", "resources", period)
+        if i % 1000 == 0:
+            await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    print(f"   ✓ {EVENTS / elapsed:,.0f} events/sec recorded")
+
+    print("\n2. Reading counters before the buffer is drained...")
+    counters = await meter.get_counters("user_0", period)
+    assert counters["resources_viewed"] == EVENTS // USERS, counters
+    print(f"   ✓ user_0 resources_viewed = {counters['resources_viewed']}")
+
+    print("\n3. Draining and checking stored documents...")
+    await meter.stop()
+    docs = await db.usage_counters.count_documents({"period": period})
+    assert docs == USERS, docs
+    stored = await db.usage_counters.find_one({"user_id": "user_0", "period": period})
+    assert stored["counters"]["resources_viewed"] == EVENTS // USERS, stored
+    print(f"   ✓ {docs} counter documents, one per user per period")
+
+    await db.usage_counters.drop()
+    client.close()
+    print("\n✅ Usage meter test completed!")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_usage_meter())
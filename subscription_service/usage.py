@@ -0,0 +1,193 @@
+"""
+Usage metering for PathWise subscriptions
+Buffers feature events in memory and flushes them as batched $inc upserts
+into one counter document per user per billing period
+"""
+
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+# Feature name (as used by check_feature_access) -> counter field
+USAGE_FIELDS = {
+    "roadmaps": "roadmaps_created",
+    "projects": "projects_accessed",
+    "resources": "resources_viewed",
+    "opportunities": "opportunities_applied"
+}
+
+BILLING_PERIOD_DAYS = 30
+# Lock-free counter reads to try before reading under the flush lock
+READ_ATTEMPTS = 3
+
+
+def billing_period(start_date: Optional[datetime] = None, now: Optional[datetime] = None) -> str:
+    """Return the billing period key for a point in time.
+
+    Paid subscriptions are billed in 30-day cycles anchored on their start
+    date, so the key is the start of the current cycle. Users without a
+    subscription start date are metered per calendar month.
+    """
+    now = now or datetime.now()
+    if start_date and start_date <= now:
+        cycles = (now - start_date).days // BILLING_PERIOD_DAYS
+        period_start = start_date + timedelta(days=cycles * BILLING_PERIOD_DAYS)
+        return period_start.strftime("%Y-%m-%d")
+    return now.strftime("%Y-%m")
+
+
+class UsageMeter:
+    """Buffered usage counters backed by a MongoDB collection.
+
+    Events are aggregated in memory per (user_id, period) and written with a
+    single bulk_write of $inc upserts, so thousands of events per second cost
+    one round-trip per flush instead of one write per event. Reads merge the
+    stored counters with the not-yet-flushed buffer, so a user always sees
+    their own usage immediately.
+    """
+
+    def __init__(self, collection, flush_interval: float = 1.0, max_pending: int = 5000):
+        self.collection = collection
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Dict[Tuple[str, str], Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._pending_events = 0
+        self._lock = asyncio.Lock()
+        # The batch being written, and how many flushes have taken a batch so far
+        self._inflight: Dict[Tuple[str, str], Dict[str, int]] = {}
+        self._flushes = 0
+        self._flush_task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+
+    async def ensure_indexes(self):
+        """Create the unique (user_id, period) index the upserts rely on"""
+        await self.collection.create_index(
+            [("user_id", 1), ("period", 1)], unique=True, name="user_period_unique"
+        )
+
+    def record(self, user_id: str, feature: str, period: str, count: int = 1):
+        """Buffer a usage event. Never touches the database."""
+        field = USAGE_FIELDS.get(feature, feature)
+        self._pending[(user_id, period)][field] += count
+        self._pending_events += count
+        if self._pending_events >= self.max_pending:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        """Write all buffered increments in one unordered bulk_write.
+
+        Returns the number of counter documents touched. On failure the
+        increments that were not written are merged back into the buffer so
+        nothing is lost; after a partial failure only the failed ones are.
+        """
+        async with self._lock:
+            if not self._pending:
+                return 0
+            batch = self._pending
+            self._pending = defaultdict(lambda: defaultdict(int))
+            self._pending_events = 0
+            self._inflight = batch
+            self._flushes += 1
+
+            now = datetime.now()
+            operations = [
+                UpdateOne(
+                    {"user_id": user_id, "period": period},
+                    {
+                        "$inc": {f"counters.{field}": value for field, value in counters.items()},
+                        "$set": {"updated_at": now},
+                        "$setOnInsert": {"created_at": now}
+                    },
+                    upsert=True
+                )
+                for (user_id, period), counters in batch.items()
+            ]
+            try:
+                await self.collection.bulk_write(operations, ordered=False)
+            except BulkWriteError as e:
+                # Unordered: everything but the reported errors was applied
+                keys = list(batch)
+                failed = [keys[error["index"]] for error in e.details.get("writeErrors", [])]
+                print(f"Usage flush partly failed, re-queueing {len(failed)} of {len(operations)} counters: {e}")
+                self._requeue({key: batch[key] for key in failed})
+                raise
+            except Exception as e:
+                print(f"Usage flush failed, re-queueing {len(operations)} counters: {e}")
+                self._requeue(batch)
+                raise
+            finally:
+                self._inflight = {}
+            return len(operations)
+
+    def _requeue(self, batch: Dict[Tuple[str, str], Dict[str, int]]):
+        for key, counters in batch.items():
+            for field, value in counters.items():
+                self._pending[key][field] += value
+                self._pending_events += value
+
+    async def get_counters(self, user_id: str, period: str) -> Dict[str, int]:
+        """Return stored counters for a period plus any unflushed increments.
+
+        Reads the database without the flush lock. A batch moving from the
+        buffer into the database while the read runs could be counted twice
+        (or missed), so the read is retried when a flush took a batch
+        meanwhile, and done under the lock if that keeps happening.
+        """
+        key = (user_id, period)
+        for _ in range(READ_ATTEMPTS):
+            flushes = self._flushes
+            if key in self._inflight:
+                break  # its increments may or may not be stored yet
+            doc = await self._read(key)
+            if self._flushes == flushes:
+                return self._merge(doc, self._pending.get(key, {}))
+        async with self._lock:
+            return self._merge(await self._read(key), self._pending.get(key, {}))
+
+    async def _read(self, key: Tuple[str, str]) -> Optional[dict]:
+        return await self.collection.find_one(
+            {"user_id": key[0], "period": key[1]}, {"counters": 1, "_id": 0}
+        )
+
+    @staticmethod
+    def _merge(doc: Optional[dict], pending: Dict[str, int]) -> Dict[str, int]:
+        counters = {field: 0 for field in USAGE_FIELDS.values()}
+        if doc:
+            for field, value in doc.get("counters", {}).items():
+                counters[field] = counters.get(field, 0) + value
+        for field, value in dict(pending).items():
+            counters[field] = counters.get(field, 0) + value
+        return counters
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                # Already re-queued; try again on the next tick
+                pass
+
+    def start(self):
+        """Start the background flush loop on the running event loop"""
+        if self._flush_task is None:
+            self._stopping = False
+            self._flush_task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop and drain whatever is still buffered"""
+        if self._flush_task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._flush_task
+            self._flush_task = None
+        await self.flush()